@@ -0,0 +1,75 @@
+# benchmarks/bench_async.py
+"""Concurrent read bursts against the sync Flask API and the async (ASGI) read API on the same database.
+Servers and clients share one process, so absolute numbers are pessimistic; compare the two groups."""
+import http.client
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+CLIENTS = 32
+REQUESTS_PER_CLIENT = 5
+PATHS = ['/api/statistics', '/api/entries?search=Bremse', '/api/entries?risk_filter=high&status_filter=Offen',
+         '/api/analytics']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def burst(port, cookie):
+    """CLIENTS concurrent clients, each sending REQUESTS_PER_CLIENT reads over a keep-alive connection"""
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        try:
+            for i in range(REQUESTS_PER_CLIENT):
+                connection.request('GET', PATHS[(index + i) % len(PATHS)], headers={'Cookie': cookie})
+                response = connection.getresponse()
+                response.read()
+                assert response.status == 200
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(CLIENTS) as executor:
+        list(executor.map(client, range(CLIENTS)))
+
+
+@pytest.fixture(scope='session')
+def servers(flask_client):
+    """(sync port, async port, session cookie) for the database behind flask_client"""
+    import uvicorn
+
+    import flask_app
+    import fmea_async_api
+    import fmea_loadtest
+
+    sync_server = fmea_loadtest.start_server(flask_app.app)
+    async_server = uvicorn.Server(uvicorn.Config(fmea_async_api.app, host='127.0.0.1', port=free_port(),
+                                                 log_level='warning'))
+    thread = threading.Thread(target=async_server.run, daemon=True)
+    thread.start()
+    while not async_server.started:
+        time.sleep(0.01)
+
+    cookie = flask_client.get_cookie(flask_app.app.config['SESSION_COOKIE_NAME'])
+    yield sync_server.port, async_server.config.port, f'{cookie.key}={cookie.value}'
+
+    async_server.should_exit = True
+    thread.join()
+    sync_server.shutdown()
+
+
+@pytest.mark.benchmark(group='concurrent-reads-sync')
+def bench_sync_reads(benchmark, servers):
+    sync_port, _, cookie = servers
+    benchmark.pedantic(burst, (sync_port, cookie), rounds=5, iterations=1)
+
+
+@pytest.mark.benchmark(group='concurrent-reads-async')
+def bench_async_reads(benchmark, servers):
+    _, async_port, cookie = servers
+    benchmark.pedantic(burst, (async_port, cookie), rounds=5, iterations=1)
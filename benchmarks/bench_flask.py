@@ -0,0 +1,42 @@
+# benchmarks/bench_flask.py
+"""Flask hot paths: entry list API (the dashboard's queries), statistics API and CSV export"""
+import pytest
+
+
+@pytest.mark.benchmark(group='flask-api-entries-list')
+def bench_api_entries(benchmark, flask_client):
+    response = benchmark(flask_client.get, '/api/entries?page_size=50')
+    assert response.status_code == 200
+
+
+@pytest.mark.benchmark(group='flask-api-entries-search')
+def bench_api_entries_search(benchmark, flask_client):
+    response = benchmark(flask_client.get, '/api/entries?search=Bremse&status_filter=Offen&page_size=50')
+    assert response.status_code == 200
+
+
+@pytest.mark.benchmark(group='flask-api-entries-page')
+def bench_api_entries_next_page(benchmark, flask_client):
+    # Keyset pagination: a later page costs the same as the first
+    cursor = flask_client.get('/api/entries?page_size=50').json['next_cursor']
+    response = benchmark(flask_client.get, f'/api/entries?page_size=50&cursor={cursor}')
+    assert response.status_code == 200
+
+
+@pytest.mark.benchmark(group='flask-api-entries')
+def bench_api_entries_filtered(benchmark, flask_client):
+    response = benchmark(flask_client.get, '/api/entries?risk_filter=high&priority_filter=H')
+    assert response.status_code == 200
+
+
+@pytest.mark.benchmark(group='flask-api-statistics')
+def bench_api_statistics(benchmark, flask_client):
+    response = benchmark(flask_client.get, '/api/statistics')
+    assert response.json['total_entries'] > 0
+
+
+@pytest.mark.benchmark(group='flask-export-csv')
+def bench_export_csv(benchmark, flask_client):
+    # The export is streamed, so read the whole body inside the timed call
+    size = benchmark.pedantic(lambda: len(flask_client.get('/export_csv').get_data()), rounds=3, iterations=1)
+    assert size > 0
@@ -0,0 +1,34 @@
+# benchmarks/bench_streamlit.py
+"""Streamlit hot paths (both apps) without st.cache_data: entry page, search, statistics and CSV export"""
+import pytest
+
+PAGE_SIZE = 50
+
+
+@pytest.mark.benchmark(group='streamlit-get-fmea-entries')
+def bench_get_fmea_entries(benchmark, streamlit_app):
+    entries = benchmark(streamlit_app.query_fmea_entries.__wrapped__, '', '', '', '', PAGE_SIZE, 0, ())
+    assert len(entries) == PAGE_SIZE
+
+
+@pytest.mark.benchmark(group='streamlit-search')
+def bench_search_entries(benchmark, streamlit_app):
+    benchmark(streamlit_app.query_fmea_entries.__wrapped__, 'Bremse', '', 'Offen', '', PAGE_SIZE, 0, ())
+
+
+@pytest.mark.benchmark(group='streamlit-entry-count')
+def bench_entry_count(benchmark, streamlit_app):
+    count = benchmark(streamlit_app.query_entry_count.__wrapped__, '', 'high', '', 'H', ())
+    assert count > 0
+
+
+@pytest.mark.benchmark(group='streamlit-statistics')
+def bench_statistics(benchmark, streamlit_app):
+    stats = benchmark(streamlit_app.query_statistics.__wrapped__, ())
+    assert stats['total'] > 0
+
+
+@pytest.mark.benchmark(group='streamlit-export-csv')
+def bench_export_csv(benchmark, streamlit_app):
+    data = benchmark.pedantic(streamlit_app.export_to_csv.__wrapped__, ('', '', '', '', ()), rounds=3, iterations=1)
+    assert data
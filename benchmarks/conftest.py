@@ -0,0 +1,123 @@
+# benchmarks/conftest.py
+"""Fixtures for the benchmark suite: seeded synthetic databases per size, cached between runs
+
+Install the dependencies with `pip install -r benchmarks/requirements.txt`. Run from the repository root:
+
+    pytest benchmarks                                        # 1k and 100k rows
+    FMEA_BENCH_SIZES=1k,100k,1m pytest benchmarks            # include 1M rows (first build takes minutes)
+    pytest benchmarks --benchmark-compare=0001               # against the committed baseline
+    pytest benchmarks --benchmark-compare=0001 --benchmark-compare-fail=median:30%  # fail on regressions
+    pytest benchmarks --benchmark-save=baseline              # store a new run under benchmarks/baselines/
+    pytest-benchmark compare --storage=benchmarks/baselines --group-by=group,param:size   # report over stored runs
+
+benchmarks/baselines holds the committed baseline (0001_baseline) and the comparison report of the
+run that checked it (comparison.txt). Timings depend on the machine, so compare runs from the same one.
+
+The generated databases live in the pytest cache (benchmarks/.pytest_cache/d/fmea_bench); `pytest --cache-clear`
+rebuilds them.
+"""
+import hashlib
+import importlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Flask binds its database URL at import time, so point it at a scratch file before the import
+FLASK_DATABASE = os.path.join(tempfile.mkdtemp(prefix='fmea-bench-'), 'fmea.db')
+os.environ['FMEA_DATABASE_URL'] = f'sqlite:///{FLASK_DATABASE}'
+
+import fmea_db  # noqa: E402
+import fmea_synthetic  # noqa: E402
+
+SIZES = os.environ.get('FMEA_BENCH_SIZES', '1k,100k').split(',')
+SEED = int(os.environ.get('FMEA_BENCH_SEED', fmea_synthetic.DEFAULT_SEED))
+STREAMLIT_APPS = ['streamlit_app', 'streamlit_app1']
+
+
+def _remove_database(path):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _build_streamlit(path, rows):
+    conn = sqlite3.connect(path)
+    try:
+        fmea_db.run_migrations(conn, fmea_db.MIGRATIONS)
+        for username, password, role in (('admin', 'admin123', 'admin'), ('user', 'user123', 'user')):
+            conn.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                         (username, hashlib.sha256(password.encode()).hexdigest(), role))
+        conn.commit()
+        fmea_synthetic.populate(conn, 'fmea_entries', 'actions', rows, 1, SEED)
+    finally:
+        conn.close()
+
+
+def _build_flask(path, rows):
+    import flask_app
+
+    with flask_app.app.app_context():
+        flask_app.db.engine.dispose()
+        _remove_database(FLASK_DATABASE)
+        flask_app.init_db()
+        admin = flask_app.User.query.filter_by(username='admin').first()
+        conn = flask_app.db.engine.raw_connection()
+        try:
+            fmea_synthetic.populate(conn, flask_app.FMEAEntry.__tablename__, flask_app.Action.__tablename__,
+                                    rows, admin.id, SEED)
+        finally:
+            conn.close()
+        flask_app.db.session.remove()
+        flask_app.db.engine.dispose()
+    shutil.copyfile(FLASK_DATABASE, path)
+
+
+def cached_database(config, schema, size):
+    """Path of the generated database for a schema (flask/streamlit) and size, built on first use"""
+    directory = config.cache.mkdir('fmea_bench')
+    path = str(directory / f'{schema}-{size}-seed{SEED}.db')
+    if not os.path.exists(path):
+        build = path + '.build'
+        _remove_database(build)
+        (_build_flask if schema == 'flask' else _build_streamlit)(build, fmea_synthetic.parse_size(size))
+        os.replace(build, path)
+    return path
+
+
+@pytest.fixture(scope='session', params=SIZES)
+def size(request):
+    return request.param
+
+
+@pytest.fixture(scope='session')
+def flask_client(request, size):
+    """Logged-in admin test client on a copy of the generated Flask database"""
+    import flask_app
+
+    source = cached_database(request.config, 'flask', size)
+    with flask_app.app.app_context():
+        flask_app.db.engine.dispose()
+        _remove_database(FLASK_DATABASE)
+        shutil.copyfile(source, FLASK_DATABASE)
+        flask_app.migrate_db()
+
+    client = flask_app.app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+
+@pytest.fixture(scope='session', params=STREAMLIT_APPS)
+def streamlit_app(request, size):
+    """Streamlit app module pointed at the generated database; call the __wrapped__ queries to skip st.cache_data"""
+    module = importlib.import_module(request.param)
+    module.DATABASE = cached_database(request.config, 'streamlit', size)
+    module.get_db.clear()
+    module.init_db.clear()
+    module.init_db()
+    return module
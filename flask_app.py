@@ -1,17 +1,52 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, make_response
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context, g, has_request_context, make_response, send_file
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import base64
+import binascii
 import csv
 import io
+import json
 import os
+import tempfile
+import threading
+import time
+import click
 from functools import wraps
+import fmea_auth
+import fmea_batch
+import fmea_db
+import fmea_metrics
+import fmea_priority
+import fmea_write_queue
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fmea.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('FMEA_DATABASE_URL', 'sqlite:///fmea.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['DASHBOARD_PAGE_SIZE'] = 50
+app.config['API_PAGE_SIZE'] = 100
+app.config['MAX_PAGE_SIZE'] = 500
+app.config['EXPORT_BATCH_SIZE'] = 1000
+app.config['EXPORT_CHUNK_SIZE'] = 64 * 1024
+app.config['EXPORT_ROW_GROUP_SIZE'] = 50000  # rows per Parquet row group / Arrow batch
+app.config['SQL_STATEMENT_LIMIT'] = 25  # per request, enforced when TESTING
+app.config['ETAG_CACHE_CONTROL'] = 'private, no-cache'  # may be stored, but revalidated on every use
+app.config['AUTH_CACHE_TTL'] = fmea_auth.DEFAULT_TTL  # seconds a cached role is kept
+app.config['AUTH_CACHE_SIZE'] = fmea_auth.DEFAULT_SIZE
+app.config['AUTH_CACHE_BACKEND'] = None  # e.g. fmea_auth.RedisBackend(redis.Redis()) to share it between workers
+# Shared backend for all workers and the CLI, so role changes apply at once; used if no backend is set
+app.config['AUTH_CACHE_REDIS_URL'] = os.environ.get('FMEA_AUTH_REDIS_URL')
+app.config['WRITE_QUEUE_MAX_BATCH'] = fmea_write_queue.MAX_BATCH  # writes per group commit
+app.config['WRITE_QUEUE_MAX_DELAY'] = fmea_write_queue.MAX_DELAY  # seconds a batch waits for more writes
+app.config['SYNC_OVERLAP_SECONDS'] = 2  # delta sync tokens lag behind, so in-flight writes are not missed
+app.config['SLOW_REQUEST_SECONDS'] = 0.5
+app.config['SLOW_REQUEST_TOP_STATEMENTS'] = 5
+# Count rows fetched through every sqlite3 cursor for the request metrics
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'factory': fmea_metrics.RowCountingConnection}}
 
 db = SQLAlchemy(app)
 
@@ -21,11 +56,17 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(120), nullable=False)
     role = db.Column(db.String(20), nullable=False, default='user')  # 'admin' or 'user'
+    role_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # bumped on role changes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
+    def set_role(self, role):
+        """Change the role; commit, then call get_role_cache().role_changed(user.id)"""
+        self.role = role
+        self.role_version = (self.role_version or 0) + 1
+
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
@@ -44,20 +85,14 @@ class FMEAEntry(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    rpn = db.Column(db.Integer, db.Computed(fmea_db.RPN_EXPRESSION), index=True)
+    risk_level = db.Column(db.String(10), db.Computed(fmea_db.RISK_LEVEL_EXPRESSION))
+    action_priority = db.Column(db.String(1), db.Computed(fmea_priority.ACTION_PRIORITY_EXPRESSION))  # AIAG-VDA H/M/L
 
-    @property
-    def rpn(self):
-        return self.severity * self.occurrence * self.detection
-
-    @property
-    def risk_level(self):
-        rpn = self.rpn
-        if rpn > 100:
-            return 'high'
-        elif rpn > 50:
-            return 'medium'
-        else:
-            return 'low'
+    __table_args__ = (
+        db.Index('ix_fmea_entry_risk_level', 'risk_level', 'created_at'),
+        db.Index('ix_fmea_entry_action_priority', 'action_priority', 'created_at'),
+    )
 
     def to_dict(self):
         return {
@@ -74,9 +109,18 @@ class FMEAEntry(db.Model):
             'status': self.status,
             'rpn': self.rpn,
             'risk_level': self.risk_level,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M')
+            'action_priority': self.action_priority,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M'),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class FMEAStatistic(db.Model):
+    # Maintained by triggers on fmea_entry, see fmea_db.ensure_statistics
+    __tablename__ = 'fmea_entry_statistics'
+    risk_level = db.Column(db.String(10), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 class Action(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -85,13 +129,343 @@ class Action(db.Model):
     priority = db.Column(db.String(20), default='Mittel')  # Niedrig, Mittel, Hoch
     status = db.Column(db.String(50), default='Offen')
     due_date = db.Column(db.Date)
-    fmea_entry_id = db.Column(db.Integer, db.ForeignKey('fmea_entry.id'))
+    fmea_entry_id = db.Column(db.Integer, db.ForeignKey('fmea_entry.id'), index=True)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     fmea_entry = db.relationship('FMEAEntry', backref=db.backref('related_actions', lazy=True))
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'assigned_to': self.assigned_to,
+            'priority': self.priority,
+            'status': self.status,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'fmea_entry_id': self.fmea_entry_id,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M'),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class TooManyStatements(Exception):
+    """A request issued more SQL statements than SQL_STATEMENT_LIMIT, usually an N+1 query"""
+
+# Request metrics, served at /metrics
+metrics = fmea_metrics.Registry()
+request_latency = metrics.histogram('fmea_http_request_duration_seconds', 'Request latency by route',
+                                    ['method', 'route'])
+request_count = metrics.counter('fmea_http_requests_total', 'Requests by route and status',
+                                ['method', 'route', 'status'])
+slow_request_count = metrics.counter('fmea_http_slow_requests_total', 'Requests slower than SLOW_REQUEST_SECONDS',
+                                     ['method', 'route'])
+request_statements = metrics.histogram('fmea_http_request_sql_statements', 'SQL statements per request',
+                                       ['route'], fmea_metrics.COUNT_BUCKETS)
+request_sql_time = metrics.histogram('fmea_http_request_sql_duration_seconds', 'Time spent executing SQL per request',
+                                     ['route'])
+request_rows = metrics.histogram('fmea_http_request_sql_rows', 'Rows fetched from SQLite per request',
+                                 ['route'], fmea_metrics.ROW_BUCKETS)
+response_size = metrics.histogram('fmea_http_response_size_bytes', 'Response body size (not for streamed responses)',
+                                  ['route'], fmea_metrics.SIZE_BUCKETS)
+write_queue_commit_time = metrics.histogram('fmea_write_queue_commit_duration_seconds',
+                                            'Duration of one group commit of the write queue')
+write_queue_batch_size = metrics.histogram('fmea_write_queue_batch_size', 'Writes per group commit',
+                                           buckets=fmea_metrics.COUNT_BUCKETS)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_statements = g.get('sql_statements', 0) + 1
+        # On the execution context, not conn.info: a statement that raises never reaches the hook below
+        context._query_start = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def time_statement(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_query_start', None)
+    if has_request_context() and start is not None:
+        elapsed = time.perf_counter() - start
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+        timings = g.setdefault('sql_timings', {})
+        count, total = timings.get(statement, (0, 0.0))
+        timings[statement] = (count + 1, total + elapsed)
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    fmea_metrics.reset_rows()
+
+@app.after_request
+def check_statement_limit(response):
+    limit = app.config['SQL_STATEMENT_LIMIT']
+    count = g.get('sql_statements', 0)
+    if app.testing and limit is not None and count > limit:
+        raise TooManyStatements(f'{request.method} {request.path} issued {count} SQL statements (limit {limit})')
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are measured up to the first byte; their body size is unknown here
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+    statements = g.get('sql_statements', 0)
+    sql_seconds = g.get('sql_seconds', 0.0)
+    rows = fmea_metrics.rows_fetched()
+    
+    request_latency.observe(elapsed, [request.method, route])
+    request_count.inc([request.method, route, str(response.status_code)])
+    request_statements.observe(statements, [route])
+    request_sql_time.observe(sql_seconds, [route])
+    request_rows.observe(rows, [route])
+    size = response.calculate_content_length()
+    if size is not None:
+        response_size.observe(size, [route])
+    
+    if elapsed >= app.config['SLOW_REQUEST_SECONDS']:
+        slow_request_count.inc([request.method, route])
+        top_statements = sorted(g.get('sql_timings', {}).items(), key=lambda item: item[1][1], reverse=True)
+        app.logger.warning(
+            'Slow request %s %s: %.1f ms, %d SQL statements in %.1f ms, %d rows%s',
+            request.method, request.path, elapsed * 1000, statements, sql_seconds * 1000, rows,
+            ''.join(f'\n  {total * 1000:.1f} ms x{count}: {" ".join(statement.split())[:300]}'
+                    for statement, (count, total) in top_statements[:app.config['SLOW_REQUEST_TOP_STATEMENTS']])
+        )
+    
+    return response
+
+def write_queue_depth():
+    queue = app.extensions.get('fmea_write_queue')
+    return queue.depth() if queue else 0
+
+metrics.gauge('fmea_write_queue_depth', 'Writes waiting for the write queue', write_queue_depth)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def entry_choices():
+    """Id/label rows for the FMEA entry dropdowns, without loading whole entries"""
+    return db.session.query(FMEAEntry.id, FMEAEntry.function, FMEAEntry.failure_mode) \
+                     .order_by(FMEAEntry.id).all()
+
+def fulltext_enabled():
+    """Check once per process whether the FTS5 search index is available"""
+    if 'FTS_ENABLED' not in app.config:
+        conn = db.engine.raw_connection()
+        try:
+            app.config['FTS_ENABLED'] = fmea_db.has_fulltext(conn, FMEAEntry.__tablename__)
+        finally:
+            conn.close()
+    return app.config['FTS_ENABLED']
+
+def filter_entries(search='', risk_filter='', status_filter='', priority_filter=''):
+    """Build the filtered entry query; returns (query, sort key) for paginate_entries"""
+    query = FMEAEntry.query
+    sort_key = ('created_at', stored_text(FMEAEntry.created_at), True)
+    
+    fts_query = fmea_db.fulltext_query(search) if search else None
+    if fts_query and fulltext_enabled():
+        matches = db.text(fmea_db.fulltext_match_sql(FMEAEntry.__tablename__, ':query')) \
+                    .bindparams(query=fts_query) \
+                    .columns(entry_id=db.Integer, rank=db.Float) \
+                    .subquery('matches')
+        query = query.join(matches, matches.c.entry_id == FMEAEntry.id)
+        sort_key = ('rank', matches.c.rank, False)
+    elif search:
+        query = query.filter(
+            db.or_(
+                FMEAEntry.function.contains(search),
+                FMEAEntry.failure_mode.contains(search),
+                FMEAEntry.failure_cause.contains(search),
+                FMEAEntry.failure_effect.contains(search)
+            )
+        )
+    
+    if status_filter:
+        query = query.filter(FMEAEntry.status == status_filter)
+    
+    if risk_filter in fmea_db.RISK_LEVELS:
+        query = query.filter(FMEAEntry.risk_level == risk_filter)
+    
+    if priority_filter in fmea_priority.ACTION_PRIORITIES:
+        query = query.filter(FMEAEntry.action_priority == priority_filter)
+    
+    return query, sort_key
+
+def sort_entries(query, sort_key):
+    """Apply the (sort column, id) ordering that keyset pagination relies on"""
+    name, column, descending = sort_key
+    if descending:
+        return query.order_by(column.desc(), FMEAEntry.id.desc())
+    return query.order_by(column, FMEAEntry.id)
+
+def stored_text(column):
+    """A DateTime column as the text SQLite holds. Cursors keep and compare that exact string: older rows
+    were stored without fractional seconds, and '...:14' sorts before '...:14.000000'."""
+    return db.type_coerce(column, db.String)
+
+def encode_cursor(name, value, entry_id):
+    payload = json.dumps([name, value, entry_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def decode_cursor(cursor, name):
+    """Decode a cursor; raises ValueError if it is malformed or belongs to another ordering"""
+    try:
+        cursor_name, value, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, binascii.Error, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError('invalid cursor') from e
+    if cursor_name != name or not isinstance(entry_id, int) or isinstance(entry_id, bool):
+        raise ValueError('cursor does not match the current ordering')
+    if name == 'rank':
+        # bm25() scores are floats; anything else would compare by type in SQLite and skip rows
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError('invalid cursor')
+    elif name in ('created_at', 'updated_at'):
+        # Kept as the stored string; only checked to be a timestamp
+        if not isinstance(value, str):
+            raise ValueError('invalid cursor')
+        datetime.fromisoformat(value)
+    return value, entry_id
+
+def paginate_entries(query, sort_key, cursor, page_size):
+    """Keyset pagination on (sort column, id); returns (entries, next cursor or None)"""
+    name, column, descending = sort_key
+    
+    if cursor:
+        value, entry_id = decode_cursor(cursor, name)
+        position = db.tuple_(column, FMEAEntry.id)
+        query = query.filter(position < (value, entry_id) if descending else position > (value, entry_id))
+    
+    # Fetch one extra row to know whether there is a next page
+    rows = sort_entries(query.add_columns(column), sort_key).limit(page_size + 1).all()
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last_entry, last_value = rows[-1]
+        next_cursor = encode_cursor(name, last_value, last_entry.id)
+    
+    return [entry for entry, _ in rows], next_cursor
+
+def parse_since(value):
+    """Parse a ?since= ISO 8601 timestamp as naive UTC; raises ValueError"""
+    since = datetime.fromisoformat(value)
+    if since.tzinfo:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+def sync_changes(model, since, cursor, page_size):
+    """One page of rows changed after since, in (updated_at, id) order, as a delta sync response.
+    Deleted ids are sent with the last page, so deletions during paging are not missed."""
+    # Taken before reading, minus an overlap: writes still in flight show up again next time
+    synced_at = datetime.utcnow() - timedelta(seconds=app.config['SYNC_OVERLAP_SECONDS'])
+    
+    updated_at = stored_text(model.updated_at)
+    query = model.query.filter(updated_at > fmea_db.db_timestamp(since))
+    if cursor:
+        value, row_id = decode_cursor(cursor, 'updated_at')
+        query = query.filter(db.tuple_(updated_at, model.id) > (value, row_id))
+    rows = query.add_columns(updated_at).order_by(updated_at, model.id).limit(page_size + 1).all()
+    
+    next_cursor = None
+    deleted = []
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last_row, last_value = rows[-1]
+        next_cursor = encode_cursor('updated_at', last_value, last_row.id)
+    else:
+        deleted = fmea_db.read_deleted(db.session.connection().connection, model.__tablename__,
+                                       fmea_db.db_timestamp(since))
+    
+    return {
+        'changed': [row.to_dict() for row, _ in rows],
+        'deleted': deleted,
+        'next_cursor': next_cursor,
+        'synced_at': synced_at.isoformat(),
+        'page_size': page_size
+    }
+
+def get_page_size(default):
+    page_size = request.args.get('page_size', default, type=int)
+    return max(1, min(page_size, app.config['MAX_PAGE_SIZE']))
+
+def get_role_cache():
+    """Role cache, created on first use from the AUTH_CACHE_* settings"""
+    if 'fmea_role_cache' not in app.extensions:
+        backend = app.config['AUTH_CACHE_BACKEND']
+        if backend is None and app.config['AUTH_CACHE_REDIS_URL']:
+            import redis
+            backend = fmea_auth.RedisBackend(redis.Redis.from_url(app.config['AUTH_CACHE_REDIS_URL']))
+        backend = backend or fmea_auth.MemoryBackend(app.config['AUTH_CACHE_SIZE'])
+        app.extensions['fmea_role_cache'] = fmea_auth.RoleCache(backend, app.config['AUTH_CACHE_TTL'])
+    return app.extensions['fmea_role_cache']
+
+_write_queue_lock = threading.Lock()
+
+def get_write_queue():
+    """Single writer thread that group-commits the form writes of all requests, created on first use"""
+    with _write_queue_lock:
+        if 'fmea_write_queue' not in app.extensions:
+            def record_commit(batch_size, seconds):
+                write_queue_batch_size.observe(batch_size)
+                write_queue_commit_time.observe(seconds)
+            
+            app.extensions['fmea_write_queue'] = fmea_write_queue.WriteQueue(
+                fmea_write_queue.connection_transaction(db.engine.raw_connection),
+                app.config['WRITE_QUEUE_MAX_BATCH'], app.config['WRITE_QUEUE_MAX_DELAY'], record_commit)
+    return app.extensions['fmea_write_queue']
+
+def queue_write(function, *args):
+    """Run function(conn, *args) on the write queue and wait for its commit; raises its own exception"""
+    # End this request's transaction first, a lock held by it would stall the writer
+    db.session.rollback()
+    return get_write_queue().execute(function, *args)
+
+def insert_row(conn, table, values):
+    """Write job: insert one row, returns its id"""
+    columns = ', '.join(values)
+    placeholders = ', '.join('?' * len(values))
+    return conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", list(values.values())).lastrowid
+
+def update_row(conn, table, row_id, values):
+    """Write job: update one row by id"""
+    assignments = ', '.join(f"{column} = ?" for column in values)
+    conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", list(values.values()) + [row_id])
+
+def entry_form_values():
+    return {
+        'function': request.form['function'],
+        'failure_mode': request.form['failure_mode'],
+        'failure_effect': request.form['failure_effect'],
+        'severity': int(request.form['severity']),
+        'failure_cause': request.form['failure_cause'],
+        'occurrence': int(request.form['occurrence']),
+        'test_method': request.form['test_method'],
+        'detection': int(request.form['detection']),
+        'actions': request.form.get('actions', ''),
+        'status': request.form['status']
+    }
+
+def load_role(user_id):
+    row = db.session.query(User.role, User.role_version).filter(User.id == user_id).first()
+    return {'role': row.role, 'role_version': row.role_version} if row else None
+
+def current_role():
+    """Role of the logged-in user from the role cache; None if the user no longer exists"""
+    entry = get_role_cache().get(session['user_id'], load_role)
+    if entry is None:
+        return None
+    # The role changed since login: keep the session (and the menus built from it) in line
+    if entry['role_version'] != session.get('role_version'):
+        session['role'] = entry['role']
+        session['role_version'] = entry['role_version']
+    return entry['role']
+
+def missing_dependency(error):
+    """JSON answer for a feature whose optional package (pyarrow, openpyxl, pandas, numpy) is not installed"""
+    return jsonify({'error': f'Nicht verfügbar: das Paket {error.name} ist nicht installiert'}), 501
+
 # Authentication decorator
 def login_required(f):
     @wraps(f)
@@ -106,13 +480,45 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return redirect(url_for('login'))
-        user = User.query.get(session['user_id'])
-        if not user or user.role != 'admin':
+        if current_role() != 'admin':
             flash('Keine Berechtigung für diese Aktion.', 'error')
             return redirect(url_for('dashboard'))
         return f(*args, **kwargs)
     return decorated_function
 
+def data_etag(per_user=False):
+    """ETag from the database epoch, schema version and trigger-maintained write counter (one single-row read)"""
+    etag = fmea_db.read_data_version(db.session.connection().connection)
+    if not per_user:
+        return etag
+    # Role changes do not touch the write counter but change what the user sees
+    current_role()
+    return f"{etag}-{session.get('user_id')}-{session.get('role_version')}"
+
+def conditional_get(per_user=False):
+    """Answer If-None-Match with 304 before the view runs; per_user for pages that show the user"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Pending flash messages are rendered into the page, so it has to be built
+            if session.get('_flashes'):
+                return f(*args, **kwargs)
+            
+            etag = data_etag(per_user)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = app.config['ETAG_CACHE_CONTROL']
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorator
+
 # Routes
 @app.route('/')
 def index():
@@ -125,13 +531,13 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
             session['user_id'] = user.id
             session['username'] = user.username
             session['role'] = user.role
+            session['role_version'] = user.role_version
             flash(f'Willkommen, {user.username}!', 'success')
             return redirect(url_for('dashboard'))
         else:
@@ -147,77 +553,91 @@ def logout():
 
 @app.route('/dashboard')
 @login_required
+@conditional_get(per_user=True)
 def dashboard():
     # Get filter parameters
     search = request.args.get('search', '')
     risk_filter = request.args.get('risk_filter', '')
     status_filter = request.args.get('status_filter', '')
+    priority_filter = request.args.get('priority_filter', '')
+    cursor = request.args.get('cursor', '')
+    page_size = get_page_size(app.config['DASHBOARD_PAGE_SIZE'])
     
-    # Build query
-    query = FMEAEntry.query
-    
-    if search:
-        query = query.filter(
-            db.or_(
-                FMEAEntry.function.contains(search),
-                FMEAEntry.failure_mode.contains(search),
-                FMEAEntry.failure_cause.contains(search),
-                FMEAEntry.failure_effect.contains(search)
-            )
-        )
-    
-    if status_filter:
-        query = query.filter(FMEAEntry.status == status_filter)
+    query, sort_key = filter_entries(search, risk_filter, status_filter, priority_filter)
     
-    entries = query.order_by(FMEAEntry.created_at.desc()).all()
-    
-    # Apply risk filter (after query since RPN is calculated)
-    if risk_filter:
-        if risk_filter == 'high':
-            entries = [e for e in entries if e.rpn > 100]
-        elif risk_filter == 'medium':
-            entries = [e for e in entries if 50 <= e.rpn <= 100]
-        elif risk_filter == 'low':
-            entries = [e for e in entries if e.rpn < 50]
+    try:
+        entries, next_cursor = paginate_entries(query, sort_key, cursor, page_size)
+    except ValueError:
+        # Stale or foreign cursor, e.g. after changing the search: start over
+        cursor = ''
+        entries, next_cursor = paginate_entries(query, sort_key, cursor, page_size)
     
     # Calculate statistics
-    total_entries = len(entries)
-    high_risk_count = len([e for e in entries if e.rpn > 100])
-    open_count = len([e for e in entries if e.status == 'Offen'])
-    completed_count = len([e for e in entries if e.status == 'Abgeschlossen'])
+    if search or priority_filter in fmea_priority.ACTION_PRIORITIES:
+        rows = query.with_entities(FMEAEntry.risk_level, FMEAEntry.status, db.func.count(FMEAEntry.id)) \
+                    .group_by(FMEAEntry.risk_level, FMEAEntry.status).all()
+    else:
+        # Risk and status filters map directly onto the summary table
+        stat_query = FMEAStatistic.query
+        if status_filter:
+            stat_query = stat_query.filter(FMEAStatistic.status == status_filter)
+        if risk_filter in fmea_db.RISK_LEVELS:
+            stat_query = stat_query.filter(FMEAStatistic.risk_level == risk_filter)
+        rows = stat_query.with_entities(FMEAStatistic.risk_level, FMEAStatistic.status, FMEAStatistic.count).all()
     
+    summary = fmea_db.summarize_statistics(rows)
     stats = {
-        'total': total_entries,
-        'high_risk': high_risk_count,
-        'open': open_count,
-        'completed': completed_count,
-        'completion_rate': round((completed_count / total_entries * 100) if total_entries > 0 else 0, 1)
+        'total': summary['total'],
+        'high_risk': summary['high_risk'],
+        'open': summary['open'],
+        'completed': summary['completed'],
+        'completion_rate': summary['completion_rate']
     }
     
     return render_template('dashboard.html', entries=entries, stats=stats,
-                         search=search, risk_filter=risk_filter, status_filter=status_filter)
+                         search=search, risk_filter=risk_filter, status_filter=status_filter,
+                         priority_filter=priority_filter,
+                         cursor=cursor, next_cursor=next_cursor, page_size=page_size)
+
+@app.route('/api/entries')
+@login_required
+def api_entries():
+    # ?since= switches to delta sync over the whole table; the other filters do not apply
+    if request.args.get('since'):
+        try:
+            return jsonify(sync_changes(FMEAEntry, parse_since(request.args['since']),
+                                        request.args.get('cursor', ''), get_page_size(app.config['API_PAGE_SIZE'])))
+        except ValueError:
+            return jsonify({'error': 'Ungültiger Zeitstempel oder Cursor'}), 400
+    
+    query, sort_key = filter_entries(
+        request.args.get('search', ''),
+        request.args.get('risk_filter', ''),
+        request.args.get('status_filter', ''),
+        request.args.get('priority_filter', '')
+    )
+    page_size = get_page_size(app.config['API_PAGE_SIZE'])
+    
+    try:
+        entries, next_cursor = paginate_entries(query, sort_key, request.args.get('cursor', ''), page_size)
+    except ValueError:
+        return jsonify({'error': 'Ungültiger Cursor'}), 400
+    
+    return jsonify({
+        'entries': [entry.to_dict() for entry in entries],
+        'next_cursor': next_cursor,
+        'page_size': page_size
+    })
 
 @app.route('/add_entry', methods=['GET', 'POST'])
 @login_required
 def add_entry():
     if request.method == 'POST':
         try:
-            entry = FMEAEntry(
-                function=request.form['function'],
-                failure_mode=request.form['failure_mode'],
-                failure_effect=request.form['failure_effect'],
-                severity=int(request.form['severity']),
-                failure_cause=request.form['failure_cause'],
-                occurrence=int(request.form['occurrence']),
-                test_method=request.form['test_method'],
-                detection=int(request.form['detection']),
-                actions=request.form.get('actions', ''),
-                status=request.form['status'],
-                created_by=session['user_id']
-            )
+            now = fmea_db.db_timestamp(datetime.utcnow())
+            values = dict(entry_form_values(), created_by=session['user_id'], created_at=now, updated_at=now)
             
-            db.session.add(entry)
-            db.session.commit()
+            queue_write(insert_row, FMEAEntry.__tablename__, values)
             flash('FMEA-Eintrag erfolgreich hinzugefügt!', 'success')
             return redirect(url_for('dashboard'))
             
@@ -234,19 +654,9 @@ def edit_entry(id):
     
     if request.method == 'POST':
         try:
-            entry.function = request.form['function']
-            entry.failure_mode = request.form['failure_mode']
-            entry.failure_effect = request.form['failure_effect']
-            entry.severity = int(request.form['severity'])
-            entry.failure_cause = request.form['failure_cause']
-            entry.occurrence = int(request.form['occurrence'])
-            entry.test_method = request.form['test_method']
-            entry.detection = int(request.form['detection'])
-            entry.actions = request.form.get('actions', '')
-            entry.status = request.form['status']
-            entry.updated_at = datetime.utcnow()
+            values = dict(entry_form_values(), updated_at=fmea_db.db_timestamp(datetime.utcnow()))
             
-            db.session.commit()
+            queue_write(update_row, FMEAEntry.__tablename__, id, values)
             flash('FMEA-Eintrag erfolgreich aktualisiert!', 'success')
             return redirect(url_for('dashboard'))
             
@@ -273,7 +683,10 @@ def delete_entry(id):
 @app.route('/actions')
 @admin_required
 def manage_actions():
-    actions = Action.query.order_by(Action.created_at.desc()).all()
+    # Load the linked entry in the same query, with only the columns the list shows
+    actions = Action.query.options(
+        db.joinedload(Action.fmea_entry).load_only(FMEAEntry.id, FMEAEntry.function, FMEAEntry.failure_mode)
+    ).order_by(Action.created_at.desc()).all()
     return render_template('actions.html', actions=actions)
 
 @app.route('/add_action', methods=['GET', 'POST'])
@@ -285,19 +698,21 @@ def add_action():
             if request.form.get('due_date'):
                 due_date = datetime.strptime(request.form['due_date'], '%Y-%m-%d').date()
             
-            action = Action(
-                title=request.form['title'],
-                description=request.form.get('description', ''),
-                assigned_to=request.form.get('assigned_to', ''),
-                priority=request.form['priority'],
-                status=request.form['status'],
-                due_date=due_date,
-                fmea_entry_id=request.form.get('fmea_entry_id') or None,
-                created_by=session['user_id']
-            )
+            now = fmea_db.db_timestamp(datetime.utcnow())
+            values = {
+                'title': request.form['title'],
+                'description': request.form.get('description', ''),
+                'assigned_to': request.form.get('assigned_to', ''),
+                'priority': request.form['priority'],
+                'status': request.form['status'],
+                'due_date': due_date.isoformat() if due_date else None,
+                'fmea_entry_id': request.form.get('fmea_entry_id') or None,
+                'created_by': session['user_id'],
+                'created_at': now,
+                'updated_at': now
+            }
             
-            db.session.add(action)
-            db.session.commit()
+            queue_write(insert_row, Action.__tablename__, values)
             flash('Maßnahme erfolgreich hinzugefügt!', 'success')
             return redirect(url_for('manage_actions'))
             
@@ -305,7 +720,7 @@ def add_action():
             db.session.rollback()
             flash(f'Fehler beim Speichern: {str(e)}', 'error')
     
-    fmea_entries = FMEAEntry.query.all()
+    fmea_entries = entry_choices()
     return render_template('add_action.html', fmea_entries=fmea_entries)
 
 @app.route('/edit_action/<int:id>', methods=['GET', 'POST'])
@@ -336,7 +751,7 @@ def edit_action(id):
             db.session.rollback()
             flash(f'Fehler beim Aktualisieren: {str(e)}', 'error')
     
-    fmea_entries = FMEAEntry.query.all()
+    fmea_entries = entry_choices()
     return render_template('edit_action.html', action=action, fmea_entries=fmea_entries)
 
 @app.route('/delete_action/<int:id>')
@@ -355,79 +770,312 @@ def delete_action(id):
 
 @app.route('/export_csv')
 @login_required
+@conditional_get()
 def export_csv():
-    entries = FMEAEntry.query.all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=';')
-    
-    # Header
-    headers = [
-        'Funktion', 'Fehlerart', 'Fehlerfolge', 'Auftretenswahrscheinlichkeit',
-        'Fehlerursache', 'Auftreten', 'Prüfmaßnahme', 'Entdeckung',
-        'RPN', 'Maßnahmen', 'Status', 'Erstellt am'
-    ]
-    writer.writerow(headers)
-    
-    # Data
-    for entry in entries:
-        writer.writerow([
-            entry.function,
-            entry.failure_mode,
-            entry.failure_effect,
-            entry.severity,
-            entry.failure_cause,
-            entry.occurrence,
-            entry.test_method,
-            entry.detection,
-            entry.rpn,
-            entry.actions or '',
-            entry.status,
-            entry.created_at.strftime('%Y-%m-%d %H:%M')
-        ])
+    query, sort_key = filter_entries(
+        request.args.get('search', ''),
+        request.args.get('risk_filter', ''),
+        request.args.get('status_filter', ''),
+        request.args.get('priority_filter', '')
+    )
+    query = query.with_entities(
+        FMEAEntry.function, FMEAEntry.failure_mode, FMEAEntry.failure_effect, FMEAEntry.severity,
+        FMEAEntry.failure_cause, FMEAEntry.occurrence, FMEAEntry.test_method, FMEAEntry.detection,
+        FMEAEntry.rpn, FMEAEntry.actions, FMEAEntry.status, FMEAEntry.created_at
+    )
     
-    output.seek(0)
+    def generate():
+        output = io.StringIO()
+        writer = csv.writer(output, delimiter=';')
+        writer.writerow(fmea_db.CSV_HEADERS)
+        
+        # Stream rows from the cursor and flush the buffer in chunks
+        for row in sort_entries(query, sort_key).yield_per(app.config['EXPORT_BATCH_SIZE']):
+            writer.writerow([
+                row.function,
+                row.failure_mode,
+                row.failure_effect,
+                row.severity,
+                row.failure_cause,
+                row.occurrence,
+                row.test_method,
+                row.detection,
+                row.rpn,
+                row.actions or '',
+                row.status,
+                row.created_at.strftime('%Y-%m-%d %H:%M')
+            ])
+            if output.tell() >= app.config['EXPORT_CHUNK_SIZE']:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        
+        yield output.getvalue()
     
-    # Create response
-    response = make_response(output.getvalue())
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
     response.headers['Content-Disposition'] = f'attachment; filename=FMEA_Export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
     response.headers['Content-type'] = 'text/csv; charset=utf-8'
     
     return response
 
-@app.route('/api/statistics')
+@app.route('/export_xlsx')
 @login_required
-def api_statistics():
-    entries = FMEAEntry.query.all()
+@conditional_get(per_user=True)
+def export_xlsx():
+    """Filtered entries as .xlsx in the CSV layout, plus an actions sheet for admins"""
+    try:
+        import fmea_xlsx  # needs openpyxl
+    except ModuleNotFoundError as e:
+        flash(f'Excel-Export nicht verfügbar: das Paket {e.name} ist nicht installiert.', 'error')
+        return redirect(url_for('dashboard'))
+    filters = [request.args.get(name, '') for name in ('search', 'risk_filter', 'status_filter', 'priority_filter')]
+    # The workbook is assembled in a temporary file and streamed from there
+    output = tempfile.TemporaryFile()
+    conn = db.engine.raw_connection()
+    try:
+        fmea_xlsx.write_workbook(conn, FMEAEntry.__tablename__, Action.__tablename__, output, *filters,
+                                 include_actions=current_role() == 'admin',
+                                 batch_size=app.config['EXPORT_BATCH_SIZE'])
+    except Exception:
+        output.close()
+        raise
+    finally:
+        conn.close()
+    output.seek(0)
+    
+    return send_file(output, mimetype=fmea_xlsx.MIMETYPE, as_attachment=True,
+                     download_name=f'FMEA_Export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
+
+@app.route('/api/export')
+@login_required
+@conditional_get(per_user=True)
+def export_columnar():
+    """Filtered entries joined with their actions as typed Parquet (?format=parquet) or Arrow IPC stream (?format=arrow);
+    actions are admin-only, other users get the entry columns"""
+    try:
+        import fmea_arrow  # needs pyarrow
+    except ModuleNotFoundError as e:
+        return missing_dependency(e)
+    export_format = request.args.get('format', 'parquet')
+    if export_format not in fmea_arrow.FORMATS:
+        return jsonify({'error': f'Unbekanntes Format: {export_format}'}), 400
+    extension, mimetype = fmea_arrow.FORMATS[export_format]
+    filters = [request.args.get(name, '') for name in ('search', 'risk_filter', 'status_filter', 'priority_filter')]
+    include_actions = current_role() == 'admin'
     
-    total = len(entries)
-    high_risk = len([e for e in entries if e.rpn > 100])
-    medium_risk = len([e for e in entries if 50 <= e.rpn <= 100])
-    low_risk = len([e for e in entries if e.rpn < 50])
+    def generate():
+        conn = db.engine.raw_connection()
+        try:
+            yield from fmea_arrow.stream_export(conn, FMEAEntry.__tablename__, Action.__tablename__, export_format,
+                                                *filters, row_group_size=app.config['EXPORT_ROW_GROUP_SIZE'],
+                                                include_actions=include_actions)
+        finally:
+            conn.close()
     
-    open_count = len([e for e in entries if e.status == 'Offen'])
-    in_progress = len([e for e in entries if e.status == 'In Bearbeitung'])
-    completed = len([e for e in entries if e.status == 'Abgeschlossen'])
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=FMEA_Export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
     
-    return jsonify({
-        'total_entries': total,
+    return response
+
+@app.route('/api/entries/import', methods=['POST'])
+@login_required
+def import_entries():
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'Keine Datei hochgeladen'}), 400
+    try:
+        import fmea_import  # needs pandas
+    except ModuleNotFoundError as e:
+        return missing_dependency(e)
+    
+    conn = db.engine.raw_connection()
+    try:
+        report = fmea_import.import_entries(conn, FMEAEntry.__tablename__, upload.stream,
+                                            upload.filename, session['user_id'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        conn.close()
+    
+    return jsonify(report)
+
+def read_batch_operations():
+    """Read batch operations from a JSON body or a multi-select form; returns (operations, atomic)"""
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            raise ValueError('Ungültige Anfrage')
+        if 'ids' in payload:
+            # Shorthand: the same operation for many ids
+            if not isinstance(payload['ids'], list):
+                raise ValueError("'ids' muss eine Liste sein")
+            operations = [{'op': payload.get('op'), 'id': item_id, 'fields': payload.get('fields')}
+                          for item_id in payload['ids']]
+        else:
+            operations = payload.get('operations')
+            if not isinstance(operations, list):
+                raise ValueError("'operations' muss eine Liste sein")
+        return operations, bool(payload.get('atomic', False))
+    
+    fields = {'status': request.form['status']} if request.form.get('status') else None
+    operations = [{'op': request.form.get('op'), 'id': item_id, 'fields': fields}
+                  for item_id in request.form.getlist('ids', type=int)]
+    return operations, False
+
+def run_batch(table, fields, allow_delete, references=()):
+    """Apply a batch request in one write transaction and answer with JSON or a flash message"""
+    try:
+        operations, atomic = read_batch_operations()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    conn = db.engine.raw_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        report = fmea_batch.apply_batch(conn, table, operations, fields,
+                                        fmea_db.db_timestamp(datetime.utcnow()),
+                                        allow_delete=allow_delete, atomic=atomic, references=references)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    if request.is_json:
+        return jsonify(report)
+    
+    flash(f"{report['updated']} aktualisiert, {report['deleted']} gelöscht, {report['failed']} fehlgeschlagen.",
+          'error' if report['failed'] else 'success')
+    return None
+
+@app.route('/api/entries/batch', methods=['POST'])
+@login_required
+def batch_entries():
+    response = run_batch(FMEAEntry.__tablename__, fmea_batch.ENTRY_FIELDS,
+                         allow_delete=current_role() == 'admin',
+                         references=[(Action.__tablename__, 'fmea_entry_id')])
+    return response or redirect(request.referrer or url_for('dashboard'))
+
+@app.route('/api/actions')
+@admin_required
+def api_actions():
+    # Without ?since= this pages through all actions, e.g. for the initial sync
+    try:
+        since = parse_since(request.args['since']) if request.args.get('since') else datetime(1970, 1, 1)
+        return jsonify(sync_changes(Action, since, request.args.get('cursor', ''),
+                                    get_page_size(app.config['API_PAGE_SIZE'])))
+    except ValueError:
+        return jsonify({'error': 'Ungültiger Zeitstempel oder Cursor'}), 400
+
+@app.route('/api/actions/batch', methods=['POST'])
+@admin_required
+def batch_actions():
+    response = run_batch(Action.__tablename__, fmea_batch.ACTION_FIELDS, allow_delete=True)
+    return response or redirect(request.referrer or url_for('manage_actions'))
+
+@app.route('/api/statistics')
+@login_required
+@conditional_get()
+def api_statistics():
+    rows = FMEAStatistic.query.with_entities(
+        FMEAStatistic.risk_level, FMEAStatistic.status, FMEAStatistic.count
+    ).all()
+    return jsonify(statistics_payload(fmea_db.summarize_statistics(rows)))
+
+def statistics_payload(stats):
+    """Shape summarize_statistics() output for /api/statistics (also used by the async API)"""
+    return {
+        'total_entries': stats['total'],
         'risk_distribution': {
-            'high': high_risk,
-            'medium': medium_risk,
-            'low': low_risk
+            'high': stats['high_risk'],
+            'medium': stats['medium_risk'],
+            'low': stats['low_risk']
         },
         'status_distribution': {
-            'open': open_count,
-            'in_progress': in_progress,
-            'completed': completed
+            'open': stats['open'],
+            'in_progress': stats['in_progress'],
+            'completed': stats['completed']
         },
-        'completion_rate': round((completed / total * 100) if total > 0 else 0, 1)
-    })
+        'completion_rate': stats['completion_rate']
+    }
 
-def init_db():
-    """Initialize database with sample data"""
+@app.route('/api/analytics')
+@login_required
+def api_analytics():
+    try:
+        import fmea_analytics
+    except ModuleNotFoundError as e:
+        return missing_dependency(e)
+    bins = max(1, min(request.args.get('bins', fmea_analytics.HISTOGRAM_BINS, type=int), 100))
+    limit = max(1, min(request.args.get('limit', fmea_analytics.PARETO_LIMIT, type=int), 100))
+    
+    conn = db.engine.raw_connection()
+    try:
+        analytics = fmea_analytics.analyze_table(
+            conn, FMEAEntry.__tablename__,
+            request.args.get('risk_filter', ''),
+            request.args.get('status_filter', ''),
+            bins, limit
+        )
+    finally:
+        conn.close()
+    
+    return jsonify(analytics)
+
+# Schema migrations on top of db.create_all(), tracked with PRAGMA user_version.
+# Append new steps at the end; the list index is the schema version.
+MIGRATIONS = [
+    lambda conn: fmea_db.ensure_risk_columns(conn, FMEAEntry.__tablename__),
+    lambda conn: fmea_db.ensure_statistics(conn, FMEAEntry.__tablename__),
+    lambda conn: fmea_db.ensure_fulltext(conn, FMEAEntry.__tablename__),
+    lambda conn: fmea_db.ensure_rating_counts(conn, FMEAEntry.__tablename__),
+    lambda conn: fmea_db.ensure_action_priority(conn, FMEAEntry.__tablename__),
+    lambda conn: fmea_db.ensure_sync(conn, FMEAEntry.__tablename__),
+    lambda conn: fmea_db.ensure_sync(conn, Action.__tablename__),
+    lambda conn: fmea_db.ensure_write_counter(conn, FMEAEntry.__tablename__),
+    lambda conn: fmea_db.ensure_write_counter(conn, Action.__tablename__),
+    lambda conn: fmea_db.ensure_column(conn, User.__tablename__, 'role_version', 'INTEGER NOT NULL DEFAULT 0'),
+    lambda conn: fmea_db.ensure_action_entry_index(conn, Action.__tablename__),
+    # Databases where step 3 found no FTS5 were moved past it; retry it (pending from now on if it fails)
+    lambda conn: fmea_db.ensure_fulltext(conn, FMEAEntry.__tablename__),
+    lambda conn: None,  # was the role change counter; kept so later versions keep their numbers
+    # The role cache backend holds the role versions now; remove the counter where step 13 created it
+    lambda conn: fmea_db.drop_role_counter(conn, User.__tablename__),
+    lambda conn: fmea_db.ensure_write_epoch(conn),
+]
+
+def migrate_db():
+    """Create missing tables and apply pending migrations; runs once at startup"""
     db.create_all()
+    conn = db.engine.raw_connection()
+    try:
+        app.config['SCHEMA_MIGRATION'] = fmea_db.run_migrations(conn, MIGRATIONS)
+    finally:
+        conn.close()
+    app.config.pop('FTS_ENABLED', None)
+
+@app.cli.command('check-statistics')
+@click.option('--repair', is_flag=True, help='Rebuild the summary table on mismatch.')
+def check_statistics_command(repair):
+    """Recount statistics from scratch and diff against the live counters"""
+    conn = db.engine.raw_connection()
+    try:
+        differences = fmea_db.check_statistics(conn, FMEAEntry.__tablename__, repair=repair)
+    finally:
+        conn.close()
     
+    for risk_level, status, live, expected in differences:
+        click.echo(f'{risk_level}/{status}: live={live} expected={expected}')
+    if not differences:
+        click.echo('Statistics are consistent.')
+    elif repair:
+        click.echo('Statistics rebuilt.')
+    else:
+        raise SystemExit(1)
+
+def seed_db():
+    """Add demo users and sample entries to an empty database"""
     # Create admin user if not exists
     if not User.query.filter_by(username='admin').first():
         admin = User(username='admin', role='admin')
@@ -493,6 +1141,85 @@ def init_db():
         
         db.session.commit()
 
+@app.cli.command('set-role')
+@click.argument('username')
+@click.argument('role', type=click.Choice(['admin', 'user']))
+def set_role_command(username, role):
+    """Change a user's role; servers sharing the role cache backend apply it on the user's next request"""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f'Unknown user: {username}')
+    user.set_role(role)
+    db.session.commit()
+    cache = get_role_cache()
+    cache.role_changed(user.id)
+    click.echo(f'{username} is now {role}.')
+    if not cache.shared:
+        click.echo(f"Running servers keep their in-process role cache; they apply the change within "
+                   f"{app.config['AUTH_CACHE_TTL']} s. Set FMEA_AUTH_REDIS_URL to apply it at once.")
+
+@app.cli.command('import-entries')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user', 'username', default='admin', show_default=True, help='Owner of the imported entries.')
+def import_entries_command(path, username):
+    """Bulk import FMEA entries from a CSV/XLSX file in the export layout"""
+    try:
+        import fmea_import
+    except ModuleNotFoundError as e:
+        raise click.ClickException(f'import-entries needs {e.name}, which is not installed')
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f'Unknown user: {username}')
+    
+    conn = db.engine.raw_connection()
+    try:
+        report = fmea_import.import_entries(conn, FMEAEntry.__tablename__, path, path, user.id)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+    
+    for error in report['errors']:
+        click.echo(f"Zeile {error['row']}: {'; '.join(error['errors'])}")
+    click.echo(f"{report['imported']} imported, {report['failed']} rejected in {report['duration_ms']} ms")
+
+@app.cli.command('generate-data')
+@click.option('--rows', default='1k', show_default=True, help='1k, 100k, 1m or a row count.')
+@click.option('--seed', default=42, show_default=True)
+@click.option('--user', 'username', default='admin', show_default=True, help='Owner of the generated entries.')
+def generate_data_command(rows, seed, username):
+    """Add seeded synthetic entries and actions for benchmarks and load tests"""
+    try:
+        import fmea_synthetic
+    except ModuleNotFoundError as e:
+        raise click.ClickException(f'generate-data needs {e.name}, which is not installed')
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f'Unknown user: {username}')
+    
+    conn = db.engine.raw_connection()
+    try:
+        report = fmea_synthetic.populate(conn, FMEAEntry.__tablename__, Action.__tablename__,
+                                         fmea_synthetic.parse_size(rows), user.id, seed)
+    finally:
+        conn.close()
+    click.echo(f"{report['entries']} entries, {report['actions']} actions in {report['duration_ms']} ms")
+
+def init_db():
+    """Initialize database with sample data"""
+    migrate_db()
+    seed_db()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Apply schema migrations and add demo data"""
+    init_db()
+    migration = app.config['SCHEMA_MIGRATION']
+    click.echo(f"Schema version {migration['version']} (applied {migration['applied']}) "
+               f"in {migration['duration_ms']} ms")
+    if migration['pending']:
+        click.echo(f"Not applied, retried on the next start: {migration['pending']}")
+
 if __name__ == '__main__':
     with app.app_context():
         init_db()
@@ -0,0 +1,132 @@
+# fmea_analytics.py
+"""Vectorized portfolio analytics over the severity/occurrence/detection ratings"""
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+import fmea_db
+import fmea_priority
+
+RATINGS = np.arange(1, 11)
+# RPN of every (severity, occurrence, detection) cell of a 10x10x10 rating cube
+RPN_GRID = RATINGS[:, None, None] * RATINGS[None, :, None] * RATINGS[None, None, :]
+# Same bands as fmea_db.RISK_LEVEL_EXPRESSION
+RISK_GRID = np.where(RPN_GRID > 100, 'high', np.where(RPN_GRID > 50, 'medium', 'low'))
+# Risk level computed from the rating columns, so filters stay on the covering function index
+RISK_LEVEL_SQL = fmea_db.RISK_LEVEL_EXPRESSION.replace('rpn', f'({fmea_db.RPN_EXPRESSION})')
+
+HISTOGRAM_BINS = 20
+PARETO_LIMIT = 20
+
+
+def rating_cube(severity, occurrence, detection, weights=None) -> np.ndarray:
+    """Count entries per (severity, occurrence, detection) cell from rating arrays of 1..10"""
+    severity, occurrence, detection = (np.asarray(values, dtype=np.int64) for values in
+                                       (severity, occurrence, detection))
+    cells = (severity - 1) * 100 + (occurrence - 1) * 10 + (detection - 1)
+    counts = np.bincount(cells, weights=weights, minlength=1000)
+    return counts[:1000].astype(np.int64).reshape(10, 10, 10)
+
+
+def load_cube(conn, table: str, risk_filter: str = '', status_filter: str = '') -> np.ndarray:
+    """Read the rating cube from the trigger-maintained counts (at most 1000 rows per status)"""
+    sql = f"SELECT severity, occurrence, detection, count FROM {table}_ratings WHERE count > 0"
+    params = []
+    if status_filter:
+        sql += " AND status = ?"
+        params.append(status_filter)
+
+    rows = np.array(conn.execute(sql, params).fetchall(), dtype=np.int64).reshape(-1, 4)
+    cube = rating_cube(rows[:, 0], rows[:, 1], rows[:, 2], weights=rows[:, 3])
+    if risk_filter in fmea_db.RISK_LEVELS:
+        cube = np.where(RISK_GRID == risk_filter, cube, 0)
+    return cube
+
+
+def load_functions(conn, table: str, risk_filter: str = '',
+                   status_filter: str = '') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (functions, entry counts, RPN sums) as arrays, one element per function"""
+    where = ''
+    params = []
+    if status_filter:
+        where += " AND status = ?"
+        params.append(status_filter)
+    if risk_filter in fmea_db.RISK_LEVELS:
+        where += f" AND {RISK_LEVEL_SQL} = ?"
+        params.append(risk_filter)
+
+    rows = conn.execute(f'''
+        SELECT function, COUNT(*), SUM({fmea_db.RPN_EXPRESSION})
+        FROM {table}
+        WHERE 1=1{where}
+        GROUP BY function
+    ''', params).fetchall()
+
+    functions = np.array([row[0] for row in rows], dtype=object)
+    values = np.array([row[1:] for row in rows], dtype=np.int64).reshape(-1, 2)
+    return functions, values[:, 0], values[:, 1]
+
+
+def analyze(cube: np.ndarray, functions: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+            bins: int = HISTOGRAM_BINS, limit: int = PARETO_LIMIT) -> Dict[str, Any]:
+    """Compute RPN distribution, Action Priority counts, marginals and function Pareto from a rating cube"""
+    counts = cube.ravel()
+    rpn = RPN_GRID.ravel()
+    total = int(counts.sum())
+
+    # Entries per RPN value 0..1000; percentiles are the first value whose cumulative count reaches q
+    by_rpn = np.bincount(rpn, weights=counts, minlength=1001)
+    cumulative = np.cumsum(by_rpn)
+    percentiles = np.searchsorted(cumulative, np.array([0.5, 0.9]) * total) if total else [0, 0]
+    histogram, edges = np.histogram(rpn, bins=bins, range=(0, 1000), weights=counts)
+
+    result = {
+        'total': total,
+        'rpn': {
+            'mean': round(float(rpn @ counts / total), 1) if total else 0,
+            'median': int(percentiles[0]),
+            'p90': int(percentiles[1]),
+            'max': int(rpn[counts > 0].max()) if total else 0
+        },
+        'risk_levels': {level: int(counts[RISK_GRID.ravel() == level].sum()) for level in fmea_db.RISK_LEVELS},
+        'action_priorities': {priority: int(counts[fmea_priority.action_priority_table().ravel() == priority].sum())
+                              for priority in fmea_priority.ACTION_PRIORITIES},
+        'histogram': {
+            'edges': edges.astype(int).tolist(),
+            'counts': histogram.astype(int).tolist()
+        },
+        'marginals': {
+            'severity': cube.sum(axis=(1, 2)).tolist(),
+            'occurrence': cube.sum(axis=(0, 2)).tolist(),
+            'detection': cube.sum(axis=(0, 1)).tolist()
+        },
+        # Rows: severity 1..10, columns: occurrence 1..10
+        'severity_occurrence': cube.sum(axis=2).tolist()
+    }
+
+    if functions is not None:
+        names, entry_counts, rpn_sums = functions
+        rpn_total = rpn_sums.sum()
+        order = np.argsort(-rpn_sums, kind='stable')[:limit]
+        shares = rpn_sums[order] / rpn_total * 100 if rpn_total else np.zeros(len(order))
+        result['pareto'] = [
+            {'function': names[i], 'count': int(entry_counts[i]), 'rpn_sum': int(rpn_sums[i]),
+             'share': round(float(share), 1), 'cumulative_share': round(float(cumulative_share), 1)}
+            for i, share, cumulative_share in zip(order, shares, np.cumsum(shares))
+        ]
+        order = np.argsort(-entry_counts, kind='stable')[:limit]
+        result['functions'] = [{'function': names[i], 'count': int(entry_counts[i])} for i in order]
+        result['function_count'] = len(names)
+
+    return result
+
+
+def analyze_table(conn, table: str, risk_filter: str = '', status_filter: str = '',
+                  bins: int = HISTOGRAM_BINS, limit: int = PARETO_LIMIT) -> Dict[str, Any]:
+    """Load and analyze the ratings of an entry table; adds the elapsed time in ms"""
+    start = time.perf_counter()
+    result = analyze(load_cube(conn, table, risk_filter, status_filter),
+                     load_functions(conn, table, risk_filter, status_filter), bins, limit)
+    result['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
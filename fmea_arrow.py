@@ -0,0 +1,172 @@
+# fmea_arrow.py
+"""Columnar export of FMEA entries joined with their actions, as Parquet or an Arrow IPC stream"""
+import io
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import fmea_db
+
+ROW_GROUP_SIZE = 50000
+PARQUET_COMPRESSION = 'zstd'
+# format -> (file extension, MIME type)
+FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrows', 'application/vnd.apache.arrow.stream')
+}
+
+# Few distinct values, so stored as small integer codes plus a dictionary
+CATEGORY = pa.dictionary(pa.int8(), pa.string())
+TIMESTAMP = pa.timestamp('us')
+DETAIL_TYPES = {'TEXT': pa.string(), 'DATE': pa.date32(), 'INTEGER': pa.int16()}
+
+# (export column, source column, Arrow type)
+ENTRY_FIELDS = [
+    ('entry_id', 'id', pa.int64()),
+    ('function', 'function', pa.string()),
+    ('failure_mode', 'failure_mode', pa.string()),
+    ('failure_effect', 'failure_effect', pa.string()),
+    ('severity', 'severity', pa.int8()),
+    ('failure_cause', 'failure_cause', pa.string()),
+    ('occurrence', 'occurrence', pa.int8()),
+    ('test_method', 'test_method', pa.string()),
+    ('detection', 'detection', pa.int8()),
+    ('rpn', 'rpn', pa.int16()),
+    ('risk_level', 'risk_level', CATEGORY),
+    ('action_priority', 'action_priority', CATEGORY),
+    ('actions', 'actions', pa.string()),
+    ('status', 'status', CATEGORY),
+    ('created_at', 'created_at', TIMESTAMP),
+    ('updated_at', 'updated_at', TIMESTAMP),
+]
+# One row per entry and action; entries without actions get null action columns.
+# The action's own priority is action_priority_level, action_priority is the entry's AIAG-VDA priority.
+ACTION_FIELDS = [
+    ('action_id', 'id', pa.int64()),
+    ('action_title', 'title', pa.string()),
+    ('action_description', 'description', pa.string()),
+    ('action_assigned_to', 'assigned_to', pa.string()),
+    ('action_priority_level', 'priority', CATEGORY),
+    ('action_status', 'status', CATEGORY),
+    ('action_due_date', 'due_date', pa.date32()),
+    ('action_created_at', 'created_at', TIMESTAMP),
+    ('action_updated_at', 'updated_at', TIMESTAMP),
+] + [(f'action_{name}', name, DETAIL_TYPES[sql_type]) for name, sql_type in fmea_db.ACTION_DETAIL_COLUMNS]
+
+SCHEMA = pa.schema([(name, arrow_type) for name, _, arrow_type in ENTRY_FIELDS + ACTION_FIELDS])
+# Without actions (non-admin users): one row per entry
+ENTRY_SCHEMA = pa.schema([(name, arrow_type) for name, _, arrow_type in ENTRY_FIELDS])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written so far; tell() keeps counting for the Parquet footer"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column(values: Sequence, arrow_type: pa.DataType) -> pa.Array:
+    # SQLite returns dates and timestamps as ISO text ('YYYY-MM-DD[ HH:MM:SS[.ffffff]]')
+    if arrow_type == TIMESTAMP:
+        return pa.array(np.array([value or 'NaT' for value in values], dtype='datetime64[us]'), from_pandas=True)
+    if arrow_type == pa.date32():
+        days = np.array([value[:10] if value else 'NaT' for value in values], dtype='datetime64[D]')
+        return pa.array(days, from_pandas=True).cast(pa.date32())
+    return pa.array(values, type=arrow_type)
+
+
+def to_record_batch(rows: List[tuple], schema: pa.Schema = SCHEMA) -> pa.RecordBatch:
+    """Typed record batch from export query rows"""
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays([_column(values, field.type) for values, field in zip(columns, schema)],
+                                      schema=schema)
+
+
+def export_query(conn, entry_table: str, action_table: str, search: str = '', risk_filter: str = '',
+                 status_filter: str = '', priority_filter: str = '', include_actions: bool = True) -> Tuple[str, list]:
+    """SQL and parameters for the filtered entries joined with their actions, in dashboard order"""
+    joins, where, params, order_by = fmea_db.entry_filter_sql(
+        conn, entry_table, search, risk_filter, status_filter, priority_filter)
+    if not include_actions:
+        select = ', '.join(f'{entry_table}.{source}' for _, source, _ in ENTRY_FIELDS)
+        return f'''
+            SELECT {select}
+            FROM {entry_table}{joins}
+            WHERE 1=1{where}
+            ORDER BY {order_by}
+        ''', params
+    # The Flask actions table has no extended columns; they are exported as nulls there
+    action_columns = fmea_db.get_columns(conn, action_table)
+    select = ', '.join([f'e.{source}' for _, source, _ in ENTRY_FIELDS] +
+                       [f'a.{source}' if source in action_columns else 'NULL' for _, source, _ in ACTION_FIELDS])
+    # Filter and rank only the entry ids first: the filter columns are then not ambiguous with the
+    # action columns, and the sort handles narrow rows
+    return f'''
+        SELECT {select}
+        FROM (
+            SELECT {entry_table}.id, ROW_NUMBER() OVER (ORDER BY {order_by}) AS export_order
+            FROM {entry_table}{joins}
+            WHERE 1=1{where}
+        ) AS selected
+        JOIN {entry_table} AS e ON e.id = selected.id
+        LEFT JOIN {action_table} AS a ON a.fmea_entry_id = e.id
+        ORDER BY selected.export_order, a.id
+    ''', params
+
+
+def stream_export(conn, entry_table: str, action_table: str, export_format: str = 'parquet',
+                  search: str = '', risk_filter: str = '', status_filter: str = '', priority_filter: str = '',
+                  row_group_size: int = ROW_GROUP_SIZE, include_actions: bool = True) -> Iterator[bytes]:
+    """Yield the export in chunks; one Parquet row group (or Arrow record batch) per fetched block of rows.
+    Without include_actions only the entry columns are written, one row per entry."""
+    if export_format not in FORMATS:
+        raise ValueError(f'Unbekanntes Exportformat: {export_format}')
+    sql, params = export_query(conn, entry_table, action_table, search, risk_filter, status_filter, priority_filter,
+                               include_actions)
+    schema = SCHEMA if include_actions else ENTRY_SCHEMA
+    cursor = conn.execute(sql, params)
+
+    sink = _ChunkSink()
+    if export_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression=PARQUET_COMPRESSION)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        while True:
+            rows = cursor.fetchmany(row_group_size)
+            if not rows:
+                break
+            writer.write_batch(to_record_batch(rows, schema))
+            yield sink.drain()
+    finally:
+        cursor.close()
+        writer.close()
+    yield sink.drain()
+
+
+def export_bytes(conn, entry_table: str, action_table: str, export_format: str = 'parquet', *filters,
+                 row_group_size: int = ROW_GROUP_SIZE, include_actions: bool = True) -> bytes:
+    """Whole export as bytes, for download buttons"""
+    return b''.join(stream_export(conn, entry_table, action_table, export_format, *filters,
+                                  row_group_size=row_group_size, include_actions=include_actions))
@@ -0,0 +1,189 @@
+# fmea_async_api.py
+"""Read-only ASGI API over the Flask database: concurrent reads on a pool of WAL connections, writes stay in Flask
+
+Run next to the Flask app, e.g. `uvicorn fmea_async_api:app --port 8001`; it accepts the Flask session cookie.
+"""
+import asyncio
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from itsdangerous import BadSignature
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import fmea_analytics
+import fmea_db
+import flask_app
+
+POOL_SIZE = int(os.environ.get('FMEA_ASYNC_POOL_SIZE', 8))
+ENTRY_TABLE = flask_app.FMEAEntry.__tablename__
+USER_TABLE = flask_app.User.__tablename__
+ENTRY_COLUMNS = ['id', 'function', 'failure_mode', 'failure_effect', 'severity', 'failure_cause', 'occurrence',
+                 'test_method', 'detection', 'actions', 'status', 'rpn', 'risk_level', 'action_priority',
+                 'created_at', 'updated_at']
+
+
+class AsyncReadPool:
+    """Runs blocking reads on pooled WAL reader connections, one worker thread per connection"""
+
+    def __init__(self, database: str, size: int = POOL_SIZE):
+        # Readers only: writes stay in Flask, so this process never holds a writer connection
+        self.pool = fmea_db.ConnectionPool(database, size=size, read_only=True)
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='fmea-read')
+
+    def _read(self, function, args):
+        with self.pool.read() as conn:
+            return function(conn, *args)
+
+    async def run(self, function, *args):
+        """Await function(conn, *args) inside a read transaction without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._read, function, args)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def database_path() -> str:
+    with flask_app.app.app_context():
+        return flask_app.db.engine.url.database
+
+
+def session_user_id(request: Request):
+    """User id from the Flask session cookie, or None"""
+    cookie = request.cookies.get(flask_app.app.config['SESSION_COOKIE_NAME'])
+    serializer = flask_app.app.session_interface.get_signing_serializer(flask_app.app)
+    if not cookie or serializer is None:
+        return None
+    try:
+        session = serializer.loads(cookie, max_age=int(flask_app.app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return session.get('user_id')
+
+
+def load_role(conn, user_id):
+    """Same entry as flask_app.load_role, so both fill the shared role cache alike"""
+    row = conn.execute(f'SELECT role, role_version FROM "{USER_TABLE}" WHERE id = ?', (user_id,)).fetchone()
+    return {'role': row[0], 'role_version': row[1]} if row else None
+
+
+def cached_role(conn, user_id):
+    return flask_app.get_role_cache().get(user_id, lambda _: load_role(conn, user_id))
+
+
+async def current_user_id(request: Request):
+    """User id of a valid session whose user still exists, or None"""
+    user_id = session_user_id(request)
+    if user_id is None:
+        return None
+    # The cache may be remote (Redis) and a miss reads the database, so it runs on the read pool
+    entry = await request.app.state.reads.run(cached_role, user_id)
+    return user_id if entry is not None else None
+
+
+def entry_dict(row) -> dict:
+    """Same shape as FMEAEntry.to_dict()"""
+    entry = dict(zip(ENTRY_COLUMNS, row))
+    entry['created_at'] = entry['created_at'][:16] if entry['created_at'] else None
+    entry['updated_at'] = entry['updated_at'].replace(' ', 'T') if entry['updated_at'] else None
+    return entry
+
+
+def query_entries(conn, search, risk_filter, status_filter, priority_filter, cursor, page_size):
+    """One keyset page of filtered entries, with the same filters and cursors as the Flask API"""
+    joins, where, params, order_by = fmea_db.entry_filter_sql(
+        conn, ENTRY_TABLE, search, risk_filter, status_filter, priority_filter)
+    ranked = order_by.startswith('matches.rank')
+    name, key = ('rank', 'matches.rank') if ranked else ('created_at', f'{ENTRY_TABLE}.created_at')
+
+    if cursor:
+        value, entry_id = flask_app.decode_cursor(cursor, name)
+        where += f" AND ({key}, {ENTRY_TABLE}.id) {'>' if ranked else '<'} (?, ?)"
+        params.extend([value, entry_id])
+
+    columns = ', '.join(f'{ENTRY_TABLE}.{column}' for column in ENTRY_COLUMNS)
+    rows = conn.execute(f'''
+        SELECT {columns}, {key}
+        FROM {ENTRY_TABLE}{joins}
+        WHERE 1=1{where}
+        ORDER BY {order_by}
+        LIMIT ?
+    ''', params + [page_size + 1]).fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = flask_app.encode_cursor(name, rows[-1][-1], rows[-1][0])
+    return [entry_dict(row[:-1]) for row in rows], next_cursor
+
+
+def page_size(request: Request) -> int:
+    try:
+        value = int(request.query_params.get('page_size', flask_app.app.config['API_PAGE_SIZE']))
+    except ValueError:
+        value = flask_app.app.config['API_PAGE_SIZE']
+    return max(1, min(value, flask_app.app.config['MAX_PAGE_SIZE']))
+
+
+def bounded_int(request: Request, name: str, default: int) -> int:
+    try:
+        return max(1, min(int(request.query_params.get(name, default)), 100))
+    except ValueError:
+        return default
+
+
+def unauthorized():
+    return JSONResponse({'error': 'Nicht angemeldet'}, status_code=401)
+
+
+async def api_entries(request: Request):
+    if await current_user_id(request) is None:
+        return unauthorized()
+    size = page_size(request)
+    params = request.query_params
+    try:
+        entries, next_cursor = await request.app.state.reads.run(
+            query_entries, params.get('search', ''), params.get('risk_filter', ''),
+            params.get('status_filter', ''), params.get('priority_filter', ''), params.get('cursor', ''), size)
+    except ValueError:
+        return JSONResponse({'error': 'Ungültiger Cursor'}, status_code=400)
+    return JSONResponse({'entries': entries, 'next_cursor': next_cursor, 'page_size': size})
+
+
+async def api_statistics(request: Request):
+    if await current_user_id(request) is None:
+        return unauthorized()
+    stats = await request.app.state.reads.run(fmea_db.read_statistics, ENTRY_TABLE)
+    return JSONResponse(flask_app.statistics_payload(stats))
+
+
+async def api_analytics(request: Request):
+    if await current_user_id(request) is None:
+        return unauthorized()
+    analytics = await request.app.state.reads.run(
+        fmea_analytics.analyze_table, ENTRY_TABLE,
+        request.query_params.get('risk_filter', ''), request.query_params.get('status_filter', ''),
+        bounded_int(request, 'bins', fmea_analytics.HISTOGRAM_BINS),
+        bounded_int(request, 'limit', fmea_analytics.PARETO_LIMIT))
+    return JSONResponse(analytics)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # The Flask app owns the schema; it must have been migrated (flask init-db) before
+    app.state.reads = AsyncReadPool(database_path(), POOL_SIZE)
+    try:
+        yield
+    finally:
+        app.state.reads.close()
+
+
+app = Starlette(routes=[
+    Route('/api/entries', api_entries),
+    Route('/api/statistics', api_statistics),
+    Route('/api/analytics', api_analytics),
+], lifespan=lifespan)
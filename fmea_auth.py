@@ -0,0 +1,130 @@
+# fmea_auth.py
+"""Authorization cache: user id -> (role, role_version) with TTL, in-process or in a shared backend.
+
+Each user also has a version key in the backend, bumped by RoleCache.role_changed(). Entries are stamped
+with the version read before loading them, so an entry loaded while a role change was committed is not
+served afterwards. With a shared backend (Redis) a change made by one process, e.g. flask set-role,
+applies in all workers on the user's next request; with MemoryBackend only in the changing process, the
+others reload within the TTL."""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+DEFAULT_TTL = 30  # seconds; bounds how long a role change can go unnoticed by workers not sharing the backend
+DEFAULT_SIZE = 1024
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry; each worker has its own"""
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        self.size = size
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        # Version counters are kept outside the LRU, so eviction cannot reset them
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        if key in self._counters:
+            return str(self._counters[key])
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisBackend:
+    """Shared backend for several workers, using a redis-py style client (get/mget/setex/incr/delete)"""
+
+    shared = True
+
+    def __init__(self, client, prefix: str = 'fmea:auth:'):
+        self.client = client
+        self.prefix = prefix
+
+    @staticmethod
+    def _decode(value) -> Optional[str]:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def get(self, key: str) -> Optional[str]:
+        return self._decode(self.client.get(self.prefix + key))
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return [self._decode(value) for value in self.client.mget([self.prefix + key for key in keys])]
+
+    def set(self, key: str, value: str, ttl: float):
+        self.client.setex(self.prefix + key, max(1, int(ttl)), value)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+
+class RoleCache:
+    """Roles by user id on top of a backend; load() runs on a miss and returns None for unknown users"""
+
+    def __init__(self, backend=None, ttl: float = DEFAULT_TTL):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self) -> bool:
+        """True if role changes reach other processes through the backend"""
+        return getattr(self.backend, 'shared', False)
+
+    def get(self, user_id: int, load) -> Optional[Dict[str, Any]]:
+        # One backend round trip for the entry and the user's current version
+        value, version = self.backend.get_many([str(user_id), f'{user_id}:version'])
+        if value is not None:
+            entry = json.loads(value)
+            if entry.get('version') == version:
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        entry = load(user_id)
+        if entry is not None:
+            # Stamped with the version read before loading: a change committed meanwhile bumps it
+            entry['version'] = version
+            self.backend.set(str(user_id), json.dumps(entry), self.ttl)
+        return entry
+
+    def role_changed(self, user_id: int):
+        """Invalidate a user's cached role after the change is committed"""
+        self.backend.incr(f'{user_id}:version')
+        self.backend.delete(str(user_id))
@@ -0,0 +1,178 @@
+# fmea_batch.py
+"""Batch update/delete of FMEA entries and actions in a single transaction"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import fmea_db
+
+PRIORITIES = ('Niedrig', 'Mittel', 'Hoch')
+
+# Fields that may be changed by a batch update, with the check applied to their values
+ENTRY_FIELDS = {
+    'function': 'text',
+    'failure_mode': 'text',
+    'failure_effect': 'text',
+    'failure_cause': 'text',
+    'test_method': 'text',
+    'actions': 'optional_text',
+    'severity': 'rating',
+    'occurrence': 'rating',
+    'detection': 'rating',
+    'status': 'status'
+}
+ACTION_FIELDS = {
+    'title': 'text',
+    'description': 'optional_text',
+    'assigned_to': 'optional_text',
+    'priority': 'priority',
+    'status': 'status',
+    'due_date': 'date',
+    'fmea_entry_id': 'reference'
+}
+
+# SQLite limits the number of bound parameters per statement
+ID_CHUNK_SIZE = 500
+
+
+def _check_value(kind: str, value) -> Optional[str]:
+    """Return an error message if value is not acceptable for a field of the given kind"""
+    if kind == 'text':
+        if not isinstance(value, str) or not value.strip():
+            return 'darf nicht leer sein'
+    elif kind == 'optional_text':
+        if value is not None and not isinstance(value, str):
+            return 'muss ein Text sein'
+    elif kind == 'rating':
+        if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 10:
+            return 'muss eine ganze Zahl von 1 bis 10 sein'
+    elif kind == 'status':
+        if value not in fmea_db.STATUS_KEYS:
+            return 'ungültiger Status'
+    elif kind == 'priority':
+        if value not in PRIORITIES:
+            return 'ungültige Priorität'
+    elif kind == 'date':
+        if value is not None:
+            try:
+                date.fromisoformat(str(value))
+            except ValueError:
+                return 'muss ein Datum (JJJJ-MM-TT) sein'
+    elif kind == 'reference':
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            return 'muss eine ID sein'
+    return None
+
+
+def _check_operation(operation, fields: Dict[str, str], allow_delete: bool) -> List[str]:
+    """Validate a single operation; returns the list of problems"""
+    op = operation.get('op')
+    if op == 'delete':
+        return [] if allow_delete else ['Keine Berechtigung zum Löschen']
+    if op != 'update':
+        return [f"Unbekannte Operation: {op}"]
+
+    changes = operation.get('fields')
+    if not isinstance(changes, dict) or not changes:
+        return ['Keine Felder zum Ändern angegeben']
+
+    errors = []
+    for name, value in changes.items():
+        if name not in fields:
+            errors.append(f"Unbekanntes Feld: {name}")
+            continue
+        error = _check_value(fields[name], value)
+        if error:
+            errors.append(f"{name} {error}")
+    return errors
+
+
+def _chunks(ids: List[int]):
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def apply_batch(conn, table: str, operations: List[Dict[str, Any]], fields: Dict[str, str],
+                updated_at, allow_delete: bool = True, atomic: bool = False,
+                references=()) -> Dict[str, Any]:
+    """Validate and apply update/delete operations; returns per-item results and totals
+
+    Operations look like {'op': 'update', 'id': 1, 'fields': {...}} or {'op': 'delete', 'id': 2}.
+    Updates with the same field values are grouped into one UPDATE ... WHERE id IN (...), all
+    deletes into one DELETE. The caller owns the transaction. With atomic=True nothing is
+    written if any operation is invalid. references lists (table, column) pairs that point at
+    the deleted rows and are set to NULL first, with updated_at bumped like an update.
+    """
+    results = []
+    seen = set()
+    for operation in operations:
+        operation = operation if isinstance(operation, dict) else {}
+        item_id = operation.get('id')
+        result = {'id': item_id, 'op': operation.get('op'), 'ok': False}
+        results.append(result)
+
+        if isinstance(item_id, bool) or not isinstance(item_id, int):
+            result['error'] = 'Ungültige ID'
+        elif item_id in seen:
+            result['error'] = 'ID mehrfach im Stapel'
+        else:
+            seen.add(item_id)
+            errors = _check_operation(operation, fields, allow_delete)
+            if errors:
+                result['error'] = '; '.join(errors)
+            else:
+                result['ok'] = True
+                result['_fields'] = operation.get('fields') or {}
+
+    # Unknown ids are reported instead of silently matching nothing
+    pending = [result for result in results if result['ok']]
+    existing = set()
+    for chunk in _chunks([result['id'] for result in pending]):
+        placeholders = ', '.join('?' * len(chunk))
+        existing.update(row[0] for row in
+                        conn.execute(f"SELECT id FROM {table} WHERE id IN ({placeholders})", chunk))
+    for result in pending:
+        if result['id'] not in existing:
+            result['ok'] = False
+            result['error'] = 'Nicht gefunden'
+
+    pending = [result for result in pending if result['ok']]
+    if atomic and len(pending) < len(results):
+        for result in pending:
+            result['ok'] = False
+            result['error'] = 'Nicht ausgeführt, Stapel enthält Fehler'
+        pending = []
+
+    # One statement per distinct set of new values
+    updates = {}
+    deleted = []
+    for result in pending:
+        if result['op'] == 'delete':
+            deleted.append(result['id'])
+        else:
+            key = tuple(sorted(result['_fields'].items()))
+            updates.setdefault(key, []).append(result['id'])
+
+    for key, ids in updates.items():
+        assignments = ', '.join(f"{name} = ?" for name, _ in key)
+        values = [value for _, value in key] + [updated_at]
+        for chunk in _chunks(ids):
+            placeholders = ', '.join('?' * len(chunk))
+            conn.execute(f"UPDATE {table} SET {assignments}, updated_at = ? WHERE id IN ({placeholders})",
+                         values + chunk)
+
+    for chunk in _chunks(deleted):
+        placeholders = ', '.join('?' * len(chunk))
+        for reference_table, column in references:
+            # Unlinking changes the referencing rows, so delta sync has to see them
+            conn.execute(f"UPDATE {reference_table} SET {column} = NULL, updated_at = ? "
+                         f"WHERE {column} IN ({placeholders})", [updated_at] + chunk)
+        conn.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", chunk)
+
+    for result in results:
+        result.pop('_fields', None)
+    return {
+        'results': results,
+        'updated': sum(len(ids) for ids in updates.values()),
+        'deleted': len(deleted),
+        'failed': len(results) - len(pending)
+    }
@@ -0,0 +1,720 @@
+# fmea_db.py
+"""Shared SQLite schema helpers for the Flask and Streamlit FMEA apps"""
+import argparse
+import logging
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import fmea_priority
+
+logger = logging.getLogger(__name__)
+
+RISK_LEVELS = ('high', 'medium', 'low')
+STATUS_KEYS = {'Offen': 'open', 'In Bearbeitung': 'in_progress', 'Abgeschlossen': 'completed'}
+
+# RPN and risk level are stored as generated columns so filters and counts can use indexes
+RPN_EXPRESSION = 'severity * occurrence * detection'
+RPN_HIGH_THRESHOLD = 100  # risk level 'high' above this RPN
+RPN_MEDIUM_THRESHOLD = 50  # 'medium' above this, 'low' up to it
+RISK_LEVEL_EXPRESSION = (f"CASE WHEN rpn > {RPN_HIGH_THRESHOLD} THEN 'high' "
+                         f"WHEN rpn > {RPN_MEDIUM_THRESHOLD} THEN 'medium' ELSE 'low' END")
+
+# Column layout shared by the CSV exports
+CSV_HEADERS = [
+    'Funktion', 'Fehlerart', 'Fehlerfolge', 'Auftretenswahrscheinlichkeit',
+    'Fehlerursache', 'Auftreten', 'Prüfmaßnahme', 'Entdeckung',
+    'RPN', 'Maßnahmen', 'Status', 'Erstellt am'
+]
+
+# Columns covered by the dashboard search, with their bm25 weights
+SEARCH_COLUMNS = ('function', 'failure_mode', 'failure_cause', 'failure_effect')
+SEARCH_WEIGHTS = (2.0, 2.0, 1.0, 1.0)
+
+# Timestamps are stored as text in the format SQLAlchemy uses for DateTime columns, so that
+# text comparisons (sync and pagination cursors) order them correctly
+DB_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def db_timestamp(value: datetime) -> str:
+    """datetime (UTC) in the stored timestamp format"""
+    return value.strftime(DB_TIMESTAMP_FORMAT)
+
+
+class ConnectionPool:
+    """Thread-safe SQLite access in WAL mode: one writer connection plus a small pool of readers.
+    With read_only=True there is no writer and the readers refuse writes (PRAGMA query_only)."""
+
+    def __init__(self, database: str, size: int = 4, busy_timeout: int = 5000,
+                 cache_size: int = -64000, mmap_size: int = 256 * 1024 * 1024, read_only: bool = False):
+        self.database = database
+        self.size = size
+        self.read_only = read_only
+        self.busy_timeout = busy_timeout
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.connections_opened = 0
+        self.write_count = 0
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._writer = None if read_only else self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are opened explicitly by read()/write()
+        conn = sqlite3.connect(self.database, timeout=self.busy_timeout / 1000,
+                               isolation_level=None, check_same_thread=False)
+        if self.read_only:
+            # The database's owner has switched it to WAL; a query_only connection cannot change it
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._reader_count < self.size
+            if create:
+                self._reader_count += 1
+        return self._connect() if create else self._readers.get()
+
+    def _count_checkout(self):
+        self._local.checkouts = getattr(self._local, 'checkouts', 0) + 1
+
+    @contextmanager
+    def read(self):
+        """Short read transaction on a pooled reader connection"""
+        conn = self._checkout()
+        self._count_checkout()
+        try:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+        finally:
+            self._readers.put(conn)
+
+    def _require_writer(self):
+        if self._writer is None:
+            raise sqlite3.OperationalError('read-only connection pool')
+
+    @contextmanager
+    def write(self):
+        """Short write transaction (BEGIN IMMEDIATE) on the single writer connection"""
+        self._require_writer()
+        with self._write_lock:
+            self._count_checkout()
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                if self._writer.in_transaction:
+                    self._writer.execute("ROLLBACK")
+                raise
+            if self._writer.in_transaction:
+                self._writer.execute("COMMIT")
+            self.write_count += 1
+
+    @contextmanager
+    def connection(self):
+        """The writer connection without an explicit transaction, for schema changes and bulk loads"""
+        self._require_writer()
+        with self._write_lock:
+            self._count_checkout()
+            try:
+                yield self._writer
+            finally:
+                self.write_count += 1
+
+    def data_version(self) -> tuple:
+        """Changes whenever data was committed, through this pool or by another connection"""
+        # PRAGMA data_version only reflects commits made by other connections
+        self._require_writer()
+        with self._write_lock:
+            external = self._writer.execute("PRAGMA data_version").fetchone()[0]
+        return self.write_count, external
+
+    def reset_stats(self):
+        """Start counting checkouts for the current thread, e.g. at the start of a Streamlit rerun"""
+        self._local.checkouts = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'checkouts': getattr(self._local, 'checkouts', 0),
+            'connections': self.connections_opened,
+            'pool_size': self.size
+        }
+
+
+def get_columns(conn, table: str) -> List[str]:
+    """Return all column names of a table, including generated columns"""
+    return [column[1] for column in conn.execute(f"PRAGMA table_xinfo({table})").fetchall()]
+
+
+def ensure_column(conn, table: str, column: str, definition: str):
+    """Add a plain column to an existing table if it is missing"""
+    if column not in get_columns(conn, table):
+        conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} {definition}')
+
+
+def ensure_risk_columns(conn, table: str):
+    """Add generated rpn/risk_level columns and their indexes if they don't exist"""
+    existing_columns = get_columns(conn, table)
+
+    if 'rpn' not in existing_columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN rpn INTEGER "
+                     f"GENERATED ALWAYS AS ({RPN_EXPRESSION}) VIRTUAL")
+    if 'risk_level' not in existing_columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN risk_level VARCHAR(10) "
+                     f"GENERATED ALWAYS AS ({RISK_LEVEL_EXPRESSION}) VIRTUAL")
+
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_rpn ON {table} (rpn)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_risk_level ON {table} (risk_level, created_at)")
+
+
+def ensure_action_priority(conn, table: str):
+    """Add the generated AIAG-VDA action_priority column and its index if they don't exist"""
+    # SQLite cannot add STORED columns to an existing table; the index materializes the values
+    if 'action_priority' not in get_columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN action_priority VARCHAR(1) "
+                     f"GENERATED ALWAYS AS ({fmea_priority.ACTION_PRIORITY_EXPRESSION}) VIRTUAL")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_action_priority ON {table} (action_priority, created_at)")
+
+
+def ensure_statistics(conn, table: str):
+    """Create the risk/status summary table and the triggers that keep it up to date"""
+    statistics = f'{table}_statistics'
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {statistics} (
+            risk_level VARCHAR(10) NOT NULL,
+            status VARCHAR(50) NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (risk_level, status)
+        )
+    ''')
+
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                          (f'{statistics}_insert',))
+    if cursor.fetchone():
+        return
+
+    conn.execute(f'''
+        CREATE TRIGGER {statistics}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {statistics} (risk_level, status, count) VALUES (NEW.risk_level, NEW.status, 1)
+            ON CONFLICT (risk_level, status) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {statistics}_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE {statistics} SET count = count - 1
+            WHERE risk_level = OLD.risk_level AND status = OLD.status;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {statistics}_update AFTER UPDATE OF severity, occurrence, detection, status ON {table}
+        WHEN OLD.risk_level IS NOT NEW.risk_level OR OLD.status IS NOT NEW.status
+        BEGIN
+            UPDATE {statistics} SET count = count - 1
+            WHERE risk_level = OLD.risk_level AND status = OLD.status;
+            INSERT INTO {statistics} (risk_level, status, count) VALUES (NEW.risk_level, NEW.status, 1)
+            ON CONFLICT (risk_level, status) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+    # Existing rows were written before the triggers existed
+    rebuild_statistics(conn, table)
+
+
+def rebuild_statistics(conn, table: str):
+    """Recount the summary table from scratch"""
+    statistics = f'{table}_statistics'
+    conn.execute(f"DELETE FROM {statistics}")
+    conn.execute(f'''
+        INSERT INTO {statistics} (risk_level, status, count)
+        SELECT risk_level, status, COUNT(*) FROM {table} GROUP BY risk_level, status
+    ''')
+
+
+def check_statistics(conn, table: str, repair: bool = False) -> List[tuple]:
+    """Diff the live counters against a fresh count; returns (risk_level, status, live, expected) rows"""
+    live = {(row[0], row[1]): row[2] for row in
+            conn.execute(f"SELECT risk_level, status, count FROM {table}_statistics").fetchall()}
+    expected = {(row[0], row[1]): row[2] for row in
+                conn.execute(f"SELECT risk_level, status, COUNT(*) FROM {table} "
+                             f"GROUP BY risk_level, status").fetchall()}
+
+    differences = []
+    for key in sorted(set(live) | set(expected)):
+        if live.get(key, 0) != expected.get(key, 0):
+            differences.append((key[0], key[1], live.get(key, 0), expected.get(key, 0)))
+
+    if differences and repair:
+        rebuild_statistics(conn, table)
+        conn.commit()
+    return differences
+
+
+def ensure_rating_counts(conn, table: str):
+    """Create the trigger-maintained severity/occurrence/detection/status counts used by analytics"""
+    ratings = f'{table}_ratings'
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ratings} (
+            severity INTEGER NOT NULL,
+            occurrence INTEGER NOT NULL,
+            detection INTEGER NOT NULL,
+            status VARCHAR(50) NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (severity, occurrence, detection, status)
+        )
+    ''')
+    # Covers the per-function grouping, including status and RPN filters, without table lookups
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_function "
+                 f"ON {table} (function, status, severity, occurrence, detection)")
+
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                          (f'{ratings}_insert',))
+    if cursor.fetchone():
+        return
+
+    conn.execute(f'''
+        CREATE TRIGGER {ratings}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {ratings} (severity, occurrence, detection, status, count)
+            VALUES (NEW.severity, NEW.occurrence, NEW.detection, NEW.status, 1)
+            ON CONFLICT (severity, occurrence, detection, status) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {ratings}_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE {ratings} SET count = count - 1
+            WHERE severity = OLD.severity AND occurrence = OLD.occurrence
+              AND detection = OLD.detection AND status = OLD.status;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {ratings}_update AFTER UPDATE OF severity, occurrence, detection, status ON {table}
+        WHEN OLD.severity IS NOT NEW.severity OR OLD.occurrence IS NOT NEW.occurrence
+          OR OLD.detection IS NOT NEW.detection OR OLD.status IS NOT NEW.status
+        BEGIN
+            UPDATE {ratings} SET count = count - 1
+            WHERE severity = OLD.severity AND occurrence = OLD.occurrence
+              AND detection = OLD.detection AND status = OLD.status;
+            INSERT INTO {ratings} (severity, occurrence, detection, status, count)
+            VALUES (NEW.severity, NEW.occurrence, NEW.detection, NEW.status, 1)
+            ON CONFLICT (severity, occurrence, detection, status) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+    conn.execute(f'''
+        INSERT INTO {ratings} (severity, occurrence, detection, status, count)
+        SELECT severity, occurrence, detection, status, COUNT(*) FROM {table}
+        GROUP BY severity, occurrence, detection, status
+    ''')
+
+
+
+def ensure_sync(conn, table: str):
+    """Index updated_at for delta sync and record deleted ids in a {table}_deleted tombstone table"""
+    deleted = f'{table}_deleted'
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_updated_at ON {table} (updated_at, id)")
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {deleted} (
+            id INTEGER PRIMARY KEY,
+            deleted_at TIMESTAMP NOT NULL
+        )
+    ''')
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{deleted}_deleted_at ON {deleted} (deleted_at, id)")
+
+    # UTC with milliseconds, comparable with the updated_at strings of both apps
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {deleted}_insert AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {deleted} (id, deleted_at) VALUES (OLD.id, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            ON CONFLICT (id) DO UPDATE SET deleted_at = excluded.deleted_at;
+        END
+    ''')
+    # Without AUTOINCREMENT SQLite may hand out a deleted id again; the new row replaces the tombstone
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {deleted}_revive AFTER INSERT ON {table}
+        BEGIN
+            DELETE FROM {deleted} WHERE id = NEW.id;
+        END
+    ''')
+
+
+def read_deleted(conn, table: str, since: str) -> List[int]:
+    """Ids deleted from table after since ('YYYY-MM-DD HH:MM:SS[.fff]', UTC)"""
+    rows = conn.execute(f"SELECT id FROM {table}_deleted WHERE deleted_at > ? ORDER BY deleted_at, id",
+                        (since,)).fetchall()
+    return [row[0] for row in rows]
+
+
+def ensure_action_entry_index(conn, table: str):
+    """Index actions by their FMEA entry, for joining them to the entries"""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_fmea_entry_id ON {table} (fmea_entry_id)")
+
+
+def ensure_write_counter(conn, table: str):
+    """Count every insert, update and delete on table in the global write_counter row, a cheap ETag source"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS write_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO write_counter (id, count) VALUES (1, 0)")
+    for event in ('insert', 'update', 'delete'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_write_counter_{event} AFTER {event.upper()} ON {table}
+            BEGIN
+                UPDATE write_counter SET count = count + 1 WHERE id = 1;
+            END
+        ''')
+
+
+def ensure_write_epoch(conn):
+    """Give the write_counter row a random epoch, so a recreated database does not repeat old counter values"""
+    ensure_column(conn, 'write_counter', 'epoch', 'TEXT')
+    conn.execute("UPDATE write_counter SET epoch = lower(hex(randomblob(4))) WHERE epoch IS NULL")
+
+
+def read_data_version(conn) -> str:
+    """Epoch, schema version and write counter in one read; changes whenever a counted table changes.
+
+    Built from the database only, so it is the same in every worker and survives restarts."""
+    epoch, schema_version, count = conn.execute(
+        "SELECT epoch, (SELECT user_version FROM pragma_user_version), count FROM write_counter WHERE id = 1"
+    ).fetchone()
+    return f'{epoch}-{schema_version}-{count}'
+
+
+def drop_role_counter(conn, table: str):
+    """Remove the role_counter table and triggers of an earlier schema version"""
+    for event in ('update', 'delete'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_role_counter_{event}")
+    conn.execute("DROP TABLE IF EXISTS role_counter")
+
+def summarize_statistics(rows) -> Dict[str, Any]:
+    """Turn (risk_level, status, count) rows into dashboard statistics"""
+    stats = {'total': 0, 'high_risk': 0, 'medium_risk': 0, 'low_risk': 0,
+             'open': 0, 'in_progress': 0, 'completed': 0}
+
+    for risk_level, status, count in rows:
+        stats['total'] += count
+        if risk_level in RISK_LEVELS:
+            stats[f'{risk_level}_risk'] += count
+        if status in STATUS_KEYS:
+            stats[STATUS_KEYS[status]] += count
+
+    total = stats['total']
+    stats['completion_rate'] = round((stats['completed'] / total * 100) if total > 0 else 0, 1)
+    return stats
+
+
+def read_statistics(conn, table: str) -> Dict[str, Any]:
+    """Read dashboard statistics from the summary table"""
+    rows = conn.execute(f"SELECT risk_level, status, count FROM {table}_statistics").fetchall()
+    return summarize_statistics(rows)
+
+
+def ensure_fulltext(conn, table: str) -> bool:
+    """Create the FTS5 search index and its sync triggers; returns False if FTS5 is unavailable"""
+    fts = f'{table}_fts'
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'NEW.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'OLD.{column}' for column in SEARCH_COLUMNS)
+
+    # remove_diacritics folds umlauts so "Prufung" also finds "Prüfung"
+    try:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {columns},
+                content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return False
+
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                          (f'{fts}_insert',))
+    if cursor.fetchone():
+        return True
+
+    conn.execute(f'''
+        CREATE TRIGGER {fts}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {fts}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF {columns} ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END
+    ''')
+
+    # Index the rows that existed before the triggers
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    return True
+
+
+def has_fulltext(conn, table: str) -> bool:
+    """Check whether the FTS5 search index exists for a table"""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f'{table}_fts',))
+    return cursor.fetchone() is not None
+
+
+def fulltext_query(search: str) -> Optional[str]:
+    """Turn free text into an FTS5 query that prefix-matches every word"""
+    words = re.findall(r'\w+', search)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def fulltext_match_sql(table: str, placeholder: str = '?') -> str:
+    """SELECT returning (entry_id, rank) for all rows matching a fulltext_query(); lower rank is better"""
+    fts = f'{table}_fts'
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    return (f"SELECT rowid AS entry_id, bm25({fts}, {weights}) AS rank "
+            f"FROM {fts} WHERE {fts} MATCH {placeholder}")
+
+
+def entry_filter_sql(conn, table: str, search: str = '', risk_filter: str = '',
+                     status_filter: str = '', priority_filter: str = '') -> Tuple[str, str, list, str]:
+    """Translate dashboard filters into (joins, where, params, order_by) SQL fragments"""
+    joins = ''
+    where = ''
+    order_by = f'{table}.created_at DESC, {table}.id DESC'
+    params = []
+
+    fts_query = fulltext_query(search) if search else None
+    if fts_query and has_fulltext(conn, table):
+        # Ranked full-text search; the LIKE branch below is the fallback without FTS5
+        joins = f" JOIN ({fulltext_match_sql(table)}) AS matches ON matches.entry_id = {table}.id"
+        order_by = f'matches.rank, {table}.id'
+        params.append(fts_query)
+    elif search:
+        where += " AND (function LIKE ? OR failure_mode LIKE ? OR failure_cause LIKE ? OR failure_effect LIKE ?)"
+        search_param = f'%{search}%'
+        params.extend([search_param, search_param, search_param, search_param])
+
+    if status_filter:
+        where += " AND status = ?"
+        params.append(status_filter)
+
+    if risk_filter in RISK_LEVELS:
+        where += " AND risk_level = ?"
+        params.append(risk_filter)
+
+    if priority_filter in fmea_priority.ACTION_PRIORITIES:
+        where += " AND action_priority = ?"
+        params.append(priority_filter)
+
+    return joins, where, params, order_by
+
+
+def _run_migration(conn, version: int, migration, pending: bool) -> bool:
+    """Run one step in its own transaction; returns False if the step could not be applied yet"""
+    conn.execute("BEGIN")
+    try:
+        done = migration(conn) is not False
+        if pending and done:
+            conn.execute("DELETE FROM schema_pending WHERE version = ?", (version,))
+        elif not pending and not done:
+            conn.execute("INSERT OR IGNORE INTO schema_pending (version) VALUES (?)", (version,))
+        if not pending:
+            conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return done
+
+
+def run_migrations(conn, migrations) -> Dict[str, Any]:
+    """Apply the migrations newer than PRAGMA user_version, each in its own transaction.
+
+    A step that returns False (e.g. ensure_fulltext without FTS5) does not hold back the later steps;
+    it is recorded in schema_pending and retried on every start until it succeeds.
+    """
+    start = time.perf_counter()
+    current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_pending (version INTEGER PRIMARY KEY)")
+    applied = []
+
+    retry = [row[0] for row in conn.execute("SELECT version FROM schema_pending ORDER BY version")]
+    for version in retry:
+        if version <= len(migrations) and _run_migration(conn, version, migrations[version - 1], pending=True):
+            applied.append(version)
+
+    for version, migration in enumerate(migrations, start=1):
+        if version <= current_version:
+            continue
+        if _run_migration(conn, version, migration, pending=False):
+            applied.append(version)
+
+    pending = [row[0] for row in conn.execute("SELECT version FROM schema_pending ORDER BY version")]
+    result = {
+        'from_version': current_version,
+        'version': max(current_version, len(migrations)),
+        'applied': applied,
+        'pending': pending,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+    logger.info("Database schema at version %(version)s (from %(from_version)s, applied %(applied)s) "
+                "in %(duration_ms)s ms", result)
+    if pending:
+        logger.warning("Schema migrations %s could not be applied and will be retried on the next start", pending)
+    return result
+
+
+# Migrations for the schema shared by streamlit_app.py and streamlit_app1.py.
+# Append new steps at the end; the list index is the schema version.
+
+def _create_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fmea_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            function TEXT NOT NULL,
+            failure_mode TEXT NOT NULL,
+            failure_effect TEXT NOT NULL,
+            severity INTEGER NOT NULL,
+            failure_cause TEXT NOT NULL,
+            occurrence INTEGER NOT NULL,
+            test_method TEXT NOT NULL,
+            detection INTEGER NOT NULL,
+            actions TEXT,
+            status TEXT NOT NULL DEFAULT 'Offen',
+            created_by INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            assigned_to TEXT,
+            priority TEXT DEFAULT 'Mittel',
+            status TEXT DEFAULT 'Offen',
+            due_date DATE,
+            fmea_entry_id INTEGER,
+            created_by INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (fmea_entry_id) REFERENCES fmea_entries (id),
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''')
+
+
+ACTION_DETAIL_COLUMNS = [
+    ('empfohlene_abstellmassnahmen', 'TEXT'),
+    ('ausfuehrung_durch', 'TEXT'),
+    ('verbesserter_zustand', 'TEXT'),
+    ('verantwortlicher_name', 'TEXT'),
+    ('datum_bis', 'DATE'),
+    ('getroffene_massnahme', 'TEXT'),
+    ('umgesetzt_am', 'DATE'),
+    ('umgesetzt_durch', 'TEXT'),
+    ('neue_auftretenswahrscheinlichkeit', 'INTEGER'),
+    ('neues_auftreten', 'INTEGER'),
+    ('neue_entdeckung', 'INTEGER'),
+    ('neue_rpz', 'INTEGER')
+]
+
+
+def _add_action_details(conn):
+    # Extended action fields used by streamlit_app1.py
+    existing_columns = get_columns(conn, 'actions')
+    for column_name, column_type in ACTION_DETAIL_COLUMNS:
+        if column_name not in existing_columns:
+            conn.execute(f"ALTER TABLE actions ADD COLUMN {column_name} {column_type}")
+
+
+MIGRATIONS = [
+    _create_tables,
+    _add_action_details,
+    lambda conn: ensure_risk_columns(conn, 'fmea_entries'),
+    lambda conn: ensure_statistics(conn, 'fmea_entries'),
+    lambda conn: ensure_fulltext(conn, 'fmea_entries'),
+    lambda conn: ensure_rating_counts(conn, 'fmea_entries'),
+    lambda conn: ensure_action_priority(conn, 'fmea_entries'),
+    lambda conn: ensure_sync(conn, 'fmea_entries'),
+    lambda conn: ensure_sync(conn, 'actions'),
+    lambda conn: ensure_action_entry_index(conn, 'actions'),
+    # Databases where step 5 found no FTS5 were moved past it; retry it (pending from now on if it fails)
+    lambda conn: ensure_fulltext(conn, 'fmea_entries'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FMEA database maintenance')
+    parser.add_argument('command', choices=['check-statistics'])
+    parser.add_argument('--database', default='fmea.db')
+    parser.add_argument('--table', default='fmea_entries')
+    parser.add_argument('--repair', action='store_true', help='rebuild the summary table on mismatch')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    try:
+        differences = check_statistics(conn, args.table, repair=args.repair)
+    finally:
+        conn.close()
+
+    for risk_level, status, live, expected in differences:
+        print(f"{risk_level}/{status}: live={live} expected={expected}")
+    if not differences:
+        print("Statistics are consistent.")
+    elif args.repair:
+        print("Statistics rebuilt.")
+    return 1 if differences and not args.repair else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
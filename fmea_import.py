@@ -0,0 +1,156 @@
+# fmea_import.py
+"""Bulk import of FMEA entries from CSV/XLSX files in the export_csv layout"""
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+import fmea_db
+
+# Export header -> column; RPN is derived from the ratings and ignored on import
+IMPORT_COLUMNS = {
+    'Funktion': 'function',
+    'Fehlerart': 'failure_mode',
+    'Fehlerfolge': 'failure_effect',
+    'Auftretenswahrscheinlichkeit': 'severity',
+    'Fehlerursache': 'failure_cause',
+    'Auftreten': 'occurrence',
+    'Prüfmaßnahme': 'test_method',
+    'Entdeckung': 'detection',
+    'Maßnahmen': 'actions',
+    'Status': 'status',
+    'Erstellt am': 'created_at'
+}
+OPTIONAL_HEADERS = {'Maßnahmen', 'Status', 'Erstellt am'}
+TEXT_COLUMNS = ['function', 'failure_mode', 'failure_effect', 'failure_cause', 'test_method']
+RATING_COLUMNS = ['severity', 'occurrence', 'detection']
+HEADER_NAMES = {column: header for header, column in IMPORT_COLUMNS.items()}
+
+INSERT_COLUMNS = ['function', 'failure_mode', 'failure_effect', 'severity', 'failure_cause', 'occurrence',
+                  'test_method', 'detection', 'actions', 'status', 'created_by', 'created_at', 'updated_at']
+
+CHUNK_SIZE = 5000
+
+
+def read_chunks(source, filename: str, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read a CSV or XLSX file as string DataFrames of at most chunk_size rows"""
+    if filename.lower().endswith('.xlsx'):
+        yield from _read_xlsx_chunks(source, chunk_size)
+    else:
+        yield from pd.read_csv(source, sep=';', dtype=str, keep_default_na=False,
+                               encoding='utf-8-sig', chunksize=chunk_size)
+
+
+def _read_xlsx_chunks(source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else '' for value in next(rows, ())]
+
+        chunk = []
+        for row in rows:
+            chunk.append(['' if value is None else str(value) for value in row[:len(header)]])
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def check_headers(columns) -> List[str]:
+    """Return the required export headers missing from a file"""
+    present = {str(column).strip() for column in columns}
+    return [header for header in IMPORT_COLUMNS if header not in present and header not in OPTIONAL_HEADERS]
+
+
+def validate_chunk(chunk: pd.DataFrame, first_row: int):
+    """Validate a chunk column-wise; returns (valid rows as DataFrame, per-row errors)"""
+    chunk = chunk.rename(columns=lambda column: IMPORT_COLUMNS.get(str(column).strip(), column))
+    for column in ('actions', 'status', 'created_at'):
+        if column not in chunk:
+            chunk[column] = ''
+    chunk = chunk.reset_index(drop=True)
+
+    checks = {}
+    for column in TEXT_COLUMNS:
+        chunk[column] = chunk[column].str.strip()
+        checks[f"{HEADER_NAMES[column]} fehlt"] = (chunk[column] == '').to_numpy()
+
+    for column in RATING_COLUMNS:
+        values = pd.to_numeric(chunk[column].str.strip(), errors='coerce')
+        # NaN fails between(), so non-numeric values are caught here too
+        checks[f"{HEADER_NAMES[column]} muss eine ganze Zahl von 1 bis 10 sein"] = \
+            (~values.between(1, 10) | (values % 1 != 0)).to_numpy()
+        chunk[column] = values
+
+    status = chunk['status'].str.strip().replace('', 'Offen')
+    checks["Ungültiger Status"] = (~status.isin(list(fmea_db.STATUS_KEYS))).to_numpy()
+    chunk['status'] = status
+
+    raw_dates = chunk['created_at'].str.strip()
+    created_at = pd.to_datetime(raw_dates, errors='coerce', format='ISO8601')
+    checks["Ungültiges Datum in 'Erstellt am'"] = (created_at.isna() & (raw_dates != '')).to_numpy()
+    chunk['created_at'] = created_at
+
+    messages = list(checks)
+    failed = np.column_stack([checks[message] for message in messages])
+    invalid = failed.any(axis=1)
+
+    errors = [
+        {'row': first_row + int(index), 'errors': [messages[i] for i in np.flatnonzero(failed[index])]}
+        for index in np.flatnonzero(invalid)
+    ]
+    return chunk[~invalid], errors
+
+
+def import_entries(conn, table: str, source, filename: str, created_by: int,
+                   chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Validate and insert entries chunk by chunk, one transaction per chunk; returns a report"""
+    start = time.perf_counter()
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+    first_row = 2  # row 1 is the header
+    # Entries without 'Erstellt am' count as created now; updated_at is always the import time so
+    # delta sync picks the rows up
+    now = fmea_db.db_timestamp(datetime.utcnow())
+
+    sql = f"INSERT INTO {table} ({', '.join(INSERT_COLUMNS)}) VALUES ({', '.join('?' * len(INSERT_COLUMNS))})"
+
+    for chunk in read_chunks(source, filename, chunk_size):
+        if first_row == 2:
+            missing = check_headers(chunk.columns)
+            if missing:
+                raise ValueError(f"Fehlende Spalten: {', '.join(missing)}")
+
+        valid, errors = validate_chunk(chunk, first_row)
+        first_row += len(chunk)
+        report['failed'] += len(errors)
+        report['errors'].extend(errors)
+        if valid.empty:
+            continue
+
+        created_at = valid['created_at'].dt.strftime(fmea_db.DB_TIMESTAMP_FORMAT).fillna(now)
+        rows = zip(
+            valid['function'], valid['failure_mode'], valid['failure_effect'],
+            valid['severity'].astype(int).tolist(), valid['failure_cause'],
+            valid['occurrence'].astype(int).tolist(), valid['test_method'],
+            valid['detection'].astype(int).tolist(), valid['actions'], valid['status'],
+            [created_by] * len(valid), created_at, [now] * len(valid)
+        )
+
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(sql, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        report['imported'] += len(valid)
+
+    report['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return report
@@ -0,0 +1,271 @@
+# fmea_loadtest.py
+"""Local HTTP load test: concurrent logged-in clients drive mixed traffic against a Flask test server"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+import fmea_synthetic
+
+ACCOUNTS = [('admin', 'admin123'), ('user', 'user123')]
+# Route -> share of the traffic mix; 'entries' is the dashboard's filtered list as JSON
+TRAFFIC_MIX = {'entries': 50, 'statistics': 20, 'edit_entry': 15, 'add_entry': 10, 'export_csv': 5}
+SEARCH_TERMS = ['Motor', 'Bremse', 'Überhitzung', 'Dichtung', 'Sensor', 'Linie 2', 'Leckage']
+RISK_LEVELS = ['high', 'medium', 'low']
+PRIORITIES = ['H', 'M', 'L']
+PERCENTILES = (50, 95, 99)
+FORM_POOL_SIZE = 500
+MAX_ERROR_RATE = 0.01  # share of failed requests above which the run fails
+# Routes answered directly; the form posts answer with a redirect
+DIRECT_ROUTES = {'entries', 'statistics', 'export_csv'}
+
+
+def random_filters(rng: random.Random) -> Dict[str, str]:
+    """A dashboard/export filter combination as an engineer would set it"""
+    filters = {}
+    if rng.random() < 0.3:
+        filters['search'] = rng.choice(SEARCH_TERMS)
+    if rng.random() < 0.3:
+        filters['risk_filter'] = rng.choice(RISK_LEVELS)
+    if rng.random() < 0.3:
+        filters['status_filter'] = rng.choice(fmea_synthetic.STATUSES)
+    if rng.random() < 0.2:
+        filters['priority_filter'] = rng.choice(PRIORITIES)
+    return filters
+
+
+class Client:
+    """One simulated engineer with its own keep-alive connection and session cookie"""
+
+    def __init__(self, host: str, port: int, account: Tuple[str, str], seed: int, entry_ids: List[int]):
+        self.connection = http.client.HTTPConnection(host, port, timeout=60)
+        self.account = account
+        self.rng = random.Random(seed)
+        self.entry_ids = entry_ids
+        self.cookie = ''
+        self.location = None  # Location header of the last response
+        forms = fmea_synthetic.generate_entries(np.random.default_rng(seed), FORM_POOL_SIZE, 0, datetime.now())
+        self.forms = [{column: str(forms[column][i] if forms[column][i] is not None else '')
+                       for column in ('function', 'failure_mode', 'failure_effect', 'severity', 'failure_cause',
+                                      'occurrence', 'test_method', 'detection', 'actions', 'status')}
+                      for i in range(FORM_POOL_SIZE)]
+
+    def request(self, method: str, path: str, form: Dict[str, str] = None) -> int:
+        headers = {'Cookie': self.cookie} if self.cookie else {}
+        body = None
+        if form is not None:
+            body = urllib.parse.urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        response.read()
+        self.location = response.getheader('Location')
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status
+
+    def redirected_to_login(self, status: int) -> bool:
+        return 300 <= status < 400 and urllib.parse.urlsplit(self.location or '').path == '/login'
+
+    def login(self):
+        username, password = self.account
+        status = self.request('POST', '/login', {'username': username, 'password': password})
+        # A failed login renders the form again (or fails); it sets a cookie too, for the flash message
+        if status != 302 or self.redirected_to_login(status):
+            raise RuntimeError(f'Login failed for {username} (HTTP {status})')
+
+    def succeeded(self, route: str, status: int) -> bool:
+        """Whether a response counts as a success; a redirect to the login page means the session is gone"""
+        if route in DIRECT_ROUTES:
+            return 200 <= status < 300
+        return 200 <= status < 400 and not self.redirected_to_login(status)
+
+    def run(self, route: str) -> int:
+        if route == 'entries':
+            return self.request('GET', '/api/entries?' + urllib.parse.urlencode(random_filters(self.rng)))
+        if route == 'statistics':
+            return self.request('GET', '/api/statistics')
+        if route == 'add_entry':
+            return self.request('POST', '/add_entry', self.rng.choice(self.forms))
+        if route == 'edit_entry':
+            return self.request('POST', f'/edit_entry/{self.rng.choice(self.entry_ids)}', self.rng.choice(self.forms))
+        if route == 'export_csv':
+            return self.request('GET', '/export_csv?' + urllib.parse.urlencode(random_filters(self.rng)))
+        raise ValueError(f'Unknown route: {route}')
+
+
+def start_server(app, host: str = '127.0.0.1', port: int = 0):
+    """Serve the app from a background thread (threaded werkzeug server with keep-alive); returns the server"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class RequestHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(host, port, app, threaded=True, request_handler=RequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_load(host: str, port: int, entry_ids: List[int], concurrency: int, duration: float,
+             warmup: float = 0, mix: Dict[str, int] = None, seed: int = 0) -> Dict[str, Any]:
+    """Drive the traffic mix from concurrent clients; returns per-route throughput and latency percentiles"""
+    mix = mix or TRAFFIC_MIX
+    routes, weights = list(mix), list(mix.values())
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    samples: List[Tuple[str, float, bool]] = []
+    lock = threading.Lock()
+    failures: List[str] = []
+
+    def worker(index: int):
+        client = Client(host, port, ACCOUNTS[index % len(ACCOUNTS)], seed + index, entry_ids)
+        local = []
+        try:
+            client.login()
+            while True:
+                route = client.rng.choices(routes, weights)[0]
+                begin = time.perf_counter()
+                if begin >= deadline:
+                    break
+                try:
+                    ok = client.succeeded(route, client.run(route))
+                except (OSError, http.client.HTTPException):
+                    client.connection.close()
+                    ok = False
+                if begin >= measure_from:
+                    local.append((route, time.perf_counter() - begin, ok))
+        except Exception as e:
+            with lock:
+                failures.append(f'{client.account[0]}: {e}')
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = max(time.perf_counter() - measure_from, 1e-9)
+
+    errors = sum(1 for sample in samples if not sample[2])
+    report = {'concurrency': concurrency, 'duration_s': round(elapsed, 1), 'routes': {}, 'failures': failures,
+              'error_rate': round(errors / len(samples), 4) if samples else 0.0}
+    for route in routes + ['total']:
+        selected = [sample for sample in samples if route == 'total' or sample[0] == route]
+        if not selected:
+            continue
+        latencies = np.array([sample[1] for sample in selected]) * 1000
+        percentiles = np.percentile(latencies, PERCENTILES)
+        report['routes'][route] = {
+            'requests': len(selected),
+            'errors': sum(1 for sample in selected if not sample[2]),
+            'throughput': round(len(selected) / elapsed, 1),
+            'mean_ms': round(float(latencies.mean()), 1),
+            **{f'p{p}_ms': round(float(value), 1) for p, value in zip(PERCENTILES, percentiles)},
+            'max_ms': round(float(latencies.max()), 1)
+        }
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    columns = ['requests', 'errors', 'throughput'] + [f'p{p}_ms' for p in PERCENTILES] + ['mean_ms', 'max_ms']
+    lines = [f"{report['concurrency']} clients, {report['duration_s']} s",
+             f"{'route':<12}" + ''.join(f'{column:>12}' for column in columns)]
+    for route, stats in report['routes'].items():
+        lines.append(f'{route:<12}' + ''.join(f'{stats[column]:>12}' for column in columns))
+    lines.append(f"Error rate: {report['error_rate']:.2%}")
+    lines.extend(f'Client failed: {failure}' for failure in report['failures'])
+    return '\n'.join(lines)
+
+
+def passed(report: Dict[str, Any], max_error_rate: float = MAX_ERROR_RATE) -> bool:
+    """True if every client ran, some requests were measured and the error rate stays within the limit"""
+    return not report['failures'] and 'total' in report['routes'] and report['error_rate'] <= max_error_rate
+
+
+def generate_database(rows: int, seed: int):
+    """Fill the Flask app's (empty) database with the demo users and synthetic data"""
+    import flask_app
+
+    with flask_app.app.app_context():
+        flask_app.init_db()
+        admin = flask_app.User.query.filter_by(username='admin').first()
+        conn = flask_app.db.engine.raw_connection()
+        try:
+            fmea_synthetic.populate(conn, flask_app.FMEAEntry.__tablename__, flask_app.Action.__tablename__,
+                                    rows, admin.id, seed)
+        finally:
+            conn.close()
+        flask_app.db.session.remove()
+        flask_app.db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Flask app against a generated database')
+    parser.add_argument('--rows', default='100k', help='1k, 100k, 1m or a row count')
+    parser.add_argument('--seed', type=int, default=fmea_synthetic.DEFAULT_SEED)
+    parser.add_argument('--database', help='generated database to reuse (default: in the temp directory)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds before measuring')
+    parser.add_argument('--max-error-rate', type=float, default=MAX_ERROR_RATE,
+                        help='fail if more than this share of requests gets no 2xx/3xx response')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    rows = fmea_synthetic.parse_size(args.rows)
+    template = args.database or os.path.join(tempfile.gettempdir(), f'fmea-loadtest-{args.rows}-seed{args.seed}.db')
+    # The run adds and edits entries, so it works on a copy of the generated database
+    database = os.path.join(tempfile.mkdtemp(prefix='fmea-loadtest-'), 'fmea.db')
+    os.environ['FMEA_DATABASE_URL'] = f'sqlite:///{database}'
+
+    if os.path.exists(template):
+        shutil.copyfile(template, database)
+    else:
+        generate_database(rows, args.seed)
+        shutil.copyfile(database, template)
+
+    import flask_app
+
+    with flask_app.app.app_context():
+        flask_app.migrate_db()
+    conn = sqlite3.connect(database)
+    try:
+        entry_ids = [row[0] for row in conn.execute(f"SELECT id FROM {flask_app.FMEAEntry.__tablename__}")]
+    finally:
+        conn.close()
+
+    server = start_server(flask_app.app)
+    try:
+        report = run_load(server.host, server.port, entry_ids, args.concurrency, args.duration, args.warmup,
+                          seed=args.seed)
+    finally:
+        server.shutdown()
+        shutil.rmtree(os.path.dirname(database), ignore_errors=True)
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if not passed(report, args.max_error_rate):
+        print(f'Load test failed (error rate limit {args.max_error_rate:.2%})', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# fmea_priority.py
+"""AIAG-VDA Action Priority (H/M/L) as a precomputed severity x occurrence x detection lookup"""
+from functools import lru_cache
+from itertools import product
+
+ACTION_PRIORITIES = ('H', 'M', 'L')
+ACTION_PRIORITY_LABELS = {'H': 'Hoch', 'M': 'Mittel', 'L': 'Niedrig'}
+
+# Rating (1..10) -> band index used by the handbook table below
+SEVERITY_BANDS = (0, 1, 1, 2, 2, 2, 3, 3, 4, 4)      # 1 | 2-3 | 4-6 | 7-8 | 9-10
+OCCURRENCE_BANDS = (0, 1, 1, 2, 2, 3, 3, 4, 4, 4)    # 1 | 2-3 | 4-5 | 6-7 | 8-10
+DETECTION_BANDS = (0, 1, 1, 1, 2, 2, 3, 3, 3, 3)     # 1 | 2-4 | 5-6 | 7-10
+
+# AIAG-VDA FMEA handbook (2019) AP table: [severity band][occurrence band] -> detection bands 1, 2-4, 5-6, 7-10
+AP_TABLE = (
+    # S = 1
+    ('LLLL', 'LLLL', 'LLLL', 'LLLL', 'LLLL'),
+    # S = 2-3
+    ('LLLL', 'LLLL', 'LLLL', 'LLLL', 'LLMM'),
+    # S = 4-6
+    ('LLLL', 'LLLL', 'LLLM', 'LMMM', 'MMHH'),
+    # S = 7-8
+    ('LLLL', 'LLMM', 'MMMH', 'MHHH', 'HHHH'),
+    # S = 9-10
+    ('LLLL', 'LLMH', 'MHHH', 'HHHH', 'HHHH'),
+)
+
+# Full 10x10x10 lookup flattened into a string, at (severity - 1) * 100 + (occurrence - 1) * 10 + detection - 1,
+# so SQLite can compute the column without branching
+ACTION_PRIORITY_LOOKUP = ''.join(AP_TABLE[SEVERITY_BANDS[s]][OCCURRENCE_BANDS[o]][DETECTION_BANDS[d]]
+                                 for s, o, d in product(range(10), repeat=3))
+ACTION_PRIORITY_EXPRESSION = (f"substr('{ACTION_PRIORITY_LOOKUP}', "
+                              f"(severity - 1) * 100 + (occurrence - 1) * 10 + detection, 1)")
+
+
+@lru_cache(maxsize=None)
+def action_priority_table():
+    """The lookup as a 10x10x10 numpy array, indexed by [severity - 1, occurrence - 1, detection - 1]"""
+    import numpy as np  # only needed for lookups on arrays; the schema uses the string above
+    return np.array(list(ACTION_PRIORITY_LOOKUP)).reshape(10, 10, 10)
+
+
+def action_priority(severity, occurrence, detection):
+    """Look up the Action Priority for scalars or whole numpy arrays of ratings (1..10)"""
+    import numpy as np
+    return action_priority_table()[np.asarray(severity) - 1, np.asarray(occurrence) - 1, np.asarray(detection) - 1]
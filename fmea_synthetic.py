@@ -0,0 +1,286 @@
+# fmea_synthetic.py
+"""Seeded synthetic FMEA entries and actions with German text and skewed ratings, for benchmarks and load tests"""
+import argparse
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+
+import fmea_db
+import fmea_priority
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+CHUNK_SIZE = 10_000
+DEFAULT_SEED = 42
+HISTORY_DAYS = 3 * 365
+
+# (function, base severity, failure modes, causes, effects, test methods); functions are drawn Zipf-like
+COMPONENTS = [
+    ('Motor starten', 7,
+     ['Motor startet nicht', 'Motor startet verzögert', 'Motor läuft unrund'],
+     ['Defekte Zündkerze', 'Leere Batterie', 'Korrodierter Steckverbinder', 'Fehlerhafte Steuergerät-Software'],
+     ['Produktionsausfall', 'Stillstand der Linie', 'Verzögerte Auslieferung'],
+     ['Spannungsmessung', 'Funktionstest am Prüfstand', 'Visuelle Prüfung']),
+    ('Bremssystem', 9,
+     ['Bremsen versagen', 'Bremsweg zu lang', 'Bremse blockiert'],
+     ['Verschlissene Bremsbeläge', 'Leckage im Hydrauliksystem', 'Luft im Bremskreis', 'Falsches Anzugsmoment'],
+     ['Sicherheitsrisiko, mögliche Unfälle', 'Verletzungsgefahr für Bediener', 'Rückrufaktion'],
+     ['Bremstest', 'Dichtheitsprüfung', 'Regelmäßige Inspektion']),
+    ('Temperaturregelung', 6,
+     ['Überhitzung', 'Temperatur schwankt', 'Kühlung fällt aus'],
+     ['Defekter Temperatursensor', 'Verstopfter Filter', 'Lüfter ausgefallen', 'Falsche Kalibrierung'],
+     ['Komponentenschäden', 'Systemausfall', 'Verkürzte Lebensdauer'],
+     ['Temperaturüberwachung', 'Sensorkalibrierung', 'Thermografie']),
+    ('Förderband antreiben', 5,
+     ['Band läuft schief', 'Band reißt', 'Antrieb blockiert'],
+     ['Verschlissene Rollen', 'Falsche Bandspannung', 'Fremdkörper im Antrieb'],
+     ['Materialstau', 'Taktzeitverlust', 'Beschädigte Bauteile'],
+     ['Sichtprüfung', 'Schwingungsanalyse', 'Spannungsmessung am Band']),
+    ('Schweißnaht herstellen', 8,
+     ['Naht porös', 'Naht unvollständig', 'Verzug am Bauteil'],
+     ['Falscher Schweißstrom', 'Verunreinigte Oberfläche', 'Abgenutzte Elektrode', 'Schutzgas fehlt'],
+     ['Bauteilbruch im Feld', 'Nacharbeit erforderlich', 'Kundenreklamation'],
+     ['Ultraschallprüfung', 'Schliffbild', 'Zerstörende Stichprobe']),
+    ('Dichtung montieren', 6,
+     ['Dichtung fehlt', 'Dichtung verdreht', 'Dichtung beschädigt'],
+     ['Unklare Arbeitsanweisung', 'Fehlende Poka-Yoke-Vorrichtung', 'Scharfe Kanten am Gehäuse'],
+     ['Ölverlust', 'Feuchtigkeit im Gehäuse', 'Garantiefall'],
+     ['Dichtheitsprüfung', 'Kamerasystem', 'Werkerselbstprüfung']),
+    ('Schraubverbindung anziehen', 7,
+     ['Drehmoment zu niedrig', 'Schraube fehlt', 'Gewinde beschädigt'],
+     ['Schrauber falsch eingestellt', 'Falsche Schraube bereitgestellt', 'Verschmutztes Gewinde'],
+     ['Lösen der Verbindung', 'Klappergeräusche', 'Funktionsausfall'],
+     ['Drehmomentüberwachung', 'Stichprobenprüfung', 'Zählung am Arbeitsplatz']),
+    ('Sensorsignal auswerten', 7,
+     ['Signal fehlt', 'Signal verrauscht', 'Falscher Messwert'],
+     ['Kabelbruch', 'EMV-Störung', 'Sensor verschmutzt', 'Softwarefehler'],
+     ['Fehlsteuerung der Anlage', 'Falscher Alarm', 'Qualitätsabweichung'],
+     ['Signalsimulation', 'Plausibilitätsprüfung', 'End-of-Line-Test']),
+    ('Lackierung auftragen', 4,
+     ['Schichtdicke zu gering', 'Läufer im Lack', 'Farbabweichung'],
+     ['Düse verstopft', 'Falsche Viskosität', 'Luftfeuchtigkeit zu hoch'],
+     ['Korrosion', 'Optischer Mangel', 'Nacharbeit'],
+     ['Schichtdickenmessung', 'Farbmessung', 'Sichtprüfung unter Normlicht']),
+    ('Software aktualisieren', 6,
+     ['Update bricht ab', 'Falsche Version geflasht', 'Parameter verloren'],
+     ['Verbindungsabbruch', 'Fehlende Versionsprüfung', 'Speicher voll'],
+     ['Steuergerät nicht betriebsbereit', 'Funktionseinschränkung', 'Servicebesuch nötig'],
+     ['Prüfsummenvergleich', 'Versionsabfrage', 'Regressionstest']),
+    ('Hydraulikdruck halten', 8,
+     ['Druckabfall', 'Druckspitzen', 'Pumpe fördert nicht'],
+     ['Undichte Leitung', 'Defektes Druckbegrenzungsventil', 'Verschmutztes Öl'],
+     ['Maschinenstillstand', 'Unkontrollierte Bewegung', 'Ölaustritt'],
+     ['Druckmessung', 'Ölanalyse', 'Dichtheitsprüfung']),
+    ('Bauteil verpacken', 3,
+     ['Falsche Stückzahl', 'Etikett fehlt', 'Transportschaden'],
+     ['Zählwaage falsch kalibriert', 'Drucker ohne Etiketten', 'Ungeeignetes Verpackungsmaterial'],
+     ['Kundenreklamation', 'Fehllieferung', 'Nachlieferung'],
+     ['Wiegekontrolle', 'Barcode-Scan', 'Stichprobe im Warenausgang']),
+]
+AREAS = ['Linie 1', 'Linie 2', 'Linie 3', 'Montage Nord', 'Montage Süd', 'Lackiererei', 'Rohbau',
+         'Endmontage', 'Prüffeld', 'Logistik', 'Werk Leipzig', 'Werk Bremen']
+MEASURES = ['Prüfplan anpassen', 'Poka-Yoke-Vorrichtung einführen', 'Wartungsintervall verkürzen',
+            'Schulung durchführen', 'Lieferant auditieren', 'Konstruktion ändern', 'Sensor nachrüsten',
+            'Arbeitsanweisung überarbeiten', 'Ersatzteile bevorraten', 'Redundanz vorsehen']
+PEOPLE = ['Anna Schmidt', 'Jonas Müller', 'Lea Weber', 'Felix Wagner', 'Marie Becker', 'Paul Hoffmann',
+          'Sophie Schulz', 'Lukas Koch', 'Hannah Richter', 'Tim Klein']
+STATUSES = ['Offen', 'In Bearbeitung', 'Abgeschlossen']
+ACTION_PRIORITIES = {'H': 'Hoch', 'M': 'Mittel', 'L': 'Niedrig'}
+
+# Skewed rating distributions (index 0 = rating 1): most causes are rare, detection is mostly mediocre
+OCCURRENCE_WEIGHTS = np.array([18, 20, 17, 13, 10, 8, 6, 4, 2.5, 1.5]) / 100
+DETECTION_WEIGHTS = np.array([5, 9, 13, 15, 15, 14, 11, 9, 6, 3]) / 100
+SEVERITY_OFFSETS = np.array([-3, -2, -1, 0, 1, 2])
+SEVERITY_OFFSET_WEIGHTS = np.array([5, 15, 30, 30, 15, 5]) / 100
+
+ENTRY_COLUMNS = ['function', 'failure_mode', 'failure_effect', 'severity', 'failure_cause', 'occurrence',
+                 'test_method', 'detection', 'actions', 'status', 'created_by', 'created_at', 'updated_at']
+ACTION_COLUMNS = ['title', 'description', 'assigned_to', 'priority', 'status', 'due_date', 'fmea_entry_id',
+                  'created_by', 'created_at', 'updated_at']
+# Extended action fields (streamlit_app1.py), filled where the schema has them
+ACTION_DETAIL_COLUMNS = ['empfohlene_abstellmassnahmen', 'verantwortlicher_name', 'datum_bis',
+                         'getroffene_massnahme', 'umgesetzt_am', 'umgesetzt_durch', 'neues_auftreten',
+                         'neue_entdeckung', 'neue_rpz']
+
+
+def parse_size(size) -> int:
+    """Accept 1k/100k/1m or a plain row count"""
+    return SIZES.get(str(size).lower()) or int(size)
+
+
+def _pick(rng: np.random.Generator, values: List[str], count: int) -> np.ndarray:
+    return np.array(values, dtype=object)[rng.integers(0, len(values), count)]
+
+
+def _format_timestamps(values: np.ndarray) -> np.ndarray:
+    # Same text as fmea_db.DB_TIMESTAMP_FORMAT, so cursors and sync tokens compare correctly
+    return np.char.replace(np.datetime_as_string(values, unit='us'), 'T', ' ').astype(object)
+
+
+def generate_entries(rng: np.random.Generator, count: int, created_by: int, now: datetime) -> Dict[str, np.ndarray]:
+    """Generate one chunk of entries as column arrays"""
+    ranks = np.arange(1, len(COMPONENTS) + 1)
+    component_weights = 1 / ranks ** 1.1
+    component = rng.choice(len(COMPONENTS), count, p=component_weights / component_weights.sum())
+    area = rng.zipf(1.6, count) % len(AREAS)
+
+    base_severity = np.array([c[1] for c in COMPONENTS])[component]
+    severity = np.clip(base_severity + rng.choice(SEVERITY_OFFSETS, count, p=SEVERITY_OFFSET_WEIGHTS), 1, 10)
+    occurrence = rng.choice(np.arange(1, 11), count, p=OCCURRENCE_WEIGHTS)
+    detection = rng.choice(np.arange(1, 11), count, p=DETECTION_WEIGHTS)
+
+    # Older entries are more likely to be closed
+    age_days = rng.integers(0, HISTORY_DAYS, count)
+    age = age_days / HISTORY_DAYS
+    closed = rng.random(count) < 0.15 + 0.6 * age
+    in_progress = ~closed & (rng.random(count) < 0.4)
+    status = np.where(closed, STATUSES[2], np.where(in_progress, STATUSES[1], STATUSES[0]))
+
+    now = np.datetime64(now, 's')
+    created_at = now - (age_days * 86400 + rng.integers(0, 86400, count)).astype('timedelta64[s]')
+    updated_at = np.minimum(created_at + (rng.integers(0, 60, count) * 86400).astype('timedelta64[s]'), now)
+
+    def text(field: int, second: bool = False) -> np.ndarray:
+        values = np.empty(count, dtype=object)
+        for index, parts in enumerate(COMPONENTS):
+            mask = component == index
+            options = np.array(parts[field], dtype=object)
+            choices = rng.integers(0, len(options), int(mask.sum()))
+            values[mask] = options[choices]
+            if second:
+                # A different second value of the same component, e.g. a combined failure cause
+                values[mask] = [f'{first}, {other}' for first, other in
+                                zip(values[mask], options[(choices + 1) % len(options)])]
+        return values
+
+    functions = np.array([f'{COMPONENTS[c][0]} ({AREAS[a]})' for c, a in zip(component, area)], dtype=object)
+    return {
+        'function': functions,
+        'failure_mode': text(2),
+        'failure_effect': text(4),
+        'severity': severity,
+        'failure_cause': np.where(rng.random(count) < 0.3, text(3, second=True), text(3)),
+        'occurrence': occurrence,
+        'test_method': text(5),
+        'detection': detection,
+        'actions': np.where(rng.random(count) < 0.6, _pick(rng, MEASURES, count), None),
+        'status': status,
+        'created_by': np.full(count, created_by),
+        'created_at': _format_timestamps(created_at),
+        'updated_at': _format_timestamps(updated_at)
+    }
+
+
+def generate_actions(rng: np.random.Generator, entries: Dict[str, np.ndarray], entry_ids: np.ndarray,
+                     created_by: int, detail_columns: List[str]) -> List[tuple]:
+    """Generate actions for a chunk of inserted entries; high-priority entries get more of them"""
+    priority = fmea_priority.action_priority(entries['severity'], entries['occurrence'], entries['detection'])
+    rate = np.select([priority == 'H', priority == 'M'], [1.5, 0.8], 0.2)
+    per_entry = rng.poisson(rate)
+    index = np.repeat(np.arange(len(entry_ids)), per_entry)
+    count = len(index)
+
+    created = np.array(entries['created_at'][index].tolist(), dtype='datetime64[s]')
+    created_day = created.astype('datetime64[D]')
+    due = created_day + rng.integers(14, 120, count).astype('timedelta64[D]')
+    done_on = np.minimum(due, created_day + np.timedelta64(30, 'D'))
+    created, due, done_on = _format_timestamps(created), due.astype(str), done_on.astype(str)
+    measures = _pick(rng, MEASURES, count)
+    people = _pick(rng, PEOPLE, count)
+    done = (entries['status'][index] == STATUSES[2]) | (rng.random(count) < 0.2)
+    status = np.where(done, STATUSES[2], np.where(rng.random(count) < 0.5, STATUSES[1], STATUSES[0]))
+    # Mostly follows the Action Priority, sometimes set by hand
+    labels = np.array([ACTION_PRIORITIES[value] for value in priority[index]], dtype=object)
+    labels = np.where(rng.random(count) < 0.15, _pick(rng, list(ACTION_PRIORITIES.values()), count), labels)
+    new_occurrence = np.maximum(1, entries['occurrence'][index] - rng.integers(0, 4, count))
+    new_detection = np.maximum(1, entries['detection'][index] - rng.integers(0, 4, count))
+
+    rows = []
+    for i in range(count):
+        entry = index[i]
+        description = f"{measures[i]} gegen {entries['failure_cause'][entry]}"
+        row = [f"{measures[i]}: {entries['failure_mode'][entry]}", description, people[i], labels[i], status[i],
+               due[i], int(entry_ids[entry]), created_by, created[i], entries['updated_at'][entry]]
+        details = {
+            'empfohlene_abstellmassnahmen': description,
+            'verantwortlicher_name': people[i],
+            'datum_bis': due[i]
+        }
+        if done[i]:
+            details.update({
+                'getroffene_massnahme': measures[i],
+                'umgesetzt_am': done_on[i],
+                'umgesetzt_durch': people[i],
+                'neues_auftreten': int(new_occurrence[i]),
+                'neue_entdeckung': int(new_detection[i]),
+                'neue_rpz': int(entries['severity'][entry] * new_occurrence[i] * new_detection[i])
+            })
+        rows.append(tuple(row + [details.get(column) for column in detail_columns]))
+    return rows
+
+
+def populate(conn, entry_table: str, action_table: str, rows: int, created_by: int,
+             seed: int = DEFAULT_SEED, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Insert synthetic entries and their actions, one transaction per chunk; same seed, same data"""
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    # Fixed reference date so a seed always produces the same timestamps
+    now = datetime(2025, 1, 1) + timedelta(days=seed % 365)
+    detail_columns = [column for column in ACTION_DETAIL_COLUMNS if column in fmea_db.get_columns(conn, action_table)]
+    action_columns = ACTION_COLUMNS + detail_columns
+
+    entry_sql = f"INSERT INTO {entry_table} ({', '.join(ENTRY_COLUMNS)}) VALUES ({', '.join('?' * len(ENTRY_COLUMNS))})"
+    action_sql = (f"INSERT INTO {action_table} ({', '.join(action_columns)}) "
+                  f"VALUES ({', '.join('?' * len(action_columns))})")
+
+    report = {'entries': 0, 'actions': 0}
+    for offset in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - offset)
+        entries = generate_entries(rng, count, created_by, now)
+        values = [entries[column].tolist() for column in ENTRY_COLUMNS]
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(entry_sql, zip(*values))
+            ids = conn.execute(f"SELECT id FROM {entry_table} ORDER BY id DESC LIMIT ?", (count,)).fetchall()
+            entry_ids = np.array([row[0] for row in reversed(ids)])
+            actions = generate_actions(rng, entries, entry_ids, created_by, detail_columns)
+            conn.executemany(action_sql, actions)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        report['entries'] += count
+        report['actions'] += len(actions)
+
+    report['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill a Streamlit FMEA database with synthetic entries and actions')
+    parser.add_argument('--database', default='fmea.db')
+    parser.add_argument('--rows', default='1k', help='1k, 100k, 1m or a row count')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--user', default='admin', help='owner of the generated entries')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    try:
+        fmea_db.run_migrations(conn, fmea_db.MIGRATIONS)
+        user = conn.execute("SELECT id FROM users WHERE username = ?", (args.user,)).fetchone()
+        if not user:
+            print(f"Unknown user: {args.user} (start the app once to create the default users)")
+            return 1
+        report = populate(conn, 'fmea_entries', 'actions', parse_size(args.rows), user[0], args.seed)
+    finally:
+        conn.close()
+
+    print(f"{report['entries']} entries, {report['actions']} actions in {report['duration_ms']} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
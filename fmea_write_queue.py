@@ -0,0 +1,156 @@
+# fmea_write_queue.py
+"""Single writer thread with group commit: queued writes share one transaction, each caller gets its own result"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Sequence
+
+MAX_BATCH = 100
+MAX_DELAY = 0.002  # seconds to wait for more writes after the first one of a batch
+LATENCY_WINDOW = 1000  # recent commits kept for the latency percentiles
+
+
+def connection_transaction(connect: Callable):
+    """Transaction factory for WriteQueue: BEGIN IMMEDIATE on connect() per batch, closed afterwards"""
+
+    @contextmanager
+    def transaction():
+        conn = connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            conn.close()
+
+    return transaction
+
+
+def percentiles(values: Sequence[float], points: Sequence[float]) -> List[float]:
+    """Linearly interpolated percentiles of a non-empty sample, as numpy.percentile computes them"""
+    ordered = sorted(values)
+    result = []
+    for point in points:
+        position = (len(ordered) - 1) * point / 100
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        result.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+    return result
+
+
+class WriteQueue:
+    """Runs submitted write functions on one thread, committing up to max_batch of them together.
+    transaction() must return a context manager yielding a connection in a write transaction that
+    commits on exit, e.g. fmea_db.ConnectionPool.write. on_commit(batch_size, seconds) is called after each
+    batch, e.g. to feed metrics."""
+
+    def __init__(self, transaction: Callable, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY,
+                 on_commit: Callable = None, name: str = 'fmea-writer'):
+        self.transaction = transaction
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.on_commit = on_commit
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._commit_seconds = deque(maxlen=LATENCY_WINDOW)
+        self._wait_seconds = deque(maxlen=LATENCY_WINDOW)
+        self.batches = 0
+        self.writes = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, function: Callable, *args) -> Future:
+        """Queue function(conn, *args); the future holds its return value or exception after the commit"""
+        future = Future()
+        self._queue.put((function, args, future, time.perf_counter()))
+        return future
+
+    def execute(self, function: Callable, *args, timeout: float = None) -> Any:
+        """Submit and wait; raises the write's own exception"""
+        return self.submit(function, *args).result(timeout)
+
+    def close(self):
+        """Finish the queued writes and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch = [job]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get(timeout=max(0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._commit(batch)
+                    return
+                batch.append(job)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        results = []
+        try:
+            with self.transaction() as conn:
+                for function, args, _, _ in batch:
+                    # A savepoint per write, so one failing write does not take the others with it
+                    conn.execute("SAVEPOINT queued_write")
+                    try:
+                        results.append((True, function(conn, *args)))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO queued_write")
+                        results.append((False, e))
+                    conn.execute("RELEASE queued_write")
+        except Exception as e:
+            if len(batch) > 1:
+                # BEGIN or COMMIT failed for the whole batch: retry one by one for individual results
+                for job in batch:
+                    self._commit([job])
+                return
+            results = [(False, e)]
+
+        done = time.perf_counter()
+        with self._lock:
+            self.batches += 1
+            self.writes += len(batch)
+            self.failures += sum(1 for ok, _ in results if not ok)
+            self._commit_seconds.append(done - start)
+            self._wait_seconds.extend(done - submitted for _, _, _, submitted in batch)
+        if self.on_commit is not None:
+            self.on_commit(len(batch), done - start)
+
+        for (_, _, future, _), (ok, value) in zip(batch, results):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, counters and recent commit/wait latency in ms"""
+        with self._lock:
+            commit = [seconds * 1000 for seconds in self._commit_seconds]
+            wait = [seconds * 1000 for seconds in self._wait_seconds]
+            stats = {'depth': self.depth(), 'batches': self.batches, 'writes': self.writes,
+                     'failures': self.failures,
+                     'mean_batch_size': round(self.writes / self.batches, 1) if self.batches else 0}
+        for name, values in (('commit', commit), ('wait', wait)):
+            p50, p95 = percentiles(values, [50, 95]) if values else (0, 0)
+            stats[f'{name}_p50_ms'] = round(float(p50), 2)
+            stats[f'{name}_p95_ms'] = round(float(p95), 2)
+        return stats
@@ -0,0 +1,160 @@
+# fmea_xlsx.py
+"""Excel export in the CSV layout, written row by row with a write-only workbook so memory stays flat"""
+from datetime import date, datetime
+from typing import Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+import fmea_db
+
+MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+BATCH_SIZE = 1000
+MAX_ROW = 1048576  # last row of an Excel sheet; formats cover the whole column
+
+# Excel column widths of the entry sheet, in the order of fmea_db.CSV_HEADERS
+ENTRY_WIDTHS = [30, 30, 40, 12, 40, 12, 30, 12, 8, 40, 16, 17]
+RPN_COLUMN = get_column_letter(fmea_db.CSV_HEADERS.index('RPN') + 1)
+# Fill colours of the risk bands, as in the dashboard: high, medium, low
+RISK_FILLS = {'high': 'F8CBAD', 'medium': 'FFE699', 'low': 'C6EFCE'}
+
+# (source column, header, width); the extended columns only exist in the Streamlit actions table
+ACTION_COLUMNS = [
+    ('id', 'ID', 8),
+    ('title', 'Titel', 30),
+    ('description', 'Beschreibung', 40),
+    ('assigned_to', 'Zugewiesen an', 20),
+    ('priority', 'Priorität', 12),
+    ('status', 'Status', 16),
+    ('due_date', 'Fälligkeitsdatum', 14),
+    ('empfohlene_abstellmassnahmen', 'Empfohlene Abstellmaßnahmen', 40),
+    ('ausfuehrung_durch', 'Ausführung durch', 20),
+    ('verbesserter_zustand', 'Verbesserter Zustand', 30),
+    ('verantwortlicher_name', 'Verantwortlicher', 20),
+    ('datum_bis', 'Datum bis', 14),
+    ('getroffene_massnahme', 'Getroffene Maßnahme', 40),
+    ('umgesetzt_am', 'Umgesetzt am', 14),
+    ('umgesetzt_durch', 'Umgesetzt durch', 20),
+    ('neue_auftretenswahrscheinlichkeit', 'Neue Auftretenswahrscheinlichkeit', 12),
+    ('neues_auftreten', 'Neues Auftreten', 12),
+    ('neue_entdeckung', 'Neue Entdeckung', 12),
+    ('neue_rpz', 'Neue RPZ', 10),
+    ('created_at', 'Erstellt am', 17),
+]
+DATE_COLUMNS = {'due_date', 'datum_bis', 'umgesetzt_am'}
+
+
+def _timestamp(value) -> Optional[datetime]:
+    # SQLite returns 'YYYY-MM-DD HH:MM:SS[.ffffff]' text; Excel gets a real date cell
+    return datetime.fromisoformat(value) if value else None
+
+
+def _date(value) -> Optional[date]:
+    return date.fromisoformat(value[:10]) if value else None
+
+
+def _start_sheet(workbook: Workbook, title: str, headers, widths):
+    sheet = workbook.create_sheet(title)
+    # Layout has to be set before the first row is written
+    for index, width in enumerate(widths, start=1):
+        sheet.column_dimensions[get_column_letter(index)].width = width
+    sheet.freeze_panes = 'A2'
+    bold = Font(bold=True)
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, header)
+        cell.font = bold
+        cells.append(cell)
+    sheet.append(cells)
+    return sheet
+
+
+def _finish_sheet(sheet, columns: int, rows: int):
+    sheet.auto_filter.ref = f'A1:{get_column_letter(columns)}{rows + 1}'
+
+
+def _write_entries(workbook: Workbook, conn, table: str, joins: str, where: str, params: list, order_by: str,
+                   batch_size: int):
+    sheet = _start_sheet(workbook, 'FMEA', fmea_db.CSV_HEADERS, ENTRY_WIDTHS)
+    for level, operator, formula in (('high', 'greaterThan', fmea_db.RPN_HIGH_THRESHOLD),
+                                     ('medium', 'greaterThan', fmea_db.RPN_MEDIUM_THRESHOLD),
+                                     ('low', 'lessThanOrEqual', fmea_db.RPN_MEDIUM_THRESHOLD)):
+        fill = PatternFill('solid', start_color=RISK_FILLS[level], end_color=RISK_FILLS[level])
+        sheet.conditional_formatting.add(f'{RPN_COLUMN}2:{RPN_COLUMN}{MAX_ROW}',
+                                         CellIsRule(operator=operator, formula=[str(formula)], fill=fill,
+                                                    stopIfTrue=True))
+
+    cursor = conn.execute(f'''
+        SELECT function, failure_mode, failure_effect, severity, failure_cause, occurrence,
+               test_method, detection, rpn, COALESCE(actions, ''), status, {table}.created_at
+        FROM {table}{joins}
+        WHERE 1=1{where}
+        ORDER BY {order_by}
+    ''', params)
+    count = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            sheet.append(row[:-1] + (_timestamp(row[-1]),))
+        count += len(rows)
+    _finish_sheet(sheet, len(fmea_db.CSV_HEADERS), count)
+
+
+def _write_actions(workbook: Workbook, conn, entry_table: str, action_table: str, entry_filter: Optional[str],
+                   params: list, batch_size: int):
+    existing = set(fmea_db.get_columns(conn, action_table))
+    columns = [column for column in ACTION_COLUMNS if column[0] in existing]
+    headers = [header for _, header, _ in columns]
+    headers.insert(1, 'FMEA Eintrag')
+    widths = [width for _, _, width in columns]
+    widths.insert(1, 40)
+    sheet = _start_sheet(workbook, 'Maßnahmen', headers, widths)
+
+    select = ', '.join(f'a.{source}' for source, _, _ in columns)
+    where = f'WHERE a.fmea_entry_id IN ({entry_filter})' if entry_filter else ''
+    cursor = conn.execute(f'''
+        SELECT {select}, e.id || ': ' || e.function || ' - ' || e.failure_mode
+        FROM {action_table} AS a
+        LEFT JOIN {entry_table} AS e ON e.id = a.fmea_entry_id
+        {where}
+        ORDER BY a.created_at DESC, a.id DESC
+    ''', params)
+    converters = [_date if source in DATE_COLUMNS else _timestamp if source == 'created_at' else None
+                  for source, _, _ in columns]
+    count = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            values = [convert(value) if convert else value for convert, value in zip(converters, row)]
+            values.insert(1, row[-1])
+            sheet.append(values)
+        count += len(rows)
+    _finish_sheet(sheet, len(headers), count)
+
+
+def write_workbook(conn, entry_table: str, action_table: str, output, search: str = '', risk_filter: str = '',
+                   status_filter: str = '', priority_filter: str = '', include_actions: bool = True,
+                   batch_size: int = BATCH_SIZE):
+    """Write the filtered entries (and the actions of those entries) as .xlsx to a path or binary file
+
+    Rows go straight from the cursor into the write-only sheets, which openpyxl buffers in temporary
+    files, so memory does not grow with the number of rows.
+    """
+    joins, where, params, order_by = fmea_db.entry_filter_sql(
+        conn, entry_table, search, risk_filter, status_filter, priority_filter)
+    workbook = Workbook(write_only=True)
+    _write_entries(workbook, conn, entry_table, joins, where, params, order_by, batch_size)
+    if include_actions:
+        # Without filters all actions are listed, including those without an entry
+        filtered = joins or where
+        entry_filter = f'SELECT {entry_table}.id FROM {entry_table}{joins} WHERE 1=1{where}' if filtered else None
+        _write_actions(workbook, conn, entry_table, action_table, entry_filter, params if filtered else [],
+                       batch_size)
+    workbook.save(output)
@@ -1,149 +1,90 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 from datetime import datetime, date
 import hashlib
 import io
 import csv
+import functools
+import os
 from typing import Optional, List, Dict, Any
+import fmea_analytics
+import fmea_arrow
+import fmea_batch
+import fmea_db
+import fmea_import
+import fmea_priority
+import fmea_write_queue
+import fmea_xlsx
 
 # Database setup
-DATABASE = 'fmea.db'
+DATABASE = os.environ.get('FMEA_DATABASE', 'fmea.db')
+SQLITE_POOL_SIZE = int(os.environ.get('FMEA_SQLITE_POOL_SIZE', 4))
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('FMEA_SQLITE_BUSY_TIMEOUT', 5000))  # ms
+SQLITE_CACHE_SIZE = int(os.environ.get('FMEA_SQLITE_CACHE_SIZE', -64000))  # negative: KiB
+SQLITE_MMAP_SIZE = int(os.environ.get('FMEA_SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
 
-def init_db():
-    """Initialize database with tables"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    # Create Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create FMEA entries table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS fmea_entries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            function TEXT NOT NULL,
-            failure_mode TEXT NOT NULL,
-            failure_effect TEXT NOT NULL,
-            severity INTEGER NOT NULL,
-            failure_cause TEXT NOT NULL,
-            occurrence INTEGER NOT NULL,
-            test_method TEXT NOT NULL,
-            detection INTEGER NOT NULL,
-            actions TEXT,
-            status TEXT NOT NULL DEFAULT 'Offen',
-            created_by INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (created_by) REFERENCES users (id)
-        )
-    ''')
+# Dashboard table
+PAGE_SIZES = [25, 50, 100, 250]
+ENTRY_TABLE_COLUMNS = ['id', 'function', 'failure_mode', 'severity', 'occurrence', 'detection',
+                       'rpn', 'risk_level', 'action_priority', 'status', 'created_at']
+RISK_LABELS = {'high': '🔴 Hoch', 'medium': '🟡 Mittel', 'low': '🟢 Niedrig'}
+PRIORITY_LABELS = {'H': '🔴 H', 'M': '🟡 M', 'L': '🟢 L'}
+EXPORT_BATCH_SIZE = 1000
+STATUS_OPTIONS = ["Offen", "In Bearbeitung", "Abgeschlossen"]
+
+@st.cache_resource
+def get_db() -> fmea_db.ConnectionPool:
+    """Shared connection pool, created once per server process"""
+    return fmea_db.ConnectionPool(DATABASE, size=SQLITE_POOL_SIZE, busy_timeout=SQLITE_BUSY_TIMEOUT,
+                                  cache_size=SQLITE_CACHE_SIZE, mmap_size=SQLITE_MMAP_SIZE)
+
+@st.cache_resource
+def get_write_queue() -> fmea_write_queue.WriteQueue:
+    """Single writer thread that group-commits the form saves of all sessions, created once per server process"""
+    return fmea_write_queue.WriteQueue(get_db().write)
+
+@st.cache_resource
+def init_db() -> Dict[str, Any]:
+    """Migrate and seed the database once per server process"""
+    with get_db().connection() as conn:
+        migration = fmea_db.run_migrations(conn, fmea_db.MIGRATIONS)
     
-    # Enhanced Actions table with new fields
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS actions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            assigned_to TEXT,
-            priority TEXT DEFAULT 'Mittel',
-            status TEXT DEFAULT 'Offen',
-            due_date DATE,
-            fmea_entry_id INTEGER,
-            created_by INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    with get_db().write() as conn:
+        cursor = conn.cursor()
+        
+        # Create default users if they don't exist
+        cursor.execute("SELECT COUNT(*) FROM users")
+        if cursor.fetchone()[0] == 0:
+            # Create admin user
+            admin_hash = hashlib.sha256('admin123'.encode()).hexdigest()
+            cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                          ('admin', admin_hash, 'admin'))
             
-            -- New extended fields
-            empfohlene_abstellmassnahmen TEXT,
-            ausfuehrung_durch TEXT,
-            verbesserter_zustand TEXT,
-            verantwortlicher_name TEXT,
-            datum_bis DATE,
-            getroffene_massnahme TEXT,
-            umgesetzt_am DATE,
-            umgesetzt_durch TEXT,
-            neue_auftretenswahrscheinlichkeit INTEGER,
-            neues_auftreten INTEGER,
-            neue_entdeckung INTEGER,
-            neue_rpz INTEGER,
+            # Create regular user
+            user_hash = hashlib.sha256('user123'.encode()).hexdigest()
+            cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                          ('user', user_hash, 'user'))
             
-            FOREIGN KEY (fmea_entry_id) REFERENCES fmea_entries (id),
-            FOREIGN KEY (created_by) REFERENCES users (id)
-        )
-    ''')
-    
-    # Add new columns to existing actions table if they don't exist
-    cursor.execute("PRAGMA table_info(actions)")
-    existing_columns = [column[1] for column in cursor.fetchall()]
-    
-    new_columns = [
-        ('empfohlene_abstellmassnahmen', 'TEXT'),
-        ('ausfuehrung_durch', 'TEXT'),
-        ('verbesserter_zustand', 'TEXT'),
-        ('verantwortlicher_name', 'TEXT'),
-        ('datum_bis', 'DATE'),
-        ('getroffene_massnahme', 'TEXT'),
-        ('umgesetzt_am', 'DATE'),
-        ('umgesetzt_durch', 'TEXT'),
-        ('neue_auftretenswahrscheinlichkeit', 'INTEGER'),
-        ('neues_auftreten', 'INTEGER'),
-        ('neue_entdeckung', 'INTEGER'),
-        ('neue_rpz', 'INTEGER')
-    ]
-    
-    for column_name, column_type in new_columns:
-        if column_name not in existing_columns:
-            cursor.execute(f"ALTER TABLE actions ADD COLUMN {column_name} {column_type}")
-    
-    conn.commit()
-    
-    # Create default users if they don't exist
-    cursor.execute("SELECT COUNT(*) FROM users")
-    if cursor.fetchone()[0] == 0:
-        # Create admin user
-        admin_hash = hashlib.sha256('admin123'.encode()).hexdigest()
-        cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                      ('admin', admin_hash, 'admin'))
-        
-        # Create regular user
-        user_hash = hashlib.sha256('user123'.encode()).hexdigest()
-        cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                      ('user', user_hash, 'user'))
-        
-        conn.commit()
-        
-        # Add sample FMEA entries
-        sample_entries = [
-            ('Motor starten', 'Motor startet nicht', 'System funktioniert nicht, Produktionsausfall', 8,
-             'Defekte Zündkerze, leere Batterie', 3, 'Visuelle Prüfung, Spannungsmessung', 2,
-             'Wartungsplan erstellen, Ersatzteile bevorraten', 'Offen', 1),
-            ('Bremssystem', 'Bremsen versagen', 'Sicherheitsrisiko, mögliche Unfälle', 10,
-             'Verschlissene Bremsbeläge, Leckage im System', 2, 'Regelmäßige Inspektion, Bremstest', 3,
-             'Präventive Wartung alle 6 Monate', 'In Bearbeitung', 1),
-            ('Temperaturregelung', 'Überhitzung', 'Komponentenschäden, Systemausfall', 7,
-             'Defekter Temperatursensor, verstopfter Filter', 4, 'Temperaturüberwachung, Sensorkalibrierung', 4,
-             'Redundante Sensoren installieren', 'Abgeschlossen', 1)
-        ]
-        
-        for entry in sample_entries:
-            cursor.execute('''
+            # Add sample FMEA entries
+            sample_entries = [
+                ('Motor starten', 'Motor startet nicht', 'System funktioniert nicht, Produktionsausfall', 8,
+                 'Defekte Zündkerze, leere Batterie', 3, 'Visuelle Prüfung, Spannungsmessung', 2,
+                 'Wartungsplan erstellen, Ersatzteile bevorraten', 'Offen', 1),
+                ('Bremssystem', 'Bremsen versagen', 'Sicherheitsrisiko, mögliche Unfälle', 10,
+                 'Verschlissene Bremsbeläge, Leckage im System', 2, 'Regelmäßige Inspektion, Bremstest', 3,
+                 'Präventive Wartung alle 6 Monate', 'In Bearbeitung', 1),
+                ('Temperaturregelung', 'Überhitzung', 'Komponentenschäden, Systemausfall', 7,
+                 'Defekter Temperatursensor, verstopfter Filter', 4, 'Temperaturüberwachung, Sensorkalibrierung', 4,
+                 'Redundante Sensoren installieren', 'Abgeschlossen', 1)
+            ]
+            
+            cursor.executemany('''
                 INSERT INTO fmea_entries (function, failure_mode, failure_effect, severity, failure_cause,
                                         occurrence, test_method, detection, actions, status, created_by)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', entry)
-        
-        conn.commit()
+            ''', sample_entries)
     
-    conn.close()
+    return migration
 
 def hash_password(password: str) -> str:
     """Hash password using SHA256"""
@@ -155,12 +96,11 @@ def verify_password(password: str, hash: str) -> bool:
 
 def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
     """Authenticate user and return user data"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, username, password_hash, role FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    conn.close()
+    with get_db().read() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT id, username, password_hash, role FROM users WHERE username = ?", (username,))
+        user = cursor.fetchone()
     
     if user and verify_password(password, user[2]):
         return {
@@ -170,43 +110,37 @@ def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
         }
     return None
 
-def get_fmea_entries(search: str = '', risk_filter: str = '', status_filter: str = '') -> List[Dict[str, Any]]:
-    """Get FMEA entries with optional filters"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    query = '''
-        SELECT id, function, failure_mode, failure_effect, severity, failure_cause,
-               occurrence, test_method, detection, actions, status, created_at, updated_at
-        FROM fmea_entries
-        WHERE 1=1
-    '''
-    params = []
-    
-    if search:
-        query += " AND (function LIKE ? OR failure_mode LIKE ? OR failure_cause LIKE ? OR failure_effect LIKE ?)"
-        search_param = f'%{search}%'
-        params.extend([search_param, search_param, search_param, search_param])
-    
-    if status_filter:
-        query += " AND status = ?"
-        params.append(status_filter)
-    
-    query += " ORDER BY created_at DESC"
-    
-    cursor.execute(query, params)
-    entries = cursor.fetchall()
-    conn.close()
+def get_fmea_entries(search: str = '', risk_filter: str = '', status_filter: str = '', priority_filter: str = '',
+                     limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+    """Get FMEA entries with optional filters and paging, cached until the data changes"""
+    return query_fmea_entries(search, risk_filter, status_filter, priority_filter, limit, offset,
+                              get_db().data_version())
+
+@st.cache_data(max_entries=32)
+def query_fmea_entries(search: str, risk_filter: str, status_filter: str, priority_filter: str,
+                       limit: Optional[int], offset: int, data_version: tuple) -> List[Dict[str, Any]]:
+    """Load FMEA entries; data_version is only part of the cache key"""
+    with get_db().read() as conn:
+        joins, where, params, order_by = fmea_db.entry_filter_sql(
+            conn, 'fmea_entries', search, risk_filter, status_filter, priority_filter)
+        
+        query = f'''
+            SELECT id, function, failure_mode, failure_effect, severity, failure_cause,
+                   occurrence, test_method, detection, actions, status, created_at, updated_at,
+                   rpn, risk_level, action_priority
+            FROM fmea_entries{joins}
+            WHERE 1=1{where}
+            ORDER BY {order_by}
+        '''
+        
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        
+        entries = conn.execute(query, params).fetchall()
     
     result = []
     for entry in entries:
-        rpn = entry[4] * entry[6] * entry[8]  # severity * occurrence * detection
-        risk_level = 'high' if rpn > 100 else 'medium' if rpn > 50 else 'low'
-        
-        # Apply risk filter
-        if risk_filter and risk_filter != risk_level:
-            continue
-            
         result.append({
             'id': entry[0],
             'function': entry[1],
@@ -221,16 +155,41 @@ def get_fmea_entries(search: str = '', risk_filter: str = '', status_filter: str
             'status': entry[10],
             'created_at': entry[11],
             'updated_at': entry[12],
-            'rpn': rpn,
-            'risk_level': risk_level
+            'rpn': entry[13],
+            'risk_level': entry[14],
+            'action_priority': entry[15]
         })
     
     return result
 
+def get_entry_options() -> List[str]:
+    """Labels for the FMEA entry dropdown, cached until the data changes"""
+    return query_entry_options(get_db().data_version())
+
+@st.cache_data(max_entries=4)
+def query_entry_options(data_version: tuple) -> List[str]:
+    """Load only id, function and failure mode for the dropdown; data_version is only part of the cache key"""
+    with get_db().read() as conn:
+        rows = conn.execute("SELECT id, function, failure_mode FROM fmea_entries ORDER BY id").fetchall()
+    return [f"{entry_id}: {function} - {failure_mode}" for entry_id, function, failure_mode in rows]
+
+def count_fmea_entries(search: str = '', risk_filter: str = '', status_filter: str = '',
+                       priority_filter: str = '') -> int:
+    """Count FMEA entries matching the filters, cached until the data changes"""
+    return query_entry_count(search, risk_filter, status_filter, priority_filter, get_db().data_version())
+
+@st.cache_data(max_entries=32)
+def query_entry_count(search: str, risk_filter: str, status_filter: str, priority_filter: str,
+                      data_version: tuple) -> int:
+    """Count FMEA entries; data_version is only part of the cache key"""
+    with get_db().read() as conn:
+        joins, where, params, _ = fmea_db.entry_filter_sql(
+            conn, 'fmea_entries', search, risk_filter, status_filter, priority_filter)
+        return conn.execute(f"SELECT COUNT(*) FROM fmea_entries{joins} WHERE 1=1{where}", params).fetchone()[0]
+
 def add_fmea_entry(entry_data: Dict[str, Any]) -> bool:
     """Add new FMEA entry"""
-    try:
-        conn = sqlite3.connect(DATABASE)
+    def write(conn):
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -243,9 +202,9 @@ def add_fmea_entry(entry_data: Dict[str, Any]) -> bool:
             entry_data['test_method'], entry_data['detection'], entry_data['actions'],
             entry_data['status'], entry_data['created_by']
         ))
-        
-        conn.commit()
-        conn.close()
+    
+    try:
+        get_write_queue().execute(write)
         return True
     except Exception as e:
         st.error(f"Fehler beim Speichern: {str(e)}")
@@ -253,8 +212,7 @@ def add_fmea_entry(entry_data: Dict[str, Any]) -> bool:
 
 def update_fmea_entry(entry_id: int, entry_data: Dict[str, Any]) -> bool:
     """Update existing FMEA entry"""
-    try:
-        conn = sqlite3.connect(DATABASE)
+    def write(conn):
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -266,11 +224,11 @@ def update_fmea_entry(entry_id: int, entry_data: Dict[str, Any]) -> bool:
             entry_data['function'], entry_data['failure_mode'], entry_data['failure_effect'],
             entry_data['severity'], entry_data['failure_cause'], entry_data['occurrence'],
             entry_data['test_method'], entry_data['detection'], entry_data['actions'],
-            entry_data['status'], datetime.now().isoformat(), entry_id
+            entry_data['status'], fmea_db.db_timestamp(datetime.utcnow()), entry_id
         ))
-        
-        conn.commit()
-        conn.close()
+    
+    try:
+        get_write_queue().execute(write)
         return True
     except Exception as e:
         st.error(f"Fehler beim Aktualisieren: {str(e)}")
@@ -278,36 +236,60 @@ def update_fmea_entry(entry_id: int, entry_data: Dict[str, Any]) -> bool:
 
 def delete_fmea_entry(entry_id: int) -> bool:
     """Delete FMEA entry"""
-    try:
-        conn = sqlite3.connect(DATABASE)
+    def write(conn):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM fmea_entries WHERE id=?", (entry_id,))
-        conn.commit()
-        conn.close()
+    
+    try:
+        get_write_queue().execute(write)
         return True
     except Exception as e:
         st.error(f"Fehler beim Löschen: {str(e)}")
         return False
 
+def batch_update_entries(operations: List[Dict[str, Any]], allow_delete: bool) -> Optional[Dict[str, Any]]:
+    """Apply updates and deletes to many entries in one transaction; returns per-item results"""
+    try:
+        with get_db().write() as conn:
+            return fmea_batch.apply_batch(conn, 'fmea_entries', operations, fmea_batch.ENTRY_FIELDS,
+                                          fmea_db.db_timestamp(datetime.utcnow()), allow_delete=allow_delete,
+                                          references=[('actions', 'fmea_entry_id')])
+    except Exception as e:
+        st.error(f"Fehler bei der Stapelverarbeitung: {str(e)}")
+        return None
+
+def import_fmea_entries(upload, created_by: int) -> Optional[Dict[str, Any]]:
+    """Bulk import entries from an uploaded CSV/XLSX file"""
+    try:
+        with get_db().connection() as conn:
+            return fmea_import.import_entries(conn, 'fmea_entries', upload, upload.name, created_by)
+    except Exception as e:
+        st.error(f"Fehler beim Import: {str(e)}")
+        return None
+
 def get_actions() -> List[Dict[str, Any]]:
-    """Get all actions with extended fields"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT a.id, a.title, a.description, a.assigned_to, a.priority, a.status, 
-               a.due_date, a.fmea_entry_id, a.created_at, f.function,
-               a.empfohlene_abstellmassnahmen, a.ausfuehrung_durch, a.verbesserter_zustand,
-               a.verantwortlicher_name, a.datum_bis, a.getroffene_massnahme,
-               a.umgesetzt_am, a.umgesetzt_durch, a.neue_auftretenswahrscheinlichkeit,
-               a.neues_auftreten, a.neue_entdeckung, a.neue_rpz
-        FROM actions a
-        LEFT JOIN fmea_entries f ON a.fmea_entry_id = f.id
-        ORDER BY a.created_at DESC
-    ''')
-    
-    actions = cursor.fetchall()
-    conn.close()
+    """Get all actions with extended fields, cached until the data changes"""
+    return query_actions(get_db().data_version())
+
+@st.cache_data(max_entries=4)
+def query_actions(data_version: tuple) -> List[Dict[str, Any]]:
+    """Load all actions with extended fields; data_version is only part of the cache key"""
+    with get_db().read() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT a.id, a.title, a.description, a.assigned_to, a.priority, a.status, 
+                   a.due_date, a.fmea_entry_id, a.created_at, f.function,
+                   a.empfohlene_abstellmassnahmen, a.ausfuehrung_durch, a.verbesserter_zustand,
+                   a.verantwortlicher_name, a.datum_bis, a.getroffene_massnahme,
+                   a.umgesetzt_am, a.umgesetzt_durch, a.neue_auftretenswahrscheinlichkeit,
+                   a.neues_auftreten, a.neue_entdeckung, a.neue_rpz
+            FROM actions a
+            LEFT JOIN fmea_entries f ON a.fmea_entry_id = f.id
+            ORDER BY a.created_at DESC
+        ''')
+        
+        actions = cursor.fetchall()
     
     return [{
         'id': action[0],
@@ -336,8 +318,7 @@ def get_actions() -> List[Dict[str, Any]]:
 
 def add_action(action_data: Dict[str, Any]) -> bool:
     """Add new action with extended fields"""
-    try:
-        conn = sqlite3.connect(DATABASE)
+    def write(conn):
         cursor = conn.cursor()
         
         # Calculate new RPZ if A, B, E values are provided
@@ -368,9 +349,9 @@ def add_action(action_data: Dict[str, Any]) -> bool:
             action_data.get('umgesetzt_durch'), action_data.get('neue_auftretenswahrscheinlichkeit'),
             action_data.get('neues_auftreten'), action_data.get('neue_entdeckung'), neue_rpz
         ))
-        
-        conn.commit()
-        conn.close()
+    
+    try:
+        get_write_queue().execute(write)
         return True
     except Exception as e:
         st.error(f"Fehler beim Speichern der Maßnahme: {str(e)}")
@@ -378,8 +359,7 @@ def add_action(action_data: Dict[str, Any]) -> bool:
 
 def update_action(action_id: int, action_data: Dict[str, Any]) -> bool:
     """Update existing action with extended fields"""
-    try:
-        conn = sqlite3.connect(DATABASE)
+    def write(conn):
         cursor = conn.cursor()
         
         # Calculate new RPZ if A, B, E values are provided
@@ -408,11 +388,11 @@ def update_action(action_id: int, action_data: Dict[str, Any]) -> bool:
             action_data.get('getroffene_massnahme'), action_data.get('umgesetzt_am'),
             action_data.get('umgesetzt_durch'), action_data.get('neue_auftretenswahrscheinlichkeit'),
             action_data.get('neues_auftreten'), action_data.get('neue_entdeckung'), 
-            neue_rpz, datetime.now().isoformat(), action_id
+            neue_rpz, fmea_db.db_timestamp(datetime.utcnow()), action_id
         ))
-        
-        conn.commit()
-        conn.close()
+    
+    try:
+        get_write_queue().execute(write)
         return True
     except Exception as e:
         st.error(f"Fehler beim Aktualisieren der Maßnahme: {str(e)}")
@@ -420,73 +400,122 @@ def update_action(action_id: int, action_data: Dict[str, Any]) -> bool:
 
 def delete_action(action_id: int) -> bool:
     """Delete action"""
-    try:
-        conn = sqlite3.connect(DATABASE)
+    def write(conn):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM actions WHERE id=?", (action_id,))
-        conn.commit()
-        conn.close()
+    
+    try:
+        get_write_queue().execute(write)
         return True
     except Exception as e:
         st.error(f"Fehler beim Löschen der Maßnahme: {str(e)}")
         return False
 
+def batch_update_actions(operations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Apply updates and deletes to many actions in one transaction; returns per-item results"""
+    try:
+        with get_db().write() as conn:
+            return fmea_batch.apply_batch(conn, 'actions', operations, fmea_batch.ACTION_FIELDS,
+                                          fmea_db.db_timestamp(datetime.utcnow()))
+    except Exception as e:
+        st.error(f"Fehler bei der Stapelverarbeitung: {str(e)}")
+        return None
+
+def finish_batch(report: Optional[Dict[str, Any]]):
+    """Keep the batch result for the next run and start over with an empty selection"""
+    if report:
+        st.session_state.batch_report = report
+        st.session_state.selection_version = st.session_state.get('selection_version', 0) + 1
+        st.rerun()
+
+def show_batch_report():
+    """Show the result of the last batch change, once"""
+    report = st.session_state.pop('batch_report', None)
+    if not report:
+        return
+    message = (f"{report['updated']} aktualisiert, {report['deleted']} gelöscht, "
+               f"{report['failed']} fehlgeschlagen.")
+    if report['failed']:
+        st.warning(message)
+        for result in report['results']:
+            if not result['ok']:
+                st.write(f"ID {result['id']}: {result['error']}")
+    else:
+        st.success(message)
+
 def get_statistics() -> Dict[str, Any]:
-    """Get dashboard statistics"""
-    entries = get_fmea_entries()
-    
-    total = len(entries)
-    high_risk = len([e for e in entries if e['rpn'] > 100])
-    medium_risk = len([e for e in entries if 50 <= e['rpn'] <= 100])
-    low_risk = len([e for e in entries if e['rpn'] < 50])
-    
-    open_count = len([e for e in entries if e['status'] == 'Offen'])
-    in_progress = len([e for e in entries if e['status'] == 'In Bearbeitung'])
-    completed = len([e for e in entries if e['status'] == 'Abgeschlossen'])
-    
-    return {
-        'total': total,
-        'high_risk': high_risk,
-        'medium_risk': medium_risk,
-        'low_risk': low_risk,
-        'open': open_count,
-        'in_progress': in_progress,
-        'completed': completed,
-        'completion_rate': round((completed / total * 100) if total > 0 else 0, 1)
-    }
-
-def export_to_csv(entries: List[Dict[str, Any]]) -> str:
-    """Export FMEA entries to CSV"""
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=';')
+    """Get dashboard statistics, cached until the data changes"""
+    return query_statistics(get_db().data_version())
+
+@st.cache_data(max_entries=4)
+def query_statistics(data_version: tuple) -> Dict[str, Any]:
+    """Read dashboard statistics from the trigger-maintained summary table"""
+    with get_db().read() as conn:
+        stats = fmea_db.read_statistics(conn, 'fmea_entries')
+    return stats
+
+def get_analytics(risk_filter: str = '', status_filter: str = '') -> Dict[str, Any]:
+    """Get portfolio analytics, cached until the data changes"""
+    return query_analytics(risk_filter, status_filter, get_db().data_version())
+
+@st.cache_data(max_entries=16)
+def query_analytics(risk_filter: str, status_filter: str, data_version: tuple) -> Dict[str, Any]:
+    """Compute RPN distribution, rating marginals and function Pareto; data_version is only part of the cache key"""
+    with get_db().read() as conn:
+        return fmea_analytics.analyze_table(conn, 'fmea_entries', risk_filter, status_filter)
+
+@st.cache_data(max_entries=4)
+def export_to_csv(search: str, risk_filter: str, status_filter: str, priority_filter: str,
+                  data_version: tuple) -> bytes:
+    """Export filtered FMEA entries to CSV, writing rows straight from the cursor"""
+    output = io.BytesIO()
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    writer = csv.writer(text, delimiter=';')
     
     # Header
-    headers = [
-        'Funktion', 'Fehlerart', 'Fehlerfolge', 'Auftretenswahrscheinlichkeit',
-        'Fehlerursache', 'Auftreten', 'Prüfmaßnahme', 'Entdeckung',
-        'RPN', 'Maßnahmen', 'Status', 'Erstellt am'
-    ]
-    writer.writerow(headers)
+    writer.writerow(fmea_db.CSV_HEADERS)
     
     # Data
-    for entry in entries:
-        writer.writerow([
-            entry['function'],
-            entry['failure_mode'],
-            entry['failure_effect'],
-            entry['severity'],
-            entry['failure_cause'],
-            entry['occurrence'],
-            entry['test_method'],
-            entry['detection'],
-            entry['rpn'],
-            entry['actions'] or '',
-            entry['status'],
-            entry['created_at']
-        ])
+    with get_db().read() as conn:
+        joins, where, params, order_by = fmea_db.entry_filter_sql(
+            conn, 'fmea_entries', search, risk_filter, status_filter, priority_filter)
+        cursor = conn.execute(f'''
+            SELECT function, failure_mode, failure_effect, severity, failure_cause, occurrence,
+                   test_method, detection, rpn, COALESCE(actions, ''), status, created_at
+            FROM fmea_entries{joins}
+            WHERE 1=1{where}
+            ORDER BY {order_by}
+        ''', params)
+        
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
     
+    text.flush()
     return output.getvalue()
 
+@st.cache_data(max_entries=4)
+def export_to_xlsx(search: str, risk_filter: str, status_filter: str, priority_filter: str, include_actions: bool,
+                   data_version: tuple) -> bytes:
+    """Export filtered FMEA entries to Excel in the CSV layout, with an actions sheet if requested"""
+    output = io.BytesIO()
+    with get_db().read() as conn:
+        fmea_xlsx.write_workbook(conn, 'fmea_entries', 'actions', output, search, risk_filter, status_filter,
+                                 priority_filter, include_actions=include_actions, batch_size=EXPORT_BATCH_SIZE)
+    return output.getvalue()
+
+@st.cache_data(max_entries=4)
+def export_to_parquet(search: str, risk_filter: str, status_filter: str, priority_filter: str, include_actions: bool,
+                      data_version: tuple) -> bytes:
+    """Export filtered FMEA entries as typed Parquet, joined with their actions if requested, one row group per
+    fetched block"""
+    with get_db().read() as conn:
+        return fmea_arrow.export_bytes(conn, 'fmea_entries', 'actions', 'parquet',
+                                       search, risk_filter, status_filter, priority_filter,
+                                       include_actions=include_actions)
+
 def main():
     st.set_page_config(
         page_title="FMEA Management System",
@@ -495,8 +524,9 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Initialize database
-    init_db()
+    # Initialize database (cached, runs once per process)
+    get_db().reset_stats()
+    migration = init_db()
     
     # Initialize session state
     if 'authenticated' not in st.session_state:
@@ -540,7 +570,7 @@ def main():
         
         st.divider()
         
-        menu_options = ["Dashboard", "FMEA Eintrag hinzufügen"]
+        menu_options = ["Dashboard", "Analyse", "FMEA Eintrag hinzufügen"]
         if st.session_state.user['role'] == 'admin':
             menu_options.append("Maßnahmen verwalten")
         
@@ -565,7 +595,7 @@ def main():
         
         # Filters
         st.subheader("Filter")
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
             search = st.text_input("Suche", key="search")
@@ -574,65 +604,156 @@ def main():
         with col3:
             status_filter = st.selectbox("Status", ["", "Offen", "In Bearbeitung", "Abgeschlossen"], key="status_filter")
         with col4:
+            priority_filter = st.selectbox(
+                "Action Priority", [""] + list(fmea_priority.ACTION_PRIORITIES),
+                format_func=lambda priority: fmea_priority.ACTION_PRIORITY_LABELS.get(priority, ""),
+                key="priority_filter"
+            )
+        with col5:
             if st.button("Filter anwenden"):
                 st.rerun()
         
-        # Get filtered entries
-        entries = get_fmea_entries(search, risk_filter, status_filter)
-        
-        # Export button
-        if entries:
-            csv_data = export_to_csv(entries)
+        # Export button; the CSV is only generated when the button is clicked
+        total_entries = count_fmea_entries(search, risk_filter, status_filter, priority_filter)
+        if total_entries:
             st.download_button(
                 label="📥 Als CSV exportieren",
-                data=csv_data,
+                data=functools.partial(export_to_csv, search, risk_filter, status_filter, priority_filter,
+                                       get_db().data_version()),
                 file_name=f"FMEA_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
+            st.download_button(
+                label="📥 Als Excel exportieren",
+                data=functools.partial(export_to_xlsx, search, risk_filter, status_filter, priority_filter,
+                                       st.session_state.user['role'] == 'admin', get_db().data_version()),
+                file_name=f"FMEA_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                mime=fmea_xlsx.MIMETYPE
+            )
+            is_admin = st.session_state.user['role'] == 'admin'
+            st.download_button(
+                label="📥 Als Parquet exportieren (mit Maßnahmen)" if is_admin else "📥 Als Parquet exportieren",
+                data=functools.partial(export_to_parquet, search, risk_filter, status_filter, priority_filter,
+                                       is_admin, get_db().data_version()),
+                file_name=f"FMEA_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet",
+                mime=fmea_arrow.FORMATS['parquet'][1]
+            )
         
         # Display entries
-        st.subheader(f"FMEA Einträge ({len(entries)})")
+        st.subheader(f"FMEA Einträge ({total_entries})")
+        show_batch_report()
         
-        if entries:
-            for entry in entries:
-                with st.expander(f"🔧 {entry['function']} - {entry['failure_mode']} (RPN: {entry['rpn']})"):
-                    col1, col2 = st.columns(2)
+        if total_entries:
+            # Only the current page is loaded and sent to the browser
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                page_size = st.selectbox("Einträge pro Seite", PAGE_SIZES, key="page_size")
+            page_count = (total_entries + page_size - 1) // page_size
+            if st.session_state.get('page', 1) > page_count:
+                st.session_state.page = page_count
+            with col2:
+                page = st.number_input(f"Seite (von {page_count})", min_value=1, max_value=page_count,
+                                       step=1, key="page")
+            
+            entries = get_fmea_entries(search, risk_filter, status_filter, priority_filter,
+                                       limit=page_size, offset=(page - 1) * page_size)
+            
+            table = pd.DataFrame(entries, columns=ENTRY_TABLE_COLUMNS)
+            table['risk_level'] = table['risk_level'].map(RISK_LABELS)
+            table['action_priority'] = table['action_priority'].map(PRIORITY_LABELS)
+            table['created_at'] = table['created_at'].str[:16]
+            
+            selection = st.dataframe(
+                table,
+                hide_index=True,
+                width="stretch",
+                on_select="rerun",
+                selection_mode="multi-row",
+                key=f"entries_table_{st.session_state.get('selection_version', 0)}",
+                column_config={
+                    'id': None,
+                    'function': "Funktion",
+                    'failure_mode': "Fehlerart",
+                    'severity': "A",
+                    'occurrence': "B",
+                    'detection': "E",
+                    'rpn': st.column_config.NumberColumn("RPN"),
+                    'risk_level': "Risiko",
+                    'action_priority': "AP",
+                    'status': "Status",
+                    'created_at': "Erstellt"
+                }
+            )
+            
+            selected = [entries[row] for row in selection.selection.rows if row < len(entries)]
+            
+            # Batch changes for all selected rows, applied in one transaction
+            if selected:
+                col1, col2, col3 = st.columns([2, 1, 1])
+                with col1:
+                    batch_status = st.selectbox(f"Status für {len(selected)} ausgewählte Einträge",
+                                                STATUS_OPTIONS, key="batch_status")
+                with col2:
+                    if st.button("Status setzen", key="batch_set_status"):
+                        finish_batch(batch_update_entries(
+                            [{'op': 'update', 'id': entry['id'], 'fields': {'status': batch_status}}
+                             for entry in selected],
+                            allow_delete=False
+                        ))
+                with col3:
+                    if st.session_state.user['role'] == 'admin':
+                        if st.button("🗑️ Auswahl löschen", key="batch_delete"):
+                            finish_batch(batch_update_entries(
+                                [{'op': 'delete', 'id': entry['id']} for entry in selected],
+                                allow_delete=True
+                            ))
+            
+            # Detail panel when a single entry is selected
+            if len(selected) == 1:
+                entry = selected[0]
+                st.markdown(f"#### 🔧 {entry['function']} - {entry['failure_mode']} (RPN: {entry['rpn']})")
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.write(f"**Fehlerfolge:** {entry['failure_effect']}")
+                    st.write(f"**Fehlerursache:** {entry['failure_cause']}")
+                    st.write(f"**Prüfmaßnahme:** {entry['test_method']}")
+                    st.write(f"**Maßnahmen:** {entry['actions'] or 'Keine'}")
+                
+                with col2:
+                    st.write(f"**Auftretenswahrscheinlichkeit:** {entry['severity']}")
+                    st.write(f"**Auftreten:** {entry['occurrence']}")
+                    st.write(f"**Entdeckung:** {entry['detection']}")
+                    st.write(f"**RPN:** {entry['rpn']}")
+                    st.write(f"**Action Priority (AIAG-VDA):** "
+                             f"{fmea_priority.ACTION_PRIORITY_LABELS[entry['action_priority']]}")
                     
-                    with col1:
-                        st.write(f"**Fehlerfolge:** {entry['failure_effect']}")
-                        st.write(f"**Fehlerursache:** {entry['failure_cause']}")
-                        st.write(f"**Prüfmaßnahme:** {entry['test_method']}")
-                        st.write(f"**Maßnahmen:** {entry['actions'] or 'Keine'}")
+                    # Risk level badge
+                    if entry['risk_level'] == 'high':
+                        st.error(f"🔴 Hohes Risiko")
+                    elif entry['risk_level'] == 'medium':
+                        st.warning(f"🟡 Mittleres Risiko")
+                    else:
+                        st.success(f"🟢 Niedriges Risiko")
                     
-                    with col2:
-                        st.write(f"**Auftretenswahrscheinlichkeit:** {entry['severity']}")
-                        st.write(f"**Auftreten:** {entry['occurrence']}")
-                        st.write(f"**Entdeckung:** {entry['detection']}")
-                        st.write(f"**RPN:** {entry['rpn']}")
-                        
-                        # Risk level badge
-                        if entry['risk_level'] == 'high':
-                            st.error(f"🔴 Hohes Risiko")
-                        elif entry['risk_level'] == 'medium':
-                            st.warning(f"🟡 Mittleres Risiko")
-                        else:
-                            st.success(f"🟢 Niedriges Risiko")
-                        
-                        st.write(f"**Status:** {entry['status']}")
-                    
-                    # Action buttons
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        if st.button(f"✏️ Bearbeiten", key=f"edit_{entry['id']}"):
-                            st.session_state.edit_entry = entry
-                    with col2:
-                        if st.session_state.user['role'] == 'admin':
-                            if st.button(f"🗑️ Löschen", key=f"delete_{entry['id']}"):
-                                if delete_fmea_entry(entry['id']):
-                                    st.success("Eintrag gelöscht!")
-                                    st.rerun()
-                    with col3:
-                        st.write(f"Erstellt: {entry['created_at'][:16]}")
+                    st.write(f"**Status:** {entry['status']}")
+                
+                # Action buttons
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    if st.button(f"✏️ Bearbeiten", key=f"edit_{entry['id']}"):
+                        st.session_state.edit_entry = entry
+                with col2:
+                    if st.session_state.user['role'] == 'admin':
+                        if st.button(f"🗑️ Löschen", key=f"delete_{entry['id']}"):
+                            if delete_fmea_entry(entry['id']):
+                                st.success("Eintrag gelöscht!")
+                                st.rerun()
+                with col3:
+                    st.write(f"Erstellt: {entry['created_at'][:16]}")
+            elif not selected:
+                st.caption("Zeile auswählen, um Details anzuzeigen und den Eintrag zu bearbeiten. "
+                           "Mehrere Zeilen auswählen, um sie gemeinsam zu ändern.")
         else:
             st.info("Keine Einträge gefunden.")
         
@@ -676,3 +797,254 @@ def main():
                         }
                         
                         if update_fmea_entry(entry['id'], entry_data):
+                            st.success("Eintrag aktualisiert!")
+                            del st.session_state.edit_entry
+                            st.rerun()
+                
+                with col2:
+                    if st.form_submit_button("❌ Abbrechen"):
+                        del st.session_state.edit_entry
+                        st.rerun()
+    
+    # Portfolio analytics
+    elif selected_page == "Analyse":
+        st.header("📈 Risikoanalyse")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            risk_filter = st.selectbox("Risiko", ["", "high", "medium", "low"], key="analytics_risk_filter")
+        with col2:
+            status_filter = st.selectbox("Status", [""] + STATUS_OPTIONS, key="analytics_status_filter")
+        
+        analytics = get_analytics(risk_filter, status_filter)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Einträge", analytics['total'])
+        with col2:
+            st.metric("Mittlere RPN", analytics['rpn']['mean'])
+        with col3:
+            st.metric("Median RPN", analytics['rpn']['median'])
+        with col4:
+            st.metric("90%-Perzentil RPN", analytics['rpn']['p90'])
+        
+        if analytics['total']:
+            # Pareto: which functions carry most of the total RPN
+            st.subheader("Pareto nach Funktion (RPN-Summe)")
+            pareto = pd.DataFrame(analytics['pareto'])
+            st.bar_chart(pareto, x='function', y='rpn_sum', x_label="Funktion", y_label="RPN-Summe", sort=False)
+            st.dataframe(
+                pareto,
+                hide_index=True,
+                width="stretch",
+                column_config={
+                    'function': "Funktion",
+                    'count': "Einträge",
+                    'rpn_sum': "RPN-Summe",
+                    'share': st.column_config.NumberColumn("Anteil", format="%.1f %%"),
+                    'cumulative_share': st.column_config.ProgressColumn("Kumuliert", format="%.1f %%",
+                                                                        min_value=0, max_value=100)
+                }
+            )
+            
+            st.subheader("Action Priority (AIAG-VDA)")
+            priorities = analytics['action_priorities']
+            st.bar_chart(pd.DataFrame({
+                'AP': [fmea_priority.ACTION_PRIORITY_LABELS[priority] for priority in priorities],
+                'Einträge': list(priorities.values())
+            }), x='AP', y='Einträge', sort=False)
+            
+            st.subheader("RPN-Verteilung")
+            edges = analytics['histogram']['edges']
+            histogram = pd.DataFrame({
+                'RPN': [f"{low}-{high}" for low, high in zip(edges, edges[1:])],
+                'Einträge': analytics['histogram']['counts']
+            })
+            st.bar_chart(histogram, x='RPN', y='Einträge', sort=False)
+            
+            st.subheader("Verteilung der Bewertungen")
+            marginals = pd.DataFrame({
+                'Auftretenswahrscheinlichkeit': analytics['marginals']['severity'],
+                'Auftreten': analytics['marginals']['occurrence'],
+                'Entdeckung': analytics['marginals']['detection']
+            }, index=range(1, 11))
+            st.bar_chart(marginals, x_label="Bewertung", y_label="Einträge", stack=False)
+            
+            st.subheader("Einträge nach Funktion")
+            st.bar_chart(pd.DataFrame(analytics['functions']), x='function', y='count',
+                         x_label="Funktion", y_label="Einträge", horizontal=True, sort=False)
+            st.caption(f"{analytics['function_count']} Funktionen · berechnet in {analytics['duration_ms']} ms")
+        else:
+            st.info("Keine Einträge gefunden.")
+    
+    # Add FMEA Entry
+    elif selected_page == "FMEA Eintrag hinzufügen":
+        st.header("➕ Neuen FMEA Eintrag hinzufügen")
+        
+        with st.form("add_entry_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                function = st.text_input("Funktion *")
+                failure_mode = st.text_input("Fehlerart *")
+                failure_effect = st.text_area("Fehlerfolge *")
+                severity = st.slider("Auftretenswahrscheinlichkeit (1-10)", 1, 10, 5)
+                failure_cause = st.text_area("Fehlerursache *")
+            
+            with col2:
+                occurrence = st.slider("Auftreten (1-10)", 1, 10, 5)
+                test_method = st.text_input("Prüfmaßnahme *")
+                detection = st.slider("Entdeckung (1-10)", 1, 10, 5)
+                actions = st.text_area("Maßnahmen")
+                status = st.selectbox("Status", ["Offen", "In Bearbeitung", "Abgeschlossen"])
+            
+            # Show calculated RPN
+            rpn = severity * occurrence * detection
+            risk_level = 'Hoch' if rpn > 100 else 'Mittel' if rpn > 50 else 'Niedrig'
+            action_priority = fmea_priority.action_priority(severity, occurrence, detection)
+            st.info(f"Berechnete RPN: {rpn} (Risiko: {risk_level}) · "
+                    f"Action Priority: {fmea_priority.ACTION_PRIORITY_LABELS[action_priority]}")
+            
+            if st.form_submit_button("💾 Eintrag speichern"):
+                if function and failure_mode and failure_effect and failure_cause and test_method:
+                    entry_data = {
+                        'function': function,
+                        'failure_mode': failure_mode,
+                        'failure_effect': failure_effect,
+                        'severity': severity,
+                        'failure_cause': failure_cause,
+                        'occurrence': occurrence,
+                        'test_method': test_method,
+                        'detection': detection,
+                        'actions': actions,
+                        'status': status,
+                        'created_by': st.session_state.user['id']
+                    }
+                    
+                    if add_fmea_entry(entry_data):
+                        st.success("FMEA-Eintrag erfolgreich hinzugefügt!")
+                        st.rerun()
+                else:
+                    st.error("Bitte füllen Sie alle Pflichtfelder (*) aus.")
+        
+        # Bulk import in the export layout
+        with st.expander("📤 Massenimport (CSV/XLSX)"):
+            st.write("Die Datei muss die Spalten des CSV-Exports enthalten (Trennzeichen `;`).")
+            upload = st.file_uploader("Datei", type=["csv", "xlsx"])
+            if upload and st.button("Importieren"):
+                report = import_fmea_entries(upload, st.session_state.user['id'])
+                if report:
+                    st.success(f"{report['imported']} Einträge importiert, {report['failed']} abgelehnt "
+                               f"({report['duration_ms']} ms).")
+                    if report['errors']:
+                        st.dataframe(pd.DataFrame([
+                            {'Zeile': error['row'], 'Fehler': '; '.join(error['errors'])}
+                            for error in report['errors']
+                        ]), hide_index=True)
+    
+    # Manage Actions (Admin only)
+    elif selected_page == "Maßnahmen verwalten" and st.session_state.user['role'] == 'admin':
+        st.header("📋 Maßnahmen verwalten")
+        
+        # Add new action
+        with st.expander("➕ Neue Maßnahme hinzufügen"):
+            with st.form("add_action_form"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    title = st.text_input("Titel *")
+                    description = st.text_area("Beschreibung")
+                    assigned_to = st.text_input("Zugewiesen an")
+                
+                with col2:
+                    priority = st.selectbox("Priorität", ["Niedrig", "Mittel", "Hoch"])
+                    action_status = st.selectbox("Status", ["Offen", "In Bearbeitung", "Abgeschlossen"])
+                    due_date = st.date_input("Fälligkeitsdatum", value=None)
+                
+                # FMEA Entry selection
+                fmea_options = ["Keine Zuordnung"] + get_entry_options()
+                fmea_selection = st.selectbox("FMEA Eintrag", fmea_options)
+                
+                if st.form_submit_button("💾 Maßnahme speichern"):
+                    if title:
+                        fmea_entry_id = None
+                        if fmea_selection != "Keine Zuordnung":
+                            fmea_entry_id = int(fmea_selection.split(":")[0])
+                        
+                        action_data = {
+                            'title': title,
+                            'description': description,
+                            'assigned_to': assigned_to,
+                            'priority': priority,
+                            'status': action_status,
+                            'due_date': due_date.isoformat() if due_date else None,
+                            'fmea_entry_id': fmea_entry_id,
+                            'created_by': st.session_state.user['id']
+                        }
+                        
+                        if add_action(action_data):
+                            st.success("Maßnahme erfolgreich hinzugefügt!")
+                            st.rerun()
+                    else:
+                        st.error("Bitte geben Sie einen Titel ein.")
+        
+        # Display actions
+        actions = get_actions()
+        st.subheader(f"Aktuelle Maßnahmen ({len(actions)})")
+        show_batch_report()
+        
+        if actions:
+            # Batch changes for several actions, applied in one transaction
+            action_labels = {action['id']: f"{action['title']} - {action['status']}" for action in actions}
+            selected_ids = st.multiselect("Maßnahmen auswählen", list(action_labels), format_func=action_labels.get,
+                                          key=f"action_selection_{st.session_state.get('selection_version', 0)}")
+            if selected_ids:
+                col1, col2, col3 = st.columns([2, 1, 1])
+                with col1:
+                    batch_status = st.selectbox(f"Status für {len(selected_ids)} ausgewählte Maßnahmen",
+                                                STATUS_OPTIONS, key="batch_action_status")
+                with col2:
+                    if st.button("Status setzen", key="batch_action_set_status"):
+                        finish_batch(batch_update_actions(
+                            [{'op': 'update', 'id': action_id, 'fields': {'status': batch_status}}
+                             for action_id in selected_ids]
+                        ))
+                with col3:
+                    if st.button("🗑️ Auswahl löschen", key="batch_action_delete"):
+                        finish_batch(batch_update_actions(
+                            [{'op': 'delete', 'id': action_id} for action_id in selected_ids]
+                        ))
+            
+            for action in actions:
+                with st.expander(f"📋 {action['title']} - {action['status']}"):
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.write(f"**Beschreibung:** {action['description'] or 'Keine'}")
+                        st.write(f"**Zugewiesen an:** {action['assigned_to'] or 'Nicht zugewiesen'}")
+                        st.write(f"**Priorität:** {action['priority']}")
+                    
+                    with col2:
+                        st.write(f"**Status:** {action['status']}")
+                        st.write(f"**Fälligkeitsdatum:** {action['due_date'] or 'Nicht gesetzt'}")
+                        st.write(f"**FMEA Eintrag:** {action['fmea_function'] or 'Nicht zugeordnet'}")
+                    
+                    if st.button(f"🗑️ Löschen", key=f"delete_action_{action['id']}"):
+                        if delete_action(action['id']):
+                            st.success("Maßnahme gelöscht!")
+                            st.rerun()
+        else:
+            st.info("Keine Maßnahmen vorhanden.")
+    
+    # Report database usage of this rerun
+    db_stats = get_db().stats()
+    st.sidebar.caption(f"DB-Zugriffe in diesem Lauf: {db_stats['checkouts']} · "
+                       f"Verbindungen: {db_stats['connections']} · "
+                       f"Schema v{migration['version']} ({migration['duration_ms']} ms beim Start)")
+    queue_stats = get_write_queue().stats()
+    st.sidebar.caption(f"Schreibwarteschlange: {queue_stats['depth']} wartend · "
+                       f"{queue_stats['mean_batch_size']} Schreibvorgänge je Commit · "
+                       f"Commit p95: {queue_stats['commit_p95_ms']} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# conftest.py
+"""Fixtures for the Flask app tests: a fresh SQLite database per test and a logged-in client"""
+import io
+import os
+import tempfile
+
+import pytest
+
+# The app reads its database URL at import time
+DATABASE = os.path.join(tempfile.mkdtemp(prefix='fmea-tests-'), 'fmea.db')
+os.environ['FMEA_DATABASE_URL'] = f'sqlite:///{DATABASE}'
+
+import flask_app  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.app.config['TESTING'] = True
+    with flask_app.app.app_context():
+        flask_app.db.session.remove()
+        flask_app.db.engine.dispose()
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(DATABASE + suffix):
+                os.remove(DATABASE + suffix)
+        flask_app.app.extensions.pop('fmea_role_cache', None)
+        flask_app.init_db()
+    yield flask_app.app
+    with flask_app.app.app_context():
+        flask_app.db.session.remove()
+
+
+@pytest.fixture
+def connection(app):
+    """Raw sqlite3 connection to the app database, as the import and batch code use it"""
+    with app.app_context():
+        conn = flask_app.db.engine.raw_connection()
+    yield conn
+    conn.close()
+
+
+def login(client, username='admin', password='admin123'):
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302
+    # The welcome message is shown by the page the login redirects to
+    with client.session_transaction() as session:
+        session.pop('_flashes', None)
+    return client
+
+
+@pytest.fixture
+def admin_client(app):
+    return login(app.test_client())
+
+
+@pytest.fixture
+def user_client(app):
+    return login(app.test_client(), 'user', 'user123')
+
+
+def csv_file(rows):
+    """Import file in the export_csv layout; rows are (function, created_at) pairs"""
+    lines = [';'.join(flask_app.fmea_db.CSV_HEADERS)]
+    for function, created_at in rows:
+        lines.append(f'{function};Ausfall;Stillstand;5;Verschleiß;4;Sichtprüfung;3;60;;Offen;{created_at}')
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+@pytest.fixture
+def import_csv(admin_client):
+    """Upload entries through /api/entries/import and return the report"""
+    def upload(rows):
+        response = admin_client.post('/api/entries/import', data={'file': (csv_file(rows), 'import.csv')},
+                                     content_type='multipart/form-data')
+        assert response.status_code == 200
+        return response.get_json()
+    return upload
@@ -0,0 +1,96 @@
+# test_export.py
+import io
+import os
+import sys
+
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+import flask_app
+import fmea_arrow
+
+
+def sheet_names(response):
+    return load_workbook(io.BytesIO(response.get_data()), read_only=True).sheetnames
+
+
+def test_xlsx_etag_is_per_user(admin_client, user_client):
+    user_response = user_client.get('/export_xlsx')
+    admin_response = admin_client.get('/export_xlsx')
+    assert sheet_names(user_response) == ['FMEA']
+    assert sheet_names(admin_response) == ['FMEA', 'Maßnahmen']
+
+    # The user's cached file must not be confirmed for the admin
+    response = admin_client.get('/export_xlsx', headers={'If-None-Match': user_response.headers['ETag']})
+    assert response.status_code == 200
+    response = user_client.get('/export_xlsx', headers={'If-None-Match': user_response.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_xlsx_etag_changes_with_role(app, user_client):
+    etag = user_client.get('/export_xlsx').headers['ETag']
+    with app.app_context():
+        user = flask_app.User.query.filter_by(username='user').first()
+        user.set_role('admin')
+        flask_app.db.session.commit()
+        flask_app.get_role_cache().role_changed(user.id)
+
+    response = user_client.get('/export_xlsx', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert sheet_names(response) == ['FMEA', 'Maßnahmen']
+
+
+def test_columnar_export_has_actions_for_admins_only(app, admin_client, user_client):
+    with app.app_context():
+        flask_app.db.session.execute(flask_app.db.text('''
+            INSERT INTO action (title, priority, status, fmea_entry_id, created_by)
+            VALUES ('Geheime Maßnahme', 'Hoch', 'Offen', 1, 1)
+        '''))
+        flask_app.db.session.commit()
+
+    user_response = user_client.get('/api/export?format=parquet')
+    admin_response = admin_client.get('/api/export?format=parquet')
+    user_table = pq.read_table(io.BytesIO(user_response.get_data()))
+    admin_table = pq.read_table(io.BytesIO(admin_response.get_data()))
+
+    assert user_table.column_names == [name for name, _, _ in fmea_arrow.ENTRY_FIELDS]
+    assert b'Geheime' not in user_response.get_data()
+    assert user_table.num_rows == 3
+    assert 'Geheime Maßnahme' in admin_table.column('action_title').to_pylist()
+    assert user_response.headers['ETag'] != admin_response.headers['ETag']
+
+
+def test_etag_survives_restart_but_not_a_new_database(app, admin_client):
+    etag = admin_client.get('/api/export?format=parquet').headers['ETag']
+    with app.app_context():
+        flask_app.db.engine.dispose()
+        flask_app.migrate_db()
+    response = admin_client.get('/api/export?format=parquet', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    # A recreated database starts its write counter again, but with a new epoch
+    with app.app_context():
+        database = flask_app.db.engine.url.database
+        flask_app.db.session.remove()
+        flask_app.db.engine.dispose()
+        os.remove(database)
+        flask_app.init_db()
+    response = admin_client.get('/api/export?format=parquet', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_columnar_export_without_pyarrow(admin_client, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'fmea_arrow')
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    response = admin_client.get('/api/export?format=parquet')
+    assert response.status_code == 501
+    assert 'pyarrow' in response.get_json()['error']
+
+
+def test_xlsx_export_without_openpyxl(admin_client, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'fmea_xlsx')
+    monkeypatch.setitem(sys.modules, 'openpyxl', None)
+    response = admin_client.get('/export_xlsx')
+    assert response.status_code == 302
+    with admin_client.session_transaction() as session:
+        assert 'openpyxl' in session['_flashes'][0][1]
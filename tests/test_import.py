@@ -0,0 +1,44 @@
+# test_import.py
+import io
+import sys
+from datetime import datetime
+
+import fmea_db
+import flask_app
+
+
+def stored_timestamps(app):
+    with app.app_context():
+        return flask_app.db.session.execute(flask_app.db.text(
+            'SELECT function, created_at, updated_at FROM fmea_entry ORDER BY id')).all()
+
+
+def test_import_writes_timestamps_in_db_format(app, import_csv):
+    before = datetime.utcnow()
+    report = import_csv([('Pumpe', '2023-05-01 08:30:00'), ('Ventil', '')])
+    after = datetime.utcnow()
+    assert report['imported'] == 2
+
+    rows = {function: (created_at, updated_at) for function, created_at, updated_at in stored_timestamps(app)
+            if function in ('Pumpe', 'Ventil')}
+    assert rows['Pumpe'][0] == '2023-05-01 08:30:00.000000'
+    for created_at, updated_at in rows.values():
+        # updated_at is the import time in UTC, not the file's 'Erstellt am'
+        assert before <= datetime.strptime(updated_at, fmea_db.DB_TIMESTAMP_FORMAT) <= after
+    assert rows['Ventil'][0] == rows['Ventil'][1]
+
+
+def test_imported_entries_show_up_in_delta_sync(admin_client, import_csv):
+    since = datetime.utcnow().isoformat()
+    import_csv([('Pumpe', '2020-01-01 00:00:00'), ('Ventil', '2020-01-02 00:00:00')])
+
+    changed = admin_client.get(f'/api/entries?since={since}').get_json()['changed']
+    assert sorted(entry['function'] for entry in changed) == ['Pumpe', 'Ventil']
+
+
+def test_import_without_pandas(admin_client, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'fmea_import', raising=False)
+    monkeypatch.setitem(sys.modules, 'pandas', None)
+    response = admin_client.post('/api/entries/import', data={'file': (io.BytesIO(b''), 'entries.csv')})
+    assert response.status_code == 501
+    assert 'pandas' in response.get_json()['error']
@@ -0,0 +1,55 @@
+# test_migrations.py
+import sqlite3
+
+import pytest
+
+import fmea_db
+
+FULLTEXT_STEP = 5  # ensure_fulltext in fmea_db.MIGRATIONS
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'fmea.db'))
+    yield conn
+    conn.close()
+
+
+def without_fts5(monkeypatch):
+    # As on an SQLite build without FTS5: CREATE VIRTUAL TABLE ... USING fts5 fails
+    monkeypatch.setattr(fmea_db, 'ensure_fulltext', lambda conn, table: False)
+
+
+def test_failed_fulltext_step_is_retried(conn, monkeypatch):
+    with monkeypatch.context() as patch:
+        without_fts5(patch)
+        result = fmea_db.run_migrations(conn, fmea_db.MIGRATIONS)
+    assert result['version'] == len(fmea_db.MIGRATIONS)
+    assert result['pending'] == [FULLTEXT_STEP, len(fmea_db.MIGRATIONS)]
+    assert not fmea_db.has_fulltext(conn, 'fmea_entries')
+
+    result = fmea_db.run_migrations(conn, fmea_db.MIGRATIONS)
+    assert result['applied'] == [FULLTEXT_STEP, len(fmea_db.MIGRATIONS)]
+    assert result['pending'] == []
+    assert fmea_db.has_fulltext(conn, 'fmea_entries')
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(fmea_db.MIGRATIONS)
+
+
+def test_database_that_skipped_fulltext_gets_the_index(conn, monkeypatch):
+    # Written before failed steps were recorded: moved past the step without an index or a pending entry
+    with monkeypatch.context() as patch:
+        without_fts5(patch)
+        fmea_db.run_migrations(conn, fmea_db.MIGRATIONS[:-1])
+    conn.execute("DELETE FROM schema_pending")
+    conn.execute("INSERT INTO users (username, password_hash) VALUES ('admin', '')")
+    conn.execute('''
+        INSERT INTO fmea_entries (function, failure_mode, failure_effect, severity, failure_cause, occurrence,
+                                  test_method, detection, created_by)
+        VALUES ('Pumpe', 'Leckage', 'Stillstand', 5, 'Dichtung', 4, 'Sichtprüfung', 3, 1)
+    ''')
+    conn.commit()
+
+    result = fmea_db.run_migrations(conn, fmea_db.MIGRATIONS)
+    assert result['applied'] == [len(fmea_db.MIGRATIONS)]
+    matches = conn.execute(fmea_db.fulltext_match_sql('fmea_entries'), (fmea_db.fulltext_query('Dicht'),))
+    assert [row[0] for row in matches] == [1]
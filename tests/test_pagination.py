@@ -0,0 +1,61 @@
+# test_pagination.py
+from urllib.parse import quote
+
+import flask_app
+
+TIMESTAMP = '2024-03-01 12:00:14'
+
+
+def insert_legacy_rows(app, count):
+    """Rows as older writers stored them: created_at and updated_at without fractional seconds"""
+    with app.app_context():
+        for number in range(count):
+            flask_app.db.session.execute(flask_app.db.text('''
+                INSERT INTO fmea_entry (function, failure_mode, failure_effect, severity, failure_cause,
+                                        occurrence, test_method, detection, status, created_by, created_at, updated_at)
+                VALUES (:function, 'Ausfall', 'Stillstand', 5, 'Verschleiß', 4, 'Sichtprüfung', 3, 'Offen', 1,
+                        :timestamp, :timestamp)
+            '''), {'function': f'Alt {number}', 'timestamp': TIMESTAMP})
+        flask_app.db.session.commit()
+
+
+def collect_pages(client, url, key):
+    ids, pages, cursor = [], 0, ''
+    while True:
+        data = client.get(f'{url}&cursor={quote(cursor)}' if cursor else url).get_json()
+        ids.extend(item['id'] for item in data[key])
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            return ids, pages
+        assert pages < 20, 'cursor does not advance'
+
+
+def test_pages_across_imported_and_legacy_rows(app, admin_client, import_csv):
+    import_csv([(f'Import {number}', TIMESTAMP) for number in range(15)])
+    insert_legacy_rows(app, 15)
+
+    ids, pages = collect_pages(admin_client, '/api/entries?page_size=10', 'entries')
+    assert len(ids) == len(set(ids)) == 33  # plus the three demo entries
+    assert pages == 4
+
+
+def test_sync_pages_across_legacy_rows(app, admin_client):
+    insert_legacy_rows(app, 30)
+
+    ids, pages = collect_pages(admin_client, '/api/entries?since=2024-01-01T00:00:00&page_size=10', 'changed')
+    assert len(ids) == len(set(ids)) == 33
+    assert pages == 4
+
+
+def test_foreign_cursor_is_rejected(admin_client):
+    cursor = flask_app.encode_cursor('created_at', 14, 1)
+    assert admin_client.get(f'/api/entries?cursor={cursor}').status_code == 400
+
+
+def test_search_cursor_needs_a_numeric_rank(admin_client):
+    for rank in ('-1.5', True, None, [1]):
+        cursor = flask_app.encode_cursor('rank', rank, 1)
+        assert admin_client.get(f'/api/entries?search=Pumpe&cursor={cursor}').status_code == 400
+    cursor = flask_app.encode_cursor('rank', -1.5, 1)
+    assert admin_client.get(f'/api/entries?search=Pumpe&cursor={cursor}').status_code == 200
@@ -0,0 +1,64 @@
+# test_roles.py
+import os
+import subprocess
+import sys
+
+import fmea_auth
+import flask_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_cached_role_is_reused(app, admin_client):
+    cache = flask_app.get_role_cache()
+    assert admin_client.get('/api/actions').status_code == 200
+    hits, misses = cache.hits, cache.misses
+    assert admin_client.get('/api/actions').status_code == 200
+    assert (cache.hits, cache.misses) == (hits + 1, misses)
+
+
+def test_role_change_reaches_workers_sharing_the_backend():
+    # Two workers on one shared backend, as with Redis
+    roles = {1: 'admin'}
+    load = lambda user_id: {'role': roles[user_id], 'role_version': 0}
+    backend = fmea_auth.MemoryBackend()
+    worker, cli = fmea_auth.RoleCache(backend), fmea_auth.RoleCache(backend)
+    assert worker.get(1, load)['role'] == 'admin'
+
+    roles[1] = 'user'
+    cli.role_changed(1)
+    assert worker.get(1, load)['role'] == 'user'
+    assert worker.get(1, load)['role'] == 'user'
+    assert (worker.hits, worker.misses) == (1, 2)
+
+
+def test_change_committed_while_loading_is_not_served():
+    cache = fmea_auth.RoleCache()
+    roles = {1: 'admin'}
+
+    def load_then_change(user_id):
+        role = roles[user_id]
+        # Another request commits a role change before this one stores what it read
+        roles[user_id] = 'user'
+        cache.role_changed(user_id)
+        return {'role': role, 'role_version': 0}
+
+    assert cache.get(1, load_then_change)['role'] == 'admin'
+    assert cache.get(1, lambda user_id: {'role': roles[user_id], 'role_version': 1})['role'] == 'user'
+
+
+def test_set_role_applies_at_once_in_process(app, admin_client):
+    assert admin_client.get('/api/actions').status_code == 200
+
+    result = app.test_cli_runner().invoke(args=['set-role', 'admin', 'user'])
+    assert result.exit_code == 0
+
+    assert admin_client.get('/api/actions').status_code == 302
+    with admin_client.session_transaction() as session:
+        assert session['role'] == 'user'
+
+
+def test_set_role_without_shared_backend_reports_the_delay(app):
+    result = subprocess.run([sys.executable, '-m', 'flask', '--app', 'flask_app', 'set-role', 'user', 'admin'],
+                            cwd=ROOT, env=dict(os.environ), check=True, capture_output=True, text=True)
+    assert 'FMEA_AUTH_REDIS_URL' in result.stdout
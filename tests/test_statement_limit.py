@@ -0,0 +1,97 @@
+# test_statement_limit.py
+import copy
+
+import flask
+import jinja2
+import pytest
+import sqlalchemy
+from flask import Response
+
+import flask_app
+
+ENTRIES = 60  # well above SQL_STATEMENT_LIMIT, so one query per row would trip the guard
+
+# Stand-ins for the page templates, reading the same attributes the pages show
+TEMPLATES = {
+    'base.html': '{% for message in get_flashed_messages() %}{{ message }}{% endfor %}'
+                 '{{ session.username }}{% block content %}{% endblock %}',
+    'dashboard.html': '{% extends "base.html" %}{% block content %}{{ stats.total }} {{ stats.open }}'
+                      '{% for entry in entries %}{{ entry.id }} {{ entry.function }} {{ entry.failure_mode }} '
+                      '{{ entry.rpn }} {{ entry.risk_level }} {{ entry.action_priority }} {{ entry.status }} '
+                      '{{ entry.created_at }} {{ url_for("edit_entry", id=entry.id) }}{% endfor %}'
+                      '{{ next_cursor }}{% endblock %}',
+    'edit_entry.html': '{% extends "base.html" %}{% block content %}{{ entry.function }} {{ entry.failure_mode }} '
+                       '{{ entry.failure_effect }} {{ entry.failure_cause }} {{ entry.test_method }} '
+                       '{{ entry.severity }} {{ entry.occurrence }} {{ entry.detection }} {{ entry.actions }} '
+                       '{{ entry.status }}{% endblock %}',
+    'actions.html': '{% extends "base.html" %}{% block content %}{% for action in actions %}{{ action.title }} '
+                    '{{ action.assigned_to }} {{ action.priority }} {{ action.status }} {{ action.due_date }} '
+                    '{% if action.fmea_entry %}{{ action.fmea_entry.id }}: {{ action.fmea_entry.function }} - '
+                    '{{ action.fmea_entry.failure_mode }}{% endif %}{% endfor %}{% endblock %}',
+    'add_action.html': '{% extends "base.html" %}{% block content %}{% for entry in fmea_entries %}'
+                       '{{ entry.id }}: {{ entry.function }} - {{ entry.failure_mode }}{% endfor %}{% endblock %}',
+    'edit_action.html': '{% extends "base.html" %}{% block content %}{{ action.title }} {{ action.description }} '
+                        '{{ action.fmea_entry_id }}{% for entry in fmea_entries %}{{ entry.id }}: '
+                        '{{ entry.function }}{% endfor %}{% endblock %}',
+}
+
+
+@pytest.fixture
+def pages(app, import_csv):
+    """Templates installed and enough entries, each with an action, to expose per-row queries"""
+    loader = app.jinja_env.loader
+    app.jinja_env.loader = jinja2.ChoiceLoader([jinja2.DictLoader(TEMPLATES), loader])
+    import_csv([(f'Pumpe {number}', '') for number in range(ENTRIES)])
+    with app.app_context():
+        flask_app.db.session.execute(flask_app.db.text('''
+            INSERT INTO action (title, priority, status, fmea_entry_id, created_by, created_at, updated_at)
+            SELECT 'Prüfen ' || id, 'Hoch', 'Offen', id, 1, created_at, updated_at FROM fmea_entry
+        '''))
+        flask_app.db.session.commit()
+    yield
+    app.jinja_env.loader = loader
+    app.jinja_env.cache.clear()
+
+
+@pytest.mark.parametrize('path', [
+    '/dashboard',
+    '/dashboard?search=Pumpe&status_filter=Offen',
+    '/dashboard?risk_filter=medium&priority_filter=M',
+    '/api/entries',
+    '/api/entries?since=2000-01-01T00:00:00',
+    '/api/actions',
+    '/api/statistics',
+    '/actions',
+    '/add_action',
+    '/edit_entry/10',
+    '/edit_action/10',
+    '/export_csv',
+])
+def test_pages_stay_within_statement_limit(admin_client, pages, path):
+    # With TESTING set, check_statement_limit raises TooManyStatements instead of answering
+    response = admin_client.get(path)
+    assert response.status_code == 200
+
+
+def test_n_plus_one_raises(app, pages):
+    with app.test_request_context('/actions'):
+        app.preprocess_request()
+        # One lazy load of the linked entry per action
+        labels = [action.fmea_entry.function for action in flask_app.Action.query.all()]
+        assert len(labels) > app.config['SQL_STATEMENT_LIMIT']
+        with pytest.raises(flask_app.TooManyStatements):
+            app.process_response(Response())
+
+
+def test_failed_statement_leaves_no_timing_state(app):
+    with app.test_request_context('/api/entries'):
+        app.preprocess_request()
+        session = flask_app.db.session
+        session.execute(flask_app.db.text('SELECT 1'))
+        info = copy.deepcopy(session.connection().info)
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            session.execute(flask_app.db.text('SELECT * FROM no_such_table'))
+        session.rollback()
+        # The pooled connection keeps its info across requests; a failed statement must not add to it
+        assert session.connection().info == info
+        assert set(flask.g.sql_timings) == {'SELECT 1'}
@@ -0,0 +1,28 @@
+# test_sync.py
+from datetime import datetime
+
+import flask_app
+
+
+def insert_action(app, entry_id):
+    with app.app_context():
+        result = flask_app.db.session.execute(flask_app.db.text('''
+            INSERT INTO action (title, priority, status, fmea_entry_id, created_by, created_at, updated_at)
+            VALUES ('Sensor tauschen', 'Hoch', 'Offen', :entry_id, 1, '2024-01-01 08:00:00.000000',
+                    '2024-01-01 08:00:00.000000')
+        '''), {'entry_id': entry_id})
+        flask_app.db.session.commit()
+        return result.lastrowid
+
+
+def test_batch_delete_syncs_unlinked_actions(app, admin_client):
+    action_id = insert_action(app, 1)
+    since = datetime.utcnow().isoformat()
+
+    report = admin_client.post('/api/entries/batch', json={'op': 'delete', 'ids': [1]}).get_json()
+    assert report['deleted'] == 1
+
+    changed = admin_client.get(f'/api/actions?since={since}').get_json()['changed']
+    assert [(action['id'], action['fmea_entry_id']) for action in changed] == [(action_id, None)]
+    deleted = admin_client.get(f'/api/entries?since={since}').get_json()['deleted']
+    assert deleted == [1]